@@ -1,4 +1,4 @@
-import os, time
+import os, time, atexit
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from modules.input_optimizer import InputOptimizer
@@ -6,27 +6,58 @@ from modules.prediction_engine import PredictionEngine
 from modules.referral_system import ReferralSystem
 from modules.parent_controls import ParentControls
 from modules.db import init_db
+from modules import serving
 
 app = Flask(__name__)
 CORS(app)
 
 init_db()
 optimizer = InputOptimizer()
-predictor = PredictionEngine(model_name=os.environ.get("OLLAMA_MODEL","llama3.2"))
+atexit.register(optimizer.close)
+predictor = PredictionEngine(model_name=os.environ.get("OLLAMA_MODEL","llama3.2"),
+                             host=os.environ.get("OLLAMA_HOST","http://localhost:11434"))
 referrals = ReferralSystem()
 controls = ParentControls()
 
+# LLM-bound routes share one limit sized to the Ollama client's in-flight
+# cap; beyond the queue they get 503 instead of tying up more workers.
+llm_limit = serving.limit("llm", concurrency=predictor.client.max_in_flight, queue=16, timeout=15.0)
+
 @app.get('/api/health')
 def health():
-    return jsonify({"status":"ok","time": time.time()})
+    return jsonify({"status":"ok","time": time.time(), "prediction_cache": predictor.cache.stats(),
+                    "ollama": predictor.client.stats(), "input_optimizer": optimizer.stats(),
+                    "serving": serving.stats()})
 
 @app.post('/api/predict')
+@llm_limit
 def predict():
     data = request.get_json(force=True)
     history = data.get('history','')
-    suggestion = predictor.predict_next(history, blocked_words=controls.get_blocklist())
+    # Served from ParentControls' in-memory cache; no blocklist query per call.
+    suggestion = serving.blocking(predictor.predict_next, history, matcher=controls.current_matcher())
     return jsonify({"suggestion": suggestion})
 
+@app.post('/api/predict/batch')
+@llm_limit
+def predict_batch():
+    data = request.get_json(force=True)
+    histories = data.get('histories') or []
+    if not isinstance(histories, list):
+        return jsonify({"ok":False,"error":"histories must be a list"}), 400
+    k = max(1, min(int(data.get('k', 3)), 5))
+    # One matcher snapshot for the whole batch.
+    predictions = serving.blocking(predictor.predict_batch, [str(h) for h in histories], k, matcher=controls.current_matcher())
+    return jsonify({"predictions": predictions})
+
+@app.post('/api/speak')
+def speak():
+    phrase = str(request.get_json(force=True).get('phrase','')).strip()
+    if not phrase:
+        return jsonify({"ok":False,"error":"missing phrase"}), 400
+    predictor.learn(phrase)
+    return jsonify({"ok":True})
+
 @app.post('/api/input/metrics')
 def input_metrics():
     data = request.get_json(force=True)
@@ -69,10 +100,16 @@ def claim():
     ok = referrals.record_referral(data.get('referrer_email'), data.get('joined_email'))
     return jsonify({"ok": ok})
 
+@app.post('/api/referrals/import')
+def import_referrals():
+    rows = request.get_json(force=True).get('referrals', [])
+    pairs = [(r.get('referrer_email'), r.get('joined_email')) for r in rows]
+    return jsonify({"ok": True, "added": referrals.import_referrals(pairs)})
+
 @app.get('/api/referrals/plan')
 def plan():
     email = request.args.get('email','')
     return jsonify({"email": email, "plan": referrals.get_plan_for(email)})
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 8000)), debug=True)
+    serving.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 8000)), debug=True)
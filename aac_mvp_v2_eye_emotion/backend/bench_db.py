@@ -0,0 +1,148 @@
+"""Concurrent read/write benchmark for the backend's SQLite access.
+
+Compares the old setup (one shared connection per component, default
+rollback journal, explicit commit) with modules.db.Database (pooled
+connections, WAL, busy_timeout, synchronous=NORMAL). Each mode runs on a
+fresh temporary database: reader threads do the plan/blocklist lookups the
+API serves, writer threads insert referrals and toggle blocked words.
+
+Writers are paced to ``--write-rate`` per second each, so both modes grow
+the tables the same way and reads are compared on equal data.
+
+    python bench_db.py --readers 8 --writers 2 --write-rate 50 --duration 5 [--json]
+"""
+import os
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import threading
+
+from modules.db import SCHEMA, Database, init_db
+
+READS = ("SELECT COUNT(*) FROM referrals WHERE referrer=?", "SELECT word FROM blocked_words")
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Legacy:
+    """The pre-Database access pattern: one connection shared by every thread."""
+    def __init__(self, path):
+        self.con = sqlite3.connect(path, check_same_thread=False)
+        self.con.executescript(SCHEMA)
+    def read(self, sql, params):
+        cur = self.con.cursor(); cur.execute(sql, params); return cur.fetchall()
+    def write(self, sql, params):
+        cur = self.con.cursor(); cur.execute(sql, params); self.con.commit()
+    def close(self):
+        self.con.close()
+
+
+class Pooled:
+    def __init__(self, path):
+        self.db = Database(path, pool_size=32)
+        init_db(self.db)
+    def read(self, sql, params):
+        return self.db.query_all(sql, params)
+    def write(self, sql, params):
+        self.db.write(sql, params)
+    def close(self):
+        self.db.close()
+
+
+def _worker(store, writer, seed, stop, out, write_rate):
+    rng = random.Random(seed)
+    lat, errors = [], {}
+    n = 0
+    next_at = time.perf_counter()
+    while not stop.is_set():
+        if writer:
+            next_at += 1.0 / write_rate
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                stop.wait(delay)
+            if rng.random() < 0.5:
+                sql, params = "INSERT OR IGNORE INTO referrals(referrer, joined) VALUES(?,?)", ("r%d@x" % rng.randrange(50), "j%d-%d@x" % (seed, n))
+            else:
+                sql, params = "INSERT OR REPLACE INTO blocked_words(word) VALUES(?)", ("w%d" % rng.randrange(200),)
+            op = store.write
+        else:
+            sql = READS[n % 2]
+            params = ("r%d@x" % rng.randrange(50),) if n % 2 == 0 else ()
+            op = store.read
+        n += 1
+        t0 = time.perf_counter()
+        try:
+            op(sql, params)
+        except sqlite3.Error as e:
+            key = "database is locked" if "locked" in str(e) else type(e).__name__ + ": " + str(e)
+            errors[key] = errors.get(key, 0) + 1
+            continue
+        lat.append(time.perf_counter() - t0)
+    out.append((writer, lat, errors))
+
+
+def run(mode, readers, writers, duration, write_rate):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    store = (Legacy if mode == "legacy" else Pooled)(path)
+    stop, out = threading.Event(), []
+    threads = [threading.Thread(target=_worker, args=(store, i < writers, i, stop, out, write_rate))
+               for i in range(readers + writers)]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    store.close()
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    result = {"mode": mode, "readers": readers, "writers": writers, "write_rate": write_rate}
+    for kind, is_writer in (("reads", False), ("writes", True)):
+        lat = [x for w, l, _ in out if w == is_writer for x in l]
+        errors = {}
+        for w, _, errs in out:
+            if w == is_writer:
+                for k, v in errs.items():
+                    errors[k] = errors.get(k, 0) + v
+        result[kind] = {
+            "ops_per_s": round(len(lat) / duration, 1),
+            "p50_ms": round(_percentile(lat, 0.50) * 1e3, 3) if lat else None,
+            "p95_ms": round(_percentile(lat, 0.95) * 1e3, 3) if lat else None,
+            "errors": errors,
+        }
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--readers", type=int, default=8)
+    ap.add_argument("--writers", type=int, default=2)
+    ap.add_argument("--write-rate", type=float, default=50.0, help="writes per second per writer thread")
+    ap.add_argument("--duration", type=float, default=5.0)
+    ap.add_argument("--mode", choices=("legacy", "pooled", "both"), default="both")
+    ap.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = ap.parse_args()
+    modes = ("legacy", "pooled") if args.mode == "both" else (args.mode,)
+    results = [run(m, args.readers, args.writers, args.duration, args.write_rate) for m in modes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        for kind in ("reads", "writes"):
+            s = r[kind]
+            print("%-7s %-6s %9.1f ops/s  p50 %s ms  p95 %s ms  errors %s"
+                  % (r["mode"], kind, s["ops_per_s"], s["p50_ms"], s["p95_ms"], s["errors"] or 0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Load test: cheap routes while /api/predict is saturated.
+
+Probes /api/health and /api/parent/blocklist at a steady rate, first with
+no other traffic and then while ``--workers`` clients hammer /api/predict
+with distinct (uncacheable) phrases. Reports probe latency for both phases
+and the predict outcomes (200s vs 503 "busy").
+
+With ``--spawn threaded|async`` it starts its own backend on a copy of
+this directory (so the real database and n-gram model are untouched),
+pointed at a built-in stub Ollama that takes ``--ollama-delay`` seconds per
+generation. Without it, ``--url`` must point at a running backend.
+
+    python loadtest.py --spawn async --workers 48 --duration 10 [--json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import argparse
+import tempfile
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+
+def _summary(lat):
+    ms = lambda v: round(v * 1e3, 1) if v is not None else None
+    return {"n": len(lat), "p50_ms": ms(_percentile(lat, 0.50)), "p95_ms": ms(_percentile(lat, 0.95)),
+            "max_ms": ms(max(lat) if lat else None)}
+
+
+def stub_ollama(delay):
+    """A fake Ollama that answers /api/generate and /api/chat after ``delay`` seconds."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            time.sleep(delay)
+            body = json.dumps({"response": "more please", "message": {"content": "more please"}, "done": True}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def spawn_backend(mode, port, ollama_url):
+    workdir = tempfile.mkdtemp(prefix="aac-loadtest-")
+    here = os.path.dirname(os.path.abspath(__file__))
+    shutil.copytree(here, workdir, dirs_exist_ok=True, ignore=shutil.ignore_patterns("__pycache__", "*.db-wal", "*.db-shm"))
+    env = dict(os.environ, ECHOES_SERVE=mode, PORT=str(port), OLLAMA_HOST=ollama_url)
+    proc = subprocess.Popen([sys.executable, "app.py"], cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)  # own group: the debug reloader forks a child
+    url = "http://127.0.0.1:%d" % port
+    for _ in range(100):
+        try:
+            requests.get(url + "/api/health", timeout=1)
+            return proc, url, workdir
+        except requests.RequestException:
+            time.sleep(0.2)
+    os.killpg(proc.pid, signal.SIGKILL)
+    raise RuntimeError("backend did not start")
+
+
+def _probe(url, stop, out):
+    s = requests.Session()
+    while not stop.is_set():
+        for path in ("/api/health", "/api/parent/blocklist"):
+            t0 = time.perf_counter()
+            try:
+                s.get(url + path, timeout=30).raise_for_status()
+                out.setdefault(path, []).append(time.perf_counter() - t0)
+            except requests.RequestException:
+                out.setdefault(path + " errors", []).append(1)
+        stop.wait(0.05)
+
+
+def _hammer(url, stop, seed, out):
+    s = requests.Session()
+    n = 0
+    while not stop.is_set():
+        n += 1
+        t0 = time.perf_counter()
+        try:
+            r = s.post(url + "/api/predict", json={"history": "load test %d %d" % (seed, n)}, timeout=60)
+            out.append((r.status_code, time.perf_counter() - t0))
+            if r.status_code == 503:
+                # Like a real client: honour Retry-After, keeping the queue full without spinning.
+                stop.wait(float(r.headers.get("Retry-After") or 1))
+        except requests.RequestException:
+            out.append((0, time.perf_counter() - t0))
+
+
+def run(url, workers, duration):
+    result = {}
+    for phase, n in (("idle", 0), ("saturated", workers)):
+        stop, probes, predicts = threading.Event(), {}, []
+        hammers = [threading.Thread(target=_hammer, args=(url, stop, i, predicts), daemon=True) for i in range(n)]
+        for t in hammers:
+            t.start()
+        if n:
+            time.sleep(1.0)  # let the predict queue fill up
+        prober = threading.Thread(target=_probe, args=(url, stop, probes), daemon=True)
+        prober.start()
+        time.sleep(duration)
+        stop.set()
+        prober.join()
+        for t in hammers:
+            t.join(65)
+        phase_result = {path: _summary(lat) for path, lat in probes.items() if not path.endswith("errors")}
+        phase_result["probe_errors"] = sum(len(v) for k, v in probes.items() if k.endswith("errors"))
+        if n:
+            codes = {}
+            for code, _ in predicts:
+                codes[str(code)] = codes.get(str(code), 0) + 1
+            phase_result["/api/predict"] = dict(_summary([t for c, t in predicts if c == 200]), status=codes)
+        result[phase] = phase_result
+    result["server"] = requests.get(url + "/api/health", timeout=10).json().get("serving")
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--spawn", choices=("threaded", "async"), help="start a backend in this mode with a stub Ollama")
+    ap.add_argument("--port", type=int, default=8765, help="port for --spawn")
+    ap.add_argument("--ollama-delay", type=float, default=2.0, help="stub generation time in seconds")
+    ap.add_argument("--workers", type=int, default=48, help="concurrent /api/predict clients")
+    ap.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    ap.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = ap.parse_args()
+    proc = workdir = None
+    url = args.url
+    if args.spawn:
+        stub = stub_ollama(args.ollama_delay)
+        proc, url, workdir = spawn_backend(args.spawn, args.port, "http://127.0.0.1:%d" % stub.server_address[1])
+    try:
+        result = run(url, args.workers, args.duration)
+    finally:
+        if proc is not None:
+            os.killpg(proc.pid, signal.SIGTERM)
+            proc.wait(10)
+            shutil.rmtree(workdir, ignore_errors=True)
+    result["mode"] = args.spawn or "external"
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for phase in ("idle", "saturated"):
+        for path in ("/api/health", "/api/parent/blocklist", "/api/predict"):
+            s = result[phase].get(path)
+            if s:
+                print("%-9s %-22s n=%-5d p50 %s ms  p95 %s ms  max %s ms%s"
+                      % (phase, path, s["n"], s["p50_ms"], s["p95_ms"], s["max_ms"],
+                         "  status %s" % s["status"] if "status" in s else ""))
+    print("server:", json.dumps(result["server"]))
+
+
+if __name__ == "__main__":
+    main()
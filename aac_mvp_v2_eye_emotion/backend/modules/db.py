@@ -1,4 +1,5 @@
-import sqlite3, os
+import sqlite3, os, threading
+from contextlib import contextmanager
 DB_PATH = os.path.join(os.path.dirname(__file__), "aac.db")
 
 SCHEMA = '''
@@ -12,13 +13,104 @@ CREATE TABLE IF NOT EXISTS referrals(
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   referrer TEXT, joined TEXT UNIQUE
 );
+CREATE INDEX IF NOT EXISTS referrals_referrer ON referrals(referrer);
+-- Per-referrer count and plan, kept in step with referrals by ReferralSystem.
+CREATE TABLE IF NOT EXISTS referral_counts(
+  referrer TEXT PRIMARY KEY, count INTEGER NOT NULL DEFAULT 0, plan TEXT NOT NULL DEFAULT 'Basic'
+) WITHOUT ROWID;
+-- InputOptimizer snapshots: decayed per-user, per-method running stats.
+CREATE TABLE IF NOT EXISTS input_stats(
+  user_id TEXT, method TEXT, time_mean REAL, time_weight REAL,
+  errors REAL, selections REAL, updated REAL,
+  PRIMARY KEY(user_id, method)
+) WITHOUT ROWID;
 '''
 
-def init_db():
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.executescript(SCHEMA)
-    cur.execute("SELECT COUNT(*) FROM parent_settings")
-    if cur.fetchone()[0] == 0:
-        cur.execute("INSERT INTO parent_settings(locked) VALUES (0)")
-    con.commit(); con.close()
+def _reusable(con):
+    try: return not con.in_transaction
+    except sqlite3.ProgrammingError: return False  # closed
+
+class Database:
+    """Pooled SQLite connections. WAL lets readers run alongside a writer;
+    busy_timeout makes writers wait instead of failing with "database is
+    locked"; synchronous=NORMAL is durable enough under WAL. Connections are
+    reused across requests, and each keeps a cache of prepared statements
+    keyed by SQL text, so callers pass the same SQL strings with parameters."""
+    def __init__(self, path=DB_PATH, pool_size=8, busy_timeout_ms=5000, synchronous="NORMAL", cached_statements=128):
+        self.path = path
+        self.pool_size = pool_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous
+        self.cached_statements = cached_statements
+        self._lock = threading.Lock()
+        self._idle = []
+    def connect(self):
+        """A new, tuned connection outside the pool."""
+        # isolation_level=None: autocommit; transaction() issues BEGIN itself.
+        con = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False,
+                              cached_statements=self.cached_statements)
+        con.execute("PRAGMA busy_timeout=%d" % int(self.busy_timeout_ms))
+        con.execute("PRAGMA synchronous=%s" % self.synchronous)
+        return con
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            con = self._idle.pop() if self._idle else None
+        if con is None:
+            con = self.connect()
+        try:
+            yield con
+        finally:
+            # Only a clean connection goes back: one still inside a transaction
+            # (a failed COMMIT) or already closed would poison the next caller.
+            if _reusable(con):
+                with self._lock:
+                    if len(self._idle) < self.pool_size:
+                        self._idle.append(con); con = None
+            if con is not None: con.close()
+    def query_one(self, sql, params=()):
+        with self.connection() as con: return con.execute(sql, params).fetchone()
+    def query_all(self, sql, params=()):
+        with self.connection() as con: return con.execute(sql, params).fetchall()
+    def query_value(self, sql, params=(), default=None):
+        row = self.query_one(sql, params); return row[0] if row else default
+    def write(self, sql, params=()):
+        """Run one statement in autocommit mode; returns the row count."""
+        with self.connection() as con: return con.execute(sql, params).rowcount
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE takes the write lock up front, so a transaction
+        never fails halfway through on a lock upgrade."""
+        with self.connection() as con:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                yield con
+            except BaseException:
+                try: con.execute("ROLLBACK")
+                except sqlite3.Error: con.close()  # state unknown; connection() drops it
+                raise
+            else:
+                con.execute("COMMIT")
+    def close(self):
+        with self._lock:
+            cons, self._idle = self._idle, []
+        for con in cons: con.close()
+
+_db = None
+_db_lock = threading.Lock()
+
+def get_db():
+    global _db
+    with _db_lock:
+        if _db is None: _db = Database()
+        return _db
+
+def init_db(db=None):
+    db = db or get_db()
+    with db.connection() as con:
+        # WAL is a property of the database file; it persists once set.
+        con.execute("PRAGMA journal_mode=WAL")
+        con.executescript(SCHEMA)
+    with db.transaction() as con:
+        if con.execute("SELECT COUNT(*) FROM parent_settings").fetchone()[0] == 0:
+            con.execute("INSERT INTO parent_settings(locked) VALUES (0)")
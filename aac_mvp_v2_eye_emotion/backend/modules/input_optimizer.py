@@ -1,19 +1,215 @@
-class InputOptimizer:
+"""Per-user input method optimizer.
+
+Each user has, per method, an exponentially time-decayed mean of
+``avg_time_ms`` and decayed error/selection totals (half-life
+``half_life`` seconds), so old behavior fades. Decay scales a method's
+weights uniformly and leaves its score unchanged, so a score only moves
+when that method gets a sample. The best method is therefore kept
+incrementally; the other methods are rescanned only when the current best
+gets worse.
+
+State lives in a bounded LRU of users. Changed users are snapshotted to
+SQLite every ``snapshot_interval`` seconds and when they are evicted. The
+most recently active users are restored at startup, and the rest are
+loaded on first use.
+"""
+import time
+import threading
+from collections import OrderedDict
+
+from .db import get_db
+
+
+class _MethodStats:
+    __slots__ = ("time_mean", "time_weight", "errors", "selections", "updated")
+
+    def __init__(self, time_mean=0.0, time_weight=0.0, errors=0.0, selections=0.0, updated=0.0):
+        self.time_mean = time_mean
+        self.time_weight = time_weight
+        self.errors = errors
+        self.selections = selections
+        self.updated = updated
+
+    def add(self, selections, errors, avg_time, now, half_life):
+        decay = 0.5 ** (max(0.0, now - self.updated) / half_life) if self.updated else 0.0
+        self.time_weight = self.time_weight * decay + 1.0
+        # Weighted running mean: exact while samples are few, an EWMA later.
+        self.time_mean += (avg_time - self.time_mean) / self.time_weight
+        self.errors = self.errors * decay + errors
+        self.selections = self.selections * decay + selections
+        self.updated = now
+
+    def score(self):
+        acc = 1.0 - (self.errors / max(self.selections, 1.0))
+        return self.time_mean / max(acc, 0.1)
+
+
+class _UserState:
+    __slots__ = ("methods", "scores", "best", "dirty")
+
     def __init__(self):
-        self.stats = {}
+        self.methods = {}
+        self.scores = {}
+        self.best = None
+        self.dirty = False
+
+    def update(self, method, selections, errors, avg_time, now, half_life):
+        st = self.methods.get(method)
+        if st is None:
+            st = self.methods[method] = _MethodStats()
+        st.add(selections, errors, avg_time, now, half_life)
+        self._rescore(method, st.score())
+        self.dirty = True
+        return self.best
+
+    def _rescore(self, method, score):
+        old = self.scores.get(method)
+        self.scores[method] = score
+        if self.best is None or score < self.scores[self.best]:
+            self.best = method
+        elif method == self.best and old is not None and score > old:
+            self.best = min(self.scores, key=self.scores.get)
+
+
+class InputOptimizer:
+    def __init__(self, db=None, half_life=3600.0, max_users=10000, snapshot_interval=60.0):
+        self.db = db or get_db()
+        self.half_life = half_life
+        self.max_users = max_users
+        self.snapshot_interval = snapshot_interval
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+        # Evicted users whose state is still being written out.
+        self._pending = {}
+        self.evictions = 0
+        self.snapshots = 0
+        self._restore_recent()
+        self._stop = threading.Event()
+        self._thread = None
+        if snapshot_interval:
+            self._thread = threading.Thread(target=self._snapshot_loop, daemon=True)
+            self._thread.start()
+
     def update_and_choose(self, m):
-        method = m.get('method','touch')
-        st = self.stats.setdefault(method, {'selections':0,'errors':0,'time_sum':0,'samples':0})
-        st['selections'] += int(m.get('selections',0))
-        st['errors'] += int(m.get('errors',0))
-        st['time_sum'] += float(m.get('avg_time_ms',0))
-        st['samples'] += 1
-        best, best_score = method, 1e18
-        for k,v in self.stats.items():
-            sel = max(v['selections'],1)
-            acc = 1.0 - (v['errors']/sel)
-            avg_time = (v['time_sum']/max(v['samples'],1)) if v['samples'] else 9e9
-            score = avg_time / max(acc, 0.1)
-            if score < best_score:
-                best_score, best = score, k
+        user = str(m.get('user_id') or 'default')
+        method = m.get('method', 'touch')
+        selections, errors = int(m.get('selections', 0)), int(m.get('errors', 0))
+        avg_time = float(m.get('avg_time_ms', 0))
+        now = time.time()
+        with self._lock:
+            state = self._users.get(user)
+            if state is None:
+                state = self._pending.pop(user, None) or self._load(user)
+                evicted = self._insert(user, state)
+            else:
+                self._users.move_to_end(user)
+                evicted = []
+            best = state.update(method, selections, errors, avg_time, now, self.half_life)
+            rows = [(old_user, self._rows(old_state)) for old_user, old_state in evicted]
+        if evicted:
+            try:
+                self._save(rows)
+            except Exception as e:
+                # Still in _pending; the snapshot loop retries them.
+                print("InputOptimizer eviction save failed:", e)
+            else:
+                self._forget_pending(evicted)
         return best
+
+    def _forget_pending(self, saved):
+        with self._lock:
+            for user, state in saved:
+                # Unless the user came back (and took the state) meanwhile.
+                if self._pending.get(user) is state:
+                    del self._pending[user]
+
+    def _insert(self, user, state):
+        # Caller holds the lock; returns evicted users that still need saving.
+        self._users[user] = state
+        evicted = []
+        while len(self._users) > self.max_users:
+            old_user, old_state = self._users.popitem(last=False)
+            self.evictions += 1
+            if old_state.dirty:
+                self._pending[old_user] = old_state
+                evicted.append((old_user, old_state))
+        return evicted
+
+    def _state_from_rows(self, rows):
+        state = _UserState()
+        for method, time_mean, time_weight, errors, selections, updated in rows:
+            st = state.methods[method] = _MethodStats(time_mean, time_weight, errors, selections, updated)
+            state._rescore(method, st.score())
+        return state
+
+    def _load(self, user):
+        return self._state_from_rows(self.db.query_all(
+            "SELECT method, time_mean, time_weight, errors, selections, updated FROM input_stats WHERE user_id=?", (user,)))
+
+    def _restore_recent(self):
+        rows = self.db.query_all(
+            "SELECT user_id, method, time_mean, time_weight, errors, selections, updated FROM input_stats"
+            " WHERE user_id IN (SELECT user_id FROM input_stats GROUP BY user_id ORDER BY MAX(updated) DESC LIMIT ?)"
+            " ORDER BY updated", (self.max_users,))
+        by_user = OrderedDict()
+        for row in rows:
+            by_user.setdefault(row[0], []).append(row[1:])
+            by_user.move_to_end(row[0])
+        with self._lock:
+            for user, user_rows in by_user.items():
+                self._users[user] = self._state_from_rows(user_rows)
+
+    @staticmethod
+    def _rows(state):
+        return [(m, st.time_mean, st.time_weight, st.errors, st.selections, st.updated) for m, st in state.methods.items()]
+
+    def _save(self, users):
+        with self.db.transaction() as con:
+            for user, rows in users:
+                con.executemany(
+                    "INSERT OR REPLACE INTO input_stats(user_id, method, time_mean, time_weight, errors, selections, updated)"
+                    " VALUES(?,?,?,?,?,?,?)", [(user,) + r for r in rows])
+
+    def snapshot(self):
+        """Write every changed user to SQLite; returns how many were written."""
+        with self._lock:
+            dirty = []
+            for user, state in self._users.items():
+                if state.dirty:
+                    dirty.append((user, self._rows(state)))
+                    state.dirty = False
+            # Evicted users whose save failed earlier.
+            pending = list(self._pending.items())
+            dirty += [(user, self._rows(state)) for user, state in pending]
+        if dirty:
+            try:
+                self._save(dirty)
+            except Exception:
+                # Try again next time rather than lose the changes.
+                with self._lock:
+                    for user, _ in dirty:
+                        if user in self._users: self._users[user].dirty = True
+                raise
+            self._forget_pending(pending)
+            self.snapshots += 1
+        return len(dirty)
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_interval):
+            try:
+                self.snapshot()
+            except Exception as e:
+                print("InputOptimizer snapshot failed:", e)
+
+    def close(self):
+        self._stop.set()
+        self.snapshot()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "dirty": sum(1 for s in self._users.values() if s.dirty),
+                "evictions": self.evictions,
+                "snapshots": self.snapshots,
+            }
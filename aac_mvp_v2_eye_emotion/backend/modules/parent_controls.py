@@ -1,15 +1,57 @@
-import sqlite3
-from .db import DB_PATH
+import threading, time
+from .db import get_db
+from .word_matcher import WordMatcher
 class ParentControls:
-    def __init__(self):
-        self.con = sqlite3.connect(DB_PATH, check_same_thread=False)
+    # The blocklist is served from memory. It is re-read from SQLite only when
+    # our own writes bump `version` or, checked at most every `check_interval`
+    # seconds, PRAGMA data_version shows another connection committed.
+    def __init__(self, check_interval=1.0, db=None):
+        self.db = db or get_db()
+        # data_version is per connection, so changes are watched on our own one.
+        self._watch = self.db.connect()
+        self.check_interval = check_interval
+        self.version = 0
+        self._lock = threading.Lock()
+        self._loaded_version = -1
+        self._data_version = None
+        self._checked_at = 0.0
+        self._blocked = frozenset()
+        self.matcher = WordMatcher()
+        self.refresh(force=True)
+    def _db_data_version(self):
+        return self._watch.execute("PRAGMA data_version").fetchone()[0]
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and self._loaded_version == self.version and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            data_version = self._db_data_version()
+            if not force and self._loaded_version == self.version and data_version == self._data_version:
+                return
+            version = self.version
+            self._blocked = frozenset(r[0] for r in self.db.query_all("SELECT word FROM blocked_words"))
+            # A new matcher per version, never reloaded in place, so callers
+            # holding current_matcher() keep a consistent snapshot.
+            self.matcher = WordMatcher(self._blocked)
+            self._data_version, self._loaded_version = data_version, version
+    def blocked(self):
+        """Cached frozenset of blocked words."""
+        self.refresh(); return self._blocked
+    def current_matcher(self):
+        """Immutable WordMatcher built from the same version as blocked()."""
+        self.refresh(); return self.matcher
     def get_blocklist(self):
-        cur = self.con.cursor(); cur.execute("SELECT word FROM blocked_words"); return [r[0] for r in cur.fetchall()]
+        return sorted(self.blocked())
     def block_word(self, w):
-        cur = self.con.cursor(); cur.execute("INSERT OR IGNORE INTO blocked_words(word) VALUES(?)",(w,)); self.con.commit()
+        with self._lock:
+            self.db.write("INSERT OR IGNORE INTO blocked_words(word) VALUES(?)",(w,)); self.version += 1
+        self.refresh()
     def unblock_word(self, w):
-        cur = self.con.cursor(); cur.execute("DELETE FROM blocked_words WHERE word=?",(w,)); self.con.commit()
+        with self._lock:
+            self.db.write("DELETE FROM blocked_words WHERE word=?",(w,)); self.version += 1
+        self.refresh()
     def lock_settings(self, locked: bool):
-        cur = self.con.cursor(); cur.execute("UPDATE parent_settings SET locked=? WHERE id=1",(1 if locked else 0,)); self.con.commit()
+        self.db.write("UPDATE parent_settings SET locked=? WHERE id=1",(1 if locked else 0,))
     def is_locked(self):
-        cur = self.con.cursor(); cur.execute("SELECT locked FROM parent_settings WHERE id=1"); row = cur.fetchone(); return bool(row[0]) if row else False
+        return bool(self.db.query_value("SELECT locked FROM parent_settings WHERE id=1", (), 0))
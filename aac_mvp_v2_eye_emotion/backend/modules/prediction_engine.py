@@ -1,24 +1,142 @@
-import requests, random
+import os, re, random, threading
+from concurrent.futures import ThreadPoolExecutor
+from .ngram_model import NGramModel
+from .ollama_client import OllamaClient
+from .suggest_cache import SuggestionCache, make_key
+
+NGRAM_PATH = os.path.join(os.path.dirname(__file__), "ngram.bin")
+TEMPERATURE = 0.6
+FALLBACK_WORDS = ['I want','help','more','stop','yes','no','toilet','drink','eat','play']
+# Suggestions are a few words, so generation is capped; keep_alive keeps the
+# model loaded between board taps instead of reloading it after 5 minutes.
+NUM_PREDICT = 16
+KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+MAX_BATCH = 16
+_LIST_MARK_RE = re.compile(r"^\s*(?:[-*\u2022]|\d+[.)])\s*")
 
 class PredictionEngine:
-    def __init__(self, model_name='llama3.2', host='http://localhost:11434'):
+    def __init__(self, model_name='llama3.2', host='http://localhost:11434', ngram_path=NGRAM_PATH):
         self.model = model_name; self.host = host
+        self.client = OllamaClient(host=host, timeout=(2.0, 20.0))
+        self.ngram = NGramModel(ngram_path)
+        self.cache = SuggestionCache()
+        # Speculative prefetch leaves one Ollama slot free for the phrase on screen.
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=max(1, self.client.max_in_flight - 1))
+        self._prefetch_lock = threading.Lock()
+        self._prefetching = {}  # (history, k) -> Future, for the newest batch only
 
     def _ollama_generate(self, prompt):
-        r = requests.post(f"{self.host}/api/generate", json={
-            "model": self.model, "prompt": prompt, "stream": False,
-            "options": {"temperature": 0.6, "num_ctx": 2048}
-        }, timeout=20)
-        r.raise_for_status()
-        return ' '.join(r.json().get('response','').split()[:3]).strip()
-
-    def predict_next(self, history, blocked_words=None):
-        blocked = set((blocked_words or []))
-        try:
+        out = self.client.generate(prompt, model=self.model, keep_alive=KEEP_ALIVE,
+                                   options={"temperature": TEMPERATURE, "num_ctx": 2048, "num_predict": NUM_PREDICT})
+        return ' '.join(out.split()[:3]).strip()
+
+    def _cached_generate(self, history):
+        # Cache the raw model output; blocked words are filtered per call.
+        key = make_key([], history, 1, self.model, TEMPERATURE)
+        out = self.cache.get(key)
+        if out is None:
             out = self._ollama_generate(
                 f"Phrase so far: '{history}'. Suggest a very short AAC-friendly next word/phrase. Keep it simple."
             )
+            self.cache.put(key, out)
+        return out
+
+    def learn(self, phrase):
+        # Only phrases the user actually spoke; predictions see half-built and
+        # speculative phrases that must not be counted.
+        if phrase and phrase.strip(): self.ngram.learn(phrase)
+
+    def _offline_next(self, history, is_blocked):
+        for w in self.ngram.next_words(history, 5):
+            if not is_blocked(w): return w
+        return random.choice(FALLBACK_WORDS)
+
+    def predict_next(self, history, blocked_words=None, matcher=None):
+        # A WordMatcher (whole words, leetspeak-normalized) wins over a plain word list.
+        if matcher is not None:
+            is_blocked = matcher.contains
+        else:
+            blocked = blocked_words if isinstance(blocked_words, (set, frozenset)) else set(blocked_words or [])
+            is_blocked = lambda t: t.lower() in blocked
+        try:
+            out = self._cached_generate(history)
         except Exception:
-            out = random.choice(['I want','help','more','stop','yes','no','toilet','drink','eat','play'])
-        toks = [t for t in out.split() if t.lower() not in blocked]
+            out = self._offline_next(history, is_blocked)
+        toks = [t for t in out.split() if not is_blocked(t)]
         return " ".join(toks) if toks else "..."
+
+    def _candidates_key(self, history, k):
+        # Own key space: a list of candidates, not _cached_generate's single string.
+        return make_key(['candidates'], history, k, self.model, TEMPERATURE)
+
+    def _candidates_generate(self, history, k):
+        raw = self.client.generate(
+            f"Phrase so far: '{history}'. Suggest {k} different very short AAC-friendly next words/phrases, "
+            "one per line, no numbering. Keep them simple.",
+            model=self.model, keep_alive=KEEP_ALIVE,
+            options={"temperature": TEMPERATURE, "num_ctx": 2048, "num_predict": NUM_PREDICT * k})
+        out = []
+        for line in raw.splitlines():
+            cand = ' '.join(_LIST_MARK_RE.sub('', line).split()[:3]).strip(' .,"')
+            if cand and cand not in out: out.append(cand)
+        out = out[:k]
+        self.cache.put(self._candidates_key(history, k), out)
+        return out
+
+    def _prefetch(self, histories, k):
+        """Queue background generations for ``histories`` and drop whatever
+        the previous batch still had queued: once the phrase has moved on,
+        its speculative contexts are stale. Generations already running are
+        left to finish and fill the cache. Returns the previous batch's
+        futures that were not cancelled, keyed like ``_prefetching``."""
+        with self._prefetch_lock:
+            stale, self._prefetching = self._prefetching, {}
+            kept = {key: fut for key, fut in stale.items() if not fut.cancel()}
+            for h in histories:
+                self._prefetching[(h, k)] = self._prefetch_pool.submit(self._candidates_generate, h, k)
+        return kept
+
+    def _offline_candidates(self, history, k):
+        return self.ngram.next_words(history, k) + [w for w in FALLBACK_WORDS if w not in history.split()][:k]
+
+    def predict_batch(self, histories, k=3, matcher=None):
+        """Ranked candidates for the current phrase (``histories[0]``) plus
+        speculative contexts, e.g. the phrase with each board symbol appended.
+        The current phrase is answered first and never waits on the others.
+        Speculative contexts already in the cache are returned too; the rest
+        are generated in the background (at most max_in_flight - 1 at once)
+        and come back with ``candidates: None``, to be served from the cache
+        when the board asks for them. A newer batch cancels the queued
+        generations of the previous one. Blocked words are checked once per
+        distinct token for the batch."""
+        histories = [h or '' for h in histories[:MAX_BATCH]]
+        if not histories: return []
+        current = histories[0]
+        cached = {h: self.cache.get(self._candidates_key(h, k)) for h in dict.fromkeys(histories)}
+        pending = [h for h, c in cached.items() if c is None and h != current]
+        running = self._prefetch(pending, k)
+        verdicts = {}
+        def is_blocked(t):
+            v = verdicts.get(t)
+            if v is None: v = verdicts[t] = bool(matcher and matcher.contains(t))
+            return v
+        def rank(h, cands):
+            if len(cands) < k: cands = cands + [c for c in self._offline_candidates(h, k) if c not in cands]
+            out = []
+            for c in cands:
+                toks = [t for t in c.split() if not is_blocked(t)]
+                if toks and ' '.join(toks) not in out: out.append(' '.join(toks))
+                if len(out) >= k: break
+            return out
+        cands = cached[current]
+        if cands is None:
+            try:
+                # The last batch may already be generating this phrase; join it
+                # rather than asking Ollama twice.
+                fut = running.get((current, k))
+                cands = fut.result() if fut is not None else self._candidates_generate(current, k)
+            except Exception: cands = []
+        ranked = {current: rank(current, cands)}
+        for h, c in cached.items():
+            if h != current and c is not None: ranked[h] = rank(h, c)
+        return [{"history": h, "candidates": ranked.get(h)} for h in histories]
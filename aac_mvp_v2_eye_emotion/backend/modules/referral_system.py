@@ -1,18 +1,50 @@
-import sqlite3
-from .db import DB_PATH
+from bisect import bisect_right
+from .db import get_db
 PLANS = [('Basic',0),('Basic Plus',3),('Basic Pro',5),('Basic Max',8),('Elite',12)]
+_THRESHOLDS = [thr for _, thr in PLANS]
+def plan_for_count(c):
+    return PLANS[max(0, bisect_right(_THRESHOLDS, c) - 1)][0]
 class ReferralSystem:
-    def __init__(self):
-        self.con = sqlite3.connect(DB_PATH, check_same_thread=False)
+    # Plans are read from referral_counts (one primary-key lookup) instead of
+    # counting referrals per request. The counter only moves when an insert
+    # really adds a row, in the same transaction as that insert.
+    def __init__(self, db=None):
+        self.db = db or get_db()
+        self._backfill()
+    def _backfill(self):
+        # Databases created before referral_counts existed start empty.
+        with self.db.transaction() as con:
+            if con.execute("SELECT 1 FROM referral_counts LIMIT 1").fetchone(): return
+            rows = con.execute("SELECT referrer, COUNT(*) FROM referrals WHERE referrer IS NOT NULL GROUP BY referrer").fetchall()
+            con.executemany("INSERT INTO referral_counts(referrer, count, plan) VALUES(?,?,?)", [(r, c, plan_for_count(c)) for r, c in rows])
+    def _bump(self, con, referrer, n):
+        con.execute("INSERT INTO referral_counts(referrer, count) VALUES(?,?) ON CONFLICT(referrer) DO UPDATE SET count=count+excluded.count", (referrer, n))
+        c = con.execute("SELECT count FROM referral_counts WHERE referrer=?", (referrer,)).fetchone()[0]
+        con.execute("UPDATE referral_counts SET plan=? WHERE referrer=?", (plan_for_count(c), referrer))
     def record_referral(self, referrer, joined):
         try:
-            cur = self.con.cursor()
-            cur.execute("INSERT OR IGNORE INTO referrals(referrer, joined) VALUES(?,?)",(referrer, joined))
-            self.con.commit(); return True
+            with self.db.transaction() as con:
+                added = con.execute("INSERT OR IGNORE INTO referrals(referrer, joined) VALUES(?,?)",(referrer, joined)).rowcount
+                if added and referrer is not None: self._bump(con, referrer, 1)
+            return True
         except Exception: return False
+    def import_referrals(self, pairs, batch_size=1000):
+        """Bulk-load (referrer, joined) pairs, e.g. from a referral campaign,
+        in transactions of batch_size rows. Returns the number of new rows."""
+        added, batch = 0, []
+        for pair in pairs:
+            batch.append(pair)
+            if len(batch) >= batch_size: added += self._import_batch(batch); batch = []
+        if batch: added += self._import_batch(batch)
+        return added
+    def _import_batch(self, batch):
+        counts, added = {}, 0
+        with self.db.transaction() as con:
+            for referrer, joined in batch:
+                if con.execute("INSERT OR IGNORE INTO referrals(referrer, joined) VALUES(?,?)",(referrer, joined)).rowcount:
+                    added += 1
+                    if referrer is not None: counts[referrer] = counts.get(referrer, 0) + 1
+            for referrer, n in counts.items(): self._bump(con, referrer, n)
+        return added
     def get_plan_for(self, email):
-        cur = self.con.cursor(); cur.execute("SELECT COUNT(*) FROM referrals WHERE referrer=?", (email,)); c = cur.fetchone()[0]
-        plan="Basic"
-        for name, thr in PLANS:
-            if c >= thr: plan = name
-        return plan
+        return self.db.query_value("SELECT plan FROM referral_counts WHERE referrer=?", (email,), "Basic")
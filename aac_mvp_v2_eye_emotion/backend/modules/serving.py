@@ -0,0 +1,212 @@
+"""Serving modes and per-route concurrency limits.
+
+``ECHOES_SERVE=threaded`` (the default) runs Werkzeug's threaded server, one
+OS thread per request. ``ECHOES_SERVE=async`` runs eventlet's WSGI server:
+every request is a green thread on one event loop, so requests that are
+waiting cost almost nothing. Blocking work such as Ollama calls is handed
+to eventlet's OS thread pool with ``blocking``/``iterate`` (size set by
+EVENTLET_THREADPOOL_SIZE, default 20), which keeps the loop serving cheap
+routes. The process is deliberately not monkey-patched, so tracker, teaching
+and snapshot threads stay real threads and camera/model calls cannot stall
+the loop.
+
+``limit(name, concurrency, queue, timeout)`` caps how many requests a route
+runs at once. Up to ``queue`` more wait at most ``timeout`` seconds, and the
+rest get 503 with Retry-After straight away, so an LLM backlog can never
+hold every worker. Routes with a local fallback take ``slot()`` around the
+model call instead and fall back when none is free.
+"""
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import Response, jsonify
+
+ASYNC = os.environ.get("ECHOES_SERVE", "threaded").strip().lower() == "async"
+
+_limits = {}
+
+
+def _semaphore(n):
+    if ASYNC:
+        # Waiters are green threads on the event loop; a threading semaphore
+        # would block the whole loop.
+        from eventlet.semaphore import Semaphore
+        return Semaphore(n)
+    return threading.Semaphore(n)
+
+
+def blocking(fn, *args, **kwargs):
+    """Run a blocking call without holding up the event loop in async mode."""
+    if not ASYNC:
+        return fn(*args, **kwargs)
+    from eventlet import tpool
+    return tpool.execute(fn, *args, **kwargs)
+
+
+_DONE = object()
+
+
+def iterate(gen):
+    """Iterate a blocking generator (e.g. a model stream) off the event loop."""
+    if not ASYNC:
+        yield from gen
+        return
+    from eventlet import tpool
+    try:
+        while True:
+            item = tpool.execute(next, gen, _DONE)
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        tpool.execute(gen.close)
+
+
+def hub_handoff(socketio, fn, interval=0.01):
+    """Wrap ``fn`` for calls made from real OS threads (e.g. tracker stages)
+    that must reach Socket.IO. Threaded mode calls it directly. In async mode
+    those threads must not touch the eventlet hub, so each call is parked and
+    a hub task started with ``socketio.start_background_task`` makes it.
+    Only the newest parked call is kept, which suits state like gaze where a
+    newer value supersedes an unsent one."""
+    if not ASYNC:
+        return fn
+    outbox = deque(maxlen=1)
+
+    def drain():
+        while True:
+            try:
+                args, kwargs = outbox.popleft()
+            except IndexError:
+                socketio.sleep(interval)
+                continue
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                pass  # one failed emit must not end the task
+
+    socketio.start_background_task(drain)
+    return lambda *args, **kwargs: outbox.append((args, kwargs))
+
+
+class RouteLimit:
+    def __init__(self, name, concurrency, queue=0, timeout=10.0, retry_after=1):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = _semaphore(concurrency)
+        # Guards the counters only; never held while waiting for a slot.
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def acquire(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.waiting >= self.queue:
+                    self.rejected += 1
+                    return False
+                self.waiting += 1
+            try:
+                ok = self._slots.acquire(timeout=self.timeout)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+            if not ok:
+                with self._lock:
+                    self.timed_out += 1
+                return False
+        with self._lock:
+            self.active += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+            self.served += 1
+        self._slots.release()
+
+    @contextmanager
+    def slot(self):
+        """``with limit.slot() as ok``: hold a slot for just the block, e.g.
+        around the model call of a route that has a fallback; ``ok`` is False
+        when none freed up in time."""
+        ok = self.acquire()
+        try:
+            yield ok
+        finally:
+            if ok:
+                self.release()
+
+    def busy_response(self):
+        resp = jsonify({"ok": False, "error": "busy", "route": self.name})
+        resp.status_code = 503
+        resp.headers["Retry-After"] = str(self.retry_after)
+        return resp
+
+    def __call__(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.acquire():
+                return self.busy_response()
+            try:
+                rv = view(*args, **kwargs)
+            except BaseException:
+                self.release()
+                raise
+            if isinstance(rv, Response) and rv.is_streamed:
+                # Hold the slot until the stream has been sent.
+                rv.call_on_close(self.release)
+            else:
+                self.release()
+            return rv
+        return wrapper
+
+    def stats(self):
+        with self._lock:
+            return {
+                "concurrency": self.concurrency,
+                "queue": self.queue,
+                "active": self.active,
+                "waiting": self.waiting,
+                "served": self.served,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
+
+
+def limit(name, concurrency, queue=0, timeout=10.0):
+    rl = _limits[name] = RouteLimit(name, concurrency, queue, timeout)
+    return rl
+
+
+def stats():
+    return {"mode": "async" if ASYNC else "threaded",
+            "routes": {name: rl.stats() for name, rl in _limits.items()}}
+
+
+def socketio_mode():
+    return "eventlet" if ASYNC else "threading"
+
+
+def run(app, host="0.0.0.0", port=5000, debug=False, socketio=None):
+    if socketio is not None:
+        if ASYNC:
+            socketio.run(app, host=host, port=port)
+        else:
+            # Werkzeug is this app's only threaded server; it is a local tool.
+            socketio.run(app, host=host, port=port, debug=debug, allow_unsafe_werkzeug=True)
+    elif ASYNC:
+        import eventlet
+        import eventlet.wsgi
+        eventlet.wsgi.server(eventlet.listen((host, port)), app, log_output=debug)
+    else:
+        app.run(host=host, port=port, debug=debug, threaded=True)
@@ -0,0 +1,49 @@
+import sqlite3
+
+import pytest
+
+from modules.db import Database, init_db
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "aac.db"))
+    init_db(db)
+    yield db
+    db.close()
+
+
+def test_committed_transaction_returns_connection_to_pool(db):
+    with db.transaction() as con:
+        con.execute("INSERT INTO blocked_words(word) VALUES ('x')")
+    assert db._idle == [con]
+    assert db.query_value("SELECT COUNT(*) FROM blocked_words") == 1
+
+
+def test_rolled_back_transaction_is_undone_and_pooled(db):
+    with pytest.raises(KeyError):
+        with db.transaction() as con:
+            con.execute("INSERT INTO blocked_words(word) VALUES ('x')")
+            raise KeyError("boom")
+    assert db._idle == [con]
+    assert db.query_value("SELECT COUNT(*) FROM blocked_words") == 0
+
+
+def test_failed_rollback_discards_connection(db):
+    with pytest.raises(KeyError):
+        with db.transaction() as con:
+            con.execute("COMMIT")  # ROLLBACK will now fail: no transaction is active
+            raise KeyError("boom")
+    assert db._idle == []
+    with pytest.raises(sqlite3.ProgrammingError):
+        con.execute("SELECT 1")
+
+
+def test_connection_left_in_transaction_is_not_pooled(db):
+    with db.connection() as con:
+        con.execute("BEGIN IMMEDIATE")
+        con.execute("INSERT INTO blocked_words(word) VALUES ('x')")
+    assert db._idle == []
+    # Closing it rolled the open transaction back and released the write lock.
+    db.write("INSERT INTO blocked_words(word) VALUES ('y')")
+    assert db.query_all("SELECT word FROM blocked_words") == [("y",)]
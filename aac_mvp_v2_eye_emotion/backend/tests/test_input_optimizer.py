@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+
+from modules.db import Database, init_db
+from modules.input_optimizer import InputOptimizer
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "aac.db"))
+    init_db(db)
+    yield db
+    db.close()
+
+
+def _sample(user, method="eye"):
+    return {"user_id": user, "method": method, "selections": 1, "errors": 0, "avg_time_ms": 800}
+
+
+def _saved_users(db):
+    return {r[0] for r in db.query_all("SELECT DISTINCT user_id FROM input_stats")}
+
+
+def test_failed_eviction_save_is_kept_and_retried_by_snapshot(db, monkeypatch):
+    opt = InputOptimizer(db, max_users=1, snapshot_interval=0)
+    opt.update_and_choose(_sample("a"))
+    save = opt._save
+
+    def broken(users):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(opt, "_save", broken)
+    opt.update_and_choose(_sample("b"))  # evicts "a"; its save fails
+    assert "a" in opt._pending and _saved_users(db) == set()
+
+    monkeypatch.setattr(opt, "_save", save)
+    opt.snapshot()
+    assert opt._pending == {}
+    assert _saved_users(db) == {"a", "b"}
+
+
+def test_user_returning_after_failed_save_keeps_their_state(db, monkeypatch):
+    opt = InputOptimizer(db, max_users=1, snapshot_interval=0)
+    opt.update_and_choose(_sample("a", "switches"))
+    monkeypatch.setattr(opt, "_save", lambda users: (_ for _ in ()).throw(sqlite3.OperationalError("locked")))
+    opt.update_and_choose(_sample("b"))
+    assert opt.update_and_choose(_sample("a", "switches")) == "switches"
+    assert set(opt._users["a"].methods) == {"switches"}
+    assert "a" not in opt._pending and "b" in opt._pending
+
+
+def test_successful_eviction_save_clears_pending(db):
+    opt = InputOptimizer(db, max_users=1, snapshot_interval=0)
+    opt.update_and_choose(_sample("a"))
+    opt.update_and_choose(_sample("b"))
+    assert opt._pending == {} and _saved_users(db) == {"a"}
+    assert InputOptimizer(db, max_users=5, snapshot_interval=0)._users.keys() == {"a"}
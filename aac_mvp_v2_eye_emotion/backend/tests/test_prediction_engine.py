@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.db import Database, init_db
+from modules.ngram_model import NGramModel
+from modules.parent_controls import ParentControls
+from modules.prediction_engine import PredictionEngine
+
+
+class FakeClient:
+    max_in_flight = 2
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.prompts = []
+        self.gates = {}  # history -> Event the generation waits for
+
+    def generate(self, prompt, **kwargs):
+        history = prompt.split("'")[1]
+        self.prompts.append(history)
+        gate = self.gates.get(history)
+        if gate is not None:
+            gate.wait(5)
+        if self.fail:
+            raise RuntimeError("offline")
+        return "more please\n%s next" % history.split()[-1]
+
+
+def make_engine(tmp_path, client=None):
+    engine = PredictionEngine(ngram_path=str(tmp_path / "ngram.bin"))
+    engine.client = client or FakeClient()
+    return engine
+
+
+def test_predicting_does_not_learn(tmp_path):
+    engine = make_engine(tmp_path, FakeClient(fail=True))
+    engine.predict_next("I want juice")
+    engine.predict_batch(["I want cake", "I want cake now"])
+    assert engine.ngram.next_words("I want", 5) == []
+
+
+def test_spoken_phrase_is_learned_and_persisted(tmp_path):
+    engine = make_engine(tmp_path, FakeClient(fail=True))
+    engine.learn("I want juice")
+    assert engine.ngram.next_words("I want", 5)[0] == "juice"
+    assert engine.predict_next("I want") == "juice"
+    engine.ngram.save()
+    assert NGramModel(str(tmp_path / "ngram.bin")).next_words("I want", 5)[0] == "juice"
+
+
+def test_current_phrase_does_not_wait_for_speculative_contexts(tmp_path):
+    engine = make_engine(tmp_path)
+    gate = engine.client.gates["I want juice"] = threading.Event()
+    t0 = time.monotonic()
+    out = engine.predict_batch(["I want", "I want juice", "I want cake"])
+    assert time.monotonic() - t0 < 1.0
+    gate.set()
+    assert [p["history"] for p in out] == ["I want", "I want juice", "I want cake"]
+    assert out[0]["candidates"][:2] == ["more please", "want next"]
+    assert out[1]["candidates"] is None
+
+
+def test_prefetched_contexts_are_served_from_cache(tmp_path):
+    engine = make_engine(tmp_path)
+    engine.predict_batch(["I", "I want"])
+    engine._prefetching[("I want", 3)].result(5)
+    out = engine.predict_batch(["I want", "I want juice"])
+    assert out[0]["candidates"][:2] == ["more please", "want next"]
+    assert engine.client.prompts.count("I want") == 1
+
+
+def test_newer_batch_drops_queued_prefetch(tmp_path):
+    engine = make_engine(tmp_path)
+    engine._prefetch_pool = ThreadPoolExecutor(max_workers=1)
+    gate = engine.client.gates["a x"] = threading.Event()
+    engine.predict_batch(["a", "a x", "a y", "a z"])
+    engine.predict_batch(["b", "b x"])
+    gate.set()
+    engine._prefetching[("b x", 3)].result(5)
+    assert "a y" not in engine.client.prompts and "a z" not in engine.client.prompts
+    assert engine.client.prompts.count("a x") == 1
+
+
+def test_current_phrase_joins_a_running_prefetch(tmp_path):
+    engine = make_engine(tmp_path)
+    gate = engine.client.gates["a x"] = threading.Event()
+    engine.predict_batch(["a", "a x"])
+    while "a x" not in engine.client.prompts:
+        time.sleep(0.01)
+    threading.Timer(0.1, gate.set).start()
+    out = engine.predict_batch(["a x", "a x y"])
+    assert out[0]["candidates"][:2] == ["more please", "x next"]
+    assert engine.client.prompts.count("a x") == 1
+
+
+def test_matcher_snapshot_is_not_changed_by_later_blocks(tmp_path):
+    db = Database(str(tmp_path / "aac.db"))
+    init_db(db)
+    controls = ParentControls(db=db)
+    before = controls.current_matcher()
+    controls.block_word("cake")
+    assert not before.contains("cake")
+    assert controls.current_matcher().contains("cake")
+    engine = make_engine(tmp_path)
+    engine.client.generate = lambda prompt, **kw: "cake please\nmore"
+    out = engine.predict_batch(["I want"], matcher=controls.current_matcher())
+    assert out[0]["candidates"][:2] == ["please", "more"]
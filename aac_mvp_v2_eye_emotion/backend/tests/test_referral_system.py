@@ -0,0 +1,43 @@
+import pytest
+
+from modules.db import Database, init_db
+from modules.referral_system import ReferralSystem, plan_for_count
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "aac.db"))
+    init_db(db)
+    yield db
+    db.close()
+
+
+def test_plan_thresholds():
+    assert [plan_for_count(c) for c in (0, 2, 3, 4, 5, 8, 11, 12, 100)] == [
+        "Basic", "Basic", "Basic Plus", "Basic Plus", "Basic Pro", "Basic Max", "Basic Max", "Elite", "Elite"]
+
+
+def test_backfill_counts_referrals_from_before_the_count_table(db):
+    # Rows written by an older version, which had no referral_counts.
+    with db.transaction() as con:
+        con.executemany("INSERT INTO referrals(referrer, joined) VALUES(?,?)",
+                        [("a@x", "j%d@x" % i) for i in range(5)] + [("b@x", "k@x"), (None, "n@x")])
+    referrals = ReferralSystem(db)
+    assert referrals.get_plan_for("a@x") == "Basic Pro"
+    assert referrals.get_plan_for("b@x") == "Basic"
+    assert db.query_all("SELECT referrer, count FROM referral_counts ORDER BY referrer") == [("a@x", 5), ("b@x", 1)]
+    # A second start must not count them again.
+    ReferralSystem(db)
+    assert db.query_value("SELECT count FROM referral_counts WHERE referrer='a@x'") == 5
+
+
+def test_counts_only_move_for_new_referrals(db):
+    referrals = ReferralSystem(db)
+    for i in range(3):
+        assert referrals.record_referral("a@x", "j%d@x" % i)
+    assert referrals.record_referral("a@x", "j0@x")  # already joined
+    assert referrals.get_plan_for("a@x") == "Basic Plus"
+    added = referrals.import_referrals([("a@x", "j%d@x" % i) for i in range(12)], batch_size=5)
+    assert added == 9
+    assert referrals.get_plan_for("a@x") == "Elite"
+    assert referrals.get_plan_for("nobody@x") == "Basic"
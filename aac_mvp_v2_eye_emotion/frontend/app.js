@@ -12,17 +12,37 @@ const SYMBOLS = [
 
 const MODES = ['touch','switches','eye'];
 
-function usePrediction(phrase, setSuggestion){
+// Stable per-browser id so the backend keeps input stats per child.
+const USER_ID = (()=>{
+  try{
+    let id = localStorage.getItem('aac_user_id');
+    if(!id){ id = Math.random().toString(36).slice(2) + Date.now().toString(36); localStorage.setItem('aac_user_id', id); }
+    return id;
+  }catch(e){ return 'default'; }
+})();
+
+function usePrediction(phrase, symbols, setSuggestion){
+  // One batch call per phrase change: the current phrase plus the phrase with
+  // each visible symbol appended. The current phrase is answered first; the
+  // rest are prefetched on the server, so the next tap is usually a cache hit.
+  const prefetched = useRef(new Map());
   useEffect(()=>{
     let ignore=false;
+    const cached = prefetched.current.get(phrase);
+    if(cached) setSuggestion(cached[0]||'');
+    const histories = [phrase, ...symbols.map(s => (phrase + ' ' + s.text).trim())];
     (async ()=>{
       try{
-        const res = await API('/api/predict',{method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({history: phrase})});
-        if(!ignore) setSuggestion(res.suggestion||'');
-      }catch(e){ if(!ignore) setSuggestion(''); }
+        const res = await API('/api/predict/batch',{method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({histories, k:3})});
+        const next = new Map();
+        // Contexts still generating come back as null; the server caches them for the next call.
+        (res.predictions||[]).forEach(p => { if(p.candidates) next.set(p.history, p.candidates); });
+        prefetched.current = next;
+        if(!ignore) setSuggestion((next.get(phrase)||[])[0]||'');
+      }catch(e){ if(!ignore && !cached) setSuggestion(''); }
     })();
     return ()=>{ ignore=true; };
-  },[phrase]);
+  },[phrase, symbols.length]);
 }
 
 function useWebcam(){
@@ -145,8 +165,6 @@ function App(){
     })();
   },[]);
 
-  usePrediction(phrase, setSuggestion);
-
   function adaptUIByEmotion(){
     return (emotion==='sadness'||emotion==='anger'||emotion==='tired') ? 'Simpler layout & slower rate' : 'Normal';
   }
@@ -157,12 +175,21 @@ function App(){
     // input metrics
     API('/api/input/metrics',{
       method:'POST', headers:{'Content-Type':'application/json'},
-      body: JSON.stringify({method: mode==='eye'?'eye':(mode==='switches'?'switches':'touch'), selections:1, errors:0, avg_time_ms: mode==='eye'?900:700})
+      body: JSON.stringify({user_id: USER_ID, method: mode==='eye'?'eye':(mode==='switches'?'switches':'touch'), selections:1, errors:0, avg_time_ms: mode==='eye'?900:700})
     }).then(r=> setBestMethod(r.best_method));
     // TTS
     try{ speechSynthesis.speak(new SpeechSynthesisUtterance(w)); }catch(e){}
   }
 
+  async function speakPhrase(){
+    const p = phrase.trim();
+    if(!p) return;
+    try{ speechSynthesis.speak(new SpeechSynthesisUtterance(p)); }catch(e){}
+    // The model learns only from phrases that were actually spoken.
+    API('/api/speak',{method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({phrase: p})});
+    setPhrase('');
+  }
+
   async function blockWord(word){
     await API('/api/parent/blocklist',{method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({word})});
     const bl = await API('/api/parent/blocklist'); setBlocked(bl.blocked||[]);
@@ -174,6 +201,7 @@ function App(){
   }
 
   const filteredSymbols = SYMBOLS.filter(s => !blocked.includes((s.text||'').toLowerCase()));
+  usePrediction(phrase, filteredSymbols, setSuggestion);
   return e ('div', null,
     e('div', {className:'header'},
       e('h1', {style:{fontSize:18, margin:0}}, 'Smart Adaptive AAC — v2'),
@@ -196,6 +224,7 @@ function App(){
         ),
         e('div', {style:{marginTop:10}},
           e('textarea', {value: phrase, onChange:(ev)=>setPhrase(ev.target.value)}),
+          e('button', {className:'button', onClick: speakPhrase}, 'Speak'),
           e('div', {className:'small'}, 'Suggestion: ', suggestion)
         )
       ),
@@ -0,0 +1,81 @@
+"""Check that the modules shared between the apps are still identical.
+
+Each app directory runs on its own (``cd <app> && python app.py``) and is
+also shipped on its own, so shared modules are copied into every app
+rather than imported from one package. The copies must stay identical:
+make a fix in one copy, then run
+
+    python check_shared_modules.py --sync echoes_mvp_v2/serving.py
+
+to copy it over the others. Without arguments it reports every module
+whose copies differ and exits with status 1.
+"""
+import os
+import sys
+import shutil
+import hashlib
+import argparse
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+SHARED = {
+    "word_matcher.py": ["echoes_mvp/client", "echoes_mvp_v2", "echoes_mvp_v3", "aac_mvp_v2_eye_emotion/backend/modules"],
+    "serving.py": ["echoes_mvp", "echoes_mvp_v2", "echoes_mvp_v3", "aac_mvp_v2_eye_emotion/backend/modules"],
+    "ollama_client.py": ["echoes_mvp", "echoes_mvp_v2", "echoes_mvp_v3", "aac_mvp_v2_eye_emotion/backend/modules"],
+    "ngram_model.py": ["echoes_mvp", "echoes_mvp_v2", "aac_mvp_v2_eye_emotion/backend/modules"],
+    "suggest_cache.py": ["echoes_mvp", "echoes_mvp_v2", "aac_mvp_v2_eye_emotion/backend/modules"],
+    "tracker_pipeline.py": ["echoes_mvp/client", "echoes_mvp_v2", "echoes_mvp_v3"],
+    "capture_sources.py": ["echoes_mvp/client", "echoes_mvp_v2", "echoes_mvp_v3"],
+    "gaze_tracker.py": ["echoes_mvp/client", "echoes_mvp_v2", "echoes_mvp_v3"],
+    "debug_overlay.py": ["echoes_mvp/client", "echoes_mvp_v2", "echoes_mvp_v3"],
+    "gaze_publisher.py": ["echoes_mvp/client", "echoes_mvp_v3"],
+}
+
+
+def _digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def copies(name):
+    return [os.path.join(d, name) for d in SHARED[name]]
+
+
+def drift():
+    """``{module: {relative path: digest}}`` for every module whose copies differ."""
+    out = {}
+    for name in SHARED:
+        digests = {p: _digest(os.path.join(ROOT, p)) for p in copies(name)}
+        if len(set(digests.values())) > 1:
+            out[name] = digests
+    return out
+
+
+def sync(source):
+    """Copy ``source`` (one of the listed copies) over the other copies."""
+    rel = os.path.relpath(os.path.abspath(source), ROOT)
+    name = os.path.basename(rel)
+    if name not in SHARED or rel not in copies(name):
+        raise SystemExit("%s is not a shared module copy" % source)
+    for path in copies(name):
+        if path != rel:
+            shutil.copyfile(os.path.join(ROOT, rel), os.path.join(ROOT, path))
+            print("updated", path)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sync", metavar="PATH", help="copy this copy of a shared module over the others")
+    args = ap.parse_args()
+    if args.sync:
+        sync(args.sync)
+    bad = drift()
+    for name, digests in bad.items():
+        print("%s differs between copies:" % name)
+        for path, digest in digests.items():
+            print("  %s  %s" % (digest[:12], path))
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,22 @@
 import os
 import json
 from flask import Flask, render_template, request, jsonify
-import requests
 from threading import Lock
 from datetime import datetime
 
+from history_log import HistoryLog, migrate_combined_file
+from ngram_model import NGramModel
+from suggest_cache import SuggestionCache, make_key
+from ollama_client import OllamaClient
+from usage_counters import UsageCounters
+import serving
+
 APP_NAME = "Echoes MVP"
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 PHRASES_PATH = os.path.join(DATA_DIR, "user_phrases.json")
+HISTORY_PATH = os.path.join(DATA_DIR, "history.jsonl")
 SETTINGS_PATH = os.path.join(DATA_DIR, "settings.json")
+NGRAM_PATH = os.path.join(DATA_DIR, "ngram.bin")
 
 lock = Lock()
 
@@ -32,7 +40,7 @@ def ensure_files():
     os.makedirs(DATA_DIR, exist_ok=True)
     if not os.path.exists(PHRASES_PATH):
         with open(PHRASES_PATH, "w", encoding="utf-8") as f:
-            json.dump({"categories": DEFAULT_CATEGORIES, "history": []}, f, ensure_ascii=False, indent=2)
+            json.dump({"categories": DEFAULT_CATEGORIES}, f, ensure_ascii=False, indent=2)
     if not os.path.exists(SETTINGS_PATH):
         with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
             json.dump(DEFAULT_SETTINGS, f, ensure_ascii=False, indent=2)
@@ -46,6 +54,16 @@ def save_json(path, data):
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 ensure_files()
+migrate_combined_file(PHRASES_PATH, HISTORY_PATH)
+history_log = HistoryLog(HISTORY_PATH)
+_ngram_exists = os.path.exists(NGRAM_PATH)
+ngram = NGramModel(NGRAM_PATH)
+if not _ngram_exists:
+    for _h in history_log:
+        ngram.learn(_h["phrase"])
+
+usage = UsageCounters()
+usage.rebuild(history_log.iter_reverse(), load_json(PHRASES_PATH).get("categories"))
 
 app = Flask(__name__)
 
@@ -63,13 +81,13 @@ def speak():
     phrase = (payload.get("phrase") or "").strip()
     if not phrase:
         return jsonify({"ok": False, "error": "Empty phrase"}), 400
-    with lock:
-        data = load_json(PHRASES_PATH)
-        data.setdefault("history", []).append({
-            "ts": datetime.utcnow().isoformat() + "Z",
-            "phrase": phrase
-        })
-        save_json(PHRASES_PATH, data)
+    ts = datetime.utcnow().isoformat() + "Z"
+    history_log.append({
+        "ts": ts,
+        "phrase": phrase
+    })
+    usage.record_tap(ts)
+    ngram.learn(phrase)
     return jsonify({"ok": True})
 
 @app.get("/api/custom_phrase")
@@ -90,6 +108,7 @@ def add_custom():
         cats.setdefault(category, [])
         if phrase not in cats[category]:
             cats[category].append(phrase)
+            usage.adjust_phrases(1)
         save_json(PHRASES_PATH, data)
     return jsonify({"ok": True, "categories": data["categories"]})
 
@@ -104,6 +123,7 @@ def delete_custom():
         if category in cats and phrase in cats[category]:
             cats[category].remove(phrase)
             save_json(PHRASES_PATH, data)
+            usage.adjust_phrases(-1)
             return jsonify({"ok": True, "categories": data["categories"]})
     return jsonify({"ok": False, "error": "Not found"}), 404
 
@@ -120,15 +140,17 @@ def set_settings():
         save_json(SETTINGS_PATH, settings)
     return jsonify({"ok": True, "settings": settings})
 
-def ollama_chat(messages, model="llama3.2", endpoint="http://localhost:11434/api/chat", temperature=0.2):
+SUGGEST_MODEL = "llama3.2"
+SUGGEST_TEMPERATURE = 0.2
+suggest_cache = SuggestionCache()
+
+ollama = OllamaClient(timeout=(2.0, 15.0))
+llm_limit = serving.limit("llm", concurrency=ollama.max_in_flight, queue=16, timeout=15.0)
+
+def ollama_chat(messages, model="llama3.2", temperature=0.2):
     """Call Ollama's chat API with a simple messages list."""
     try:
-        resp = requests.post(endpoint, json={"model": model, "messages": messages, "stream": False, "options": {"temperature": temperature}}, timeout=15)
-        resp.raise_for_status()
-        data = resp.json()
-        # Ollama chat returns {"message": {"content": "..."}, ...}
-        content = data.get("message", {}).get("content", "")
-        return content.strip()
+        return ollama.chat(messages, model=model, temperature=temperature)
     except Exception as e:
         return ""
 
@@ -140,7 +162,7 @@ def suggest():
     k = int(payload.get("k") or 5)
 
     data = load_json(PHRASES_PATH)
-    history = data.get("history", [])[-10:]
+    history = history_log.tail(10)
     # Build a simple context
     hist_text = "\n".join([h["phrase"] for h in history])
     system = (
@@ -154,20 +176,31 @@ def suggest():
     suggestions = []
     model_enabled = load_json(SETTINGS_PATH).get("ai_enabled", True)
     if model_enabled:
-        raw = ollama_chat([{"role": "system", "content": system}, {"role": "user", "content": user}])
-        # Attempt to parse JSON array from response
-        try:
-            # Find first '[' and last ']'
-            start = raw.find('[')
-            end = raw.rfind(']') + 1
-            if start != -1 and end != -1:
-                suggestions = json.loads(raw[start:end])
-            else:
+        key = make_key([h["phrase"] for h in history], current_text, k, SUGGEST_MODEL, SUGGEST_TEMPERATURE)
+        cached = suggest_cache.get(key)
+        if cached is not None:
+            suggestions = list(cached)
+        elif ollama.breaker.state != "open":
+            # Only the model call is limited; with no slot free, use the fallback.
+            with llm_limit.slot() as ok:
+                raw = serving.blocking(ollama_chat, [{"role": "system", "content": system}, {"role": "user", "content": user}],
+                                       model=SUGGEST_MODEL, temperature=SUGGEST_TEMPERATURE) if ok else ""
+            # Attempt to parse JSON array from response
+            try:
+                # Find first '[' and last ']'
+                start = raw.find('[')
+                end = raw.rfind(']') + 1
+                if start != -1 and end != -1:
+                    suggestions = json.loads(raw[start:end])
+                else:
+                    suggestions = []
+            except Exception:
                 suggestions = []
-        except Exception:
-            suggestions = []
+            if suggestions:
+                suggest_cache.put(key, suggestions)
 
-    # Fallback: frequency-based + prefix match
+    # Fallback: with text typed, phrases that start with it, then learned
+    # completions of it; with nothing typed, learned next phrases first.
     if not suggestions:
         counts = {}
         for cat, phrases in data.get("categories", {}).items():
@@ -179,29 +212,31 @@ def suggest():
             p = h["phrase"]
             if (not current_text) or p.lower().startswith(current_text.lower()):
                 counts[p] = counts.get(p, 0) + 2  # prioritize history
-        suggestions = sorted(counts.keys(), key=lambda x: (-counts[x], x))[:k]
+        ranked = sorted(counts.keys(), key=lambda x: (-counts[x], x))
+        if current_text:
+            candidates = ranked + ngram.complete(current_text, k)
+        else:
+            candidates = ngram.next_phrases(history[-1]["phrase"] if history else None, k) + ranked
+        seen = set()
+        suggestions = [p for p in candidates if p.casefold() not in seen and not seen.add(p.casefold())][:k]
 
     return jsonify({"ok": True, "suggestions": suggestions})
 
 # Simple in-memory metrics endpoint (MVP illustrative)
 @app.get("/api/metrics")
 def metrics():
-    data = load_json(PHRASES_PATH)
-    history = data.get("history", [])
-    now = datetime.utcnow()
-    # weekly active = distinct days in last 7
-    last7 = [h for h in history if (now - datetime.fromisoformat(h["ts"].replace("Z",""))).days < 7]
-    weekly_active_days = len({h["ts"][:10] for h in last7})
-    # daily communication events = today's taps
-    today = now.date().isoformat()
-    todays = len([h for h in history if h["ts"].startswith(today)])
+    # weekly active = distinct days in last 7; daily communication events = today's taps
+    counts = usage.snapshot()
     return jsonify({
         "ok": True,
-        "weekly_active_days": weekly_active_days,
-        "today_taps": todays,
-        "total_phrases": sum(len(v) for v in data.get("categories", {}).values())
+        "weekly_active_days": counts["weekly_active_days"],
+        "today_taps": counts["today_taps"],
+        "total_phrases": counts["total_phrases"],
+        "suggest_cache": suggest_cache.stats(),
+        "ollama": ollama.stats(),
+        "serving": serving.stats()
     })
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", "5000"))
-    app.run(host="0.0.0.0", port=port, debug=True)
+    serving.run(app, host="0.0.0.0", port=port, debug=True)
@@ -0,0 +1,108 @@
+"""Frame sources for the tracker pipeline.
+
+Every source has the ``cv2.VideoCapture`` surface the pipeline uses
+(``read``, ``release``, ``isOpened``), so a tracker can run from a webcam,
+a recorded clip or generated frames. ``open_source`` picks one from a spec
+string, e.g. the ``ECHOES_CAPTURE`` environment variable:
+
+    0, 1, ...                  webcam index
+    path/to/clip.mp4           recorded video
+    synthetic[:640x480@30]     moving-blob frames (endless unless ``frames``)
+"""
+import re
+import time
+
+import cv2
+import numpy as np
+
+_SYNTHETIC_RE = re.compile(r"^synthetic(?::(\d+)x(\d+)(?:@(\d+(?:\.\d+)?))?)?$")
+
+
+class _Paced:
+    """Sleeps so consecutive reads are at least ``1 / fps`` apart."""
+
+    def __init__(self, fps):
+        self.interval = 1.0 / fps if fps and fps > 0 else 0.0
+        self._next = None
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.perf_counter()
+        if self._next is None:
+            self._next = now
+        elif self._next > now:
+            time.sleep(self._next - now)
+        self._next = max(self._next + self.interval, now)
+
+
+class VideoFileSource:
+    """A recorded clip, paced to its own frame rate when ``realtime``."""
+
+    def __init__(self, path, realtime=True, loops=1):
+        self.path = path
+        self.loops = loops
+        self._cap = cv2.VideoCapture(path)
+        self.fps = self._cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self._pace = _Paced(self.fps if realtime else 0)
+        self._played = 0
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def read(self):
+        self._pace.wait()
+        ok, frame = self._cap.read()
+        if not ok and self._played + 1 < self.loops:
+            self._played += 1
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._cap.read()
+        return ok, frame
+
+    def release(self):
+        self._cap.release()
+
+
+class SyntheticSource:
+    """Generated BGR frames: a bright blob circling a noisy background."""
+
+    def __init__(self, width=640, height=480, fps=30.0, frames=300, realtime=True, seed=0):
+        self.width, self.height = width, height
+        self.fps = fps
+        self.frames = frames
+        self._pace = _Paced(fps if realtime else 0)
+        rng = np.random.default_rng(seed)
+        self._background = rng.integers(0, 64, (height, width, 3), dtype=np.uint8)
+        self._n = 0
+        self._open = True
+
+    def isOpened(self):
+        return self._open
+
+    def read(self):
+        if not self._open or (self.frames and self._n >= self.frames):
+            return False, None
+        self._pace.wait()
+        frame = self._background.copy()
+        angle = self._n * 2.0 * np.pi / max(self.fps, 1.0)
+        center = (int(self.width / 2 + self.width / 4 * np.cos(angle)),
+                  int(self.height / 2 + self.height / 4 * np.sin(angle)))
+        cv2.circle(frame, center, min(self.width, self.height) // 8, (220, 200, 180), -1)
+        self._n += 1
+        return True, frame
+
+    def release(self):
+        self._open = False
+
+
+def open_source(spec=0, realtime=True, frames=0):
+    """Open a capture source from a webcam index, clip path or synthetic spec."""
+    spec = str(spec).strip()
+    if spec.isdigit():
+        return cv2.VideoCapture(int(spec))
+    m = _SYNTHETIC_RE.match(spec)
+    if m:
+        width, height, fps = m.groups()
+        return SyntheticSource(int(width or 640), int(height or 480), float(fps or 30),
+                               frames=frames, realtime=realtime)
+    return VideoFileSource(spec, realtime=realtime)
@@ -1,47 +1,61 @@
-
+import os
 import cv2
 import mediapipe as mp
-import threading
-import socketio
+import numpy as np
 
-sio = socketio.Client()
-sio.connect('http://localhost:5001')
+from tracker_pipeline import TrackerPipeline
+from capture_sources import open_source
+from debug_overlay import make_overlay
+from gaze_tracker import GazeTracker
+from gaze_publisher import GazePublisher
+from transport import get_transport
 
 mp_face_mesh = mp.solutions.face_mesh
 face_mesh = mp_face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True, min_detection_confidence=0.5, min_tracking_confidence=0.5)
-cap = cv2.VideoCapture(0)
-
-def track_eyes():
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            continue
-
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = face_mesh.process(frame_rgb)
-
-        if results.multi_face_landmarks:
-            for face_landmarks in results.multi_face_landmarks:
-                left_eye = [face_landmarks.landmark[i] for i in range(33, 42)]
-                right_eye = [face_landmarks.landmark[i] for i in range(133, 142)]
-
-                left_eye_pos = [(lmk.x, lmk.y) for lmk in left_eye]
-                right_eye_pos = [(lmk.x, lmk.y) for lmk in right_eye]
-
-                sio.emit('eye_data', {'left_eye': left_eye_pos, 'right_eye': right_eye_pos})
-
-                for (x, y) in left_eye + right_eye:
-                    h, w, _ = frame.shape
-                    cv2.circle(frame, (int(x * w), int(y * h)), 2, (0, 255, 0), -1)
-
-        cv2.imshow("Eye Tracker", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-
-    cap.release()
-    cv2.destroyAllWindows()
+cap = open_source(os.environ.get("ECHOES_CAPTURE", "0"))
+
+# Landmarks sent to the server, read out together with the gaze geometry
+LEFT_EYE_IDS = tuple(range(33, 42))
+RIGHT_EYE_IDS = tuple(range(133, 142))
+gaze_tracker = GazeTracker(face_mesh, point_ids=LEFT_EYE_IDS + RIGHT_EYE_IDS)
+
+def encode_eye_data(values):
+    n = len(LEFT_EYE_IDS)
+    points = values[2:].reshape(-1, 2)
+    return {'gaze': values[:2].tolist(), 'left_eye': points[:n].tolist(), 'right_eye': points[n:].tolist()}
+
+# eye_data is sent at a capped rate and only when something moved. With
+# ECHOES_EYE_BINARY=1 it is one float32 array: gaze x, y, then the left and
+# right eye points as x, y pairs.
+eye_publisher = GazePublisher(
+    get_transport().emit, 'eye_data',
+    max_rate=float(os.environ.get("ECHOES_EYE_RATE", "30")),
+    deadband=float(os.environ.get("ECHOES_EYE_DEADBAND", "0.004")),
+    binary=os.environ.get("ECHOES_EYE_BINARY", "0") == "1",
+    encode=encode_eye_data,
+)
+
+def draw_eyes(frame, gaze):
+    if gaze is not None:
+        h, w, _ = frame.shape
+        for (x, y) in (gaze.points * (w, h)).astype(int):
+            cv2.circle(frame, (int(x), int(y)), 2, (0, 255, 0), -1)
+    return frame
+
+# Headless by default; ECHOES_TRACKER_DEBUG=window shows a rate-limited view.
+overlay = make_overlay(draw_eyes, "Eye Tracker", on_quit=lambda: pipeline.stop())
+
+def publish_eyes(packet):
+    gaze = packet.result
+    if gaze is not None:
+        eye_publisher.publish(np.concatenate(([gaze.x, gaze.y], gaze.points.ravel())))
+    if overlay is not None:
+        overlay.offer(packet)
+
+pipeline = TrackerPipeline(cap, gaze_tracker.process, publish_eyes, max_read_failures=float("inf"),
+                           on_exit=overlay.stop if overlay is not None else None)
 
 def start_eye_tracker():
-    thread = threading.Thread(target=track_eyes)
-    thread.daemon = True
-    thread.start()
+    pipeline.start()
+    if overlay is not None:
+        overlay.start()
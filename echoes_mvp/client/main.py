@@ -1,11 +1,15 @@
 
 from eye_tracker import start_eye_tracker
 from speech_monitor import start_speech_monitor
+from transport import get_transport
+import json
+import logging
 import time
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     start_eye_tracker()
-    start_speech_monitor()
+    speech = start_speech_monitor()
     
     print("Eye tracker and speech monitor running in background...")
     
@@ -13,4 +17,7 @@ if __name__ == "__main__":
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
+        print("Speech monitor:", json.dumps(speech.stats()))
+        print("Transport:", json.dumps(get_transport().stats()))
         print("Exiting...")
+        get_transport().close()
@@ -1,33 +1,20 @@
+import os
 
-import speech_recognition as sr
-import threading
-import socketio
-
-sio = socketio.Client()
-sio.connect('http://localhost:5001')
+from word_matcher import WordMatcher
+from speech_pipeline import MicrophoneSource, SpeechPipeline, make_backend
+from transport import get_transport
 
 BAD_WORDS = ['badword1', 'badword2']
+bad_words = WordMatcher(BAD_WORDS)
 
-def monitor_speech():
-    recognizer = sr.Recognizer()
-    mic = sr.Microphone()
-
-    with mic as source:
-        recognizer.adjust_for_ambient_noise(source)
-
-    while True:
-        try:
-            with mic as source:
-                audio = recognizer.listen(source)
-                text = recognizer.recognize_google(audio).lower()
-                for word in BAD_WORDS:
-                    if word in text:
-                        sio.emit('speech_event', {'word': word})
-                        print(f"Detected bad word: {word}")
-        except Exception:
-            pass
+def report_words(text, words):
+    for word in words:
+        get_transport().emit('speech_event', {'word': word})
+        print(f"Detected bad word: {word}")
 
 def start_speech_monitor():
-    thread = threading.Thread(target=monitor_speech)
-    thread.daemon = True
-    thread.start()
+    """Capture runs continuously; recognition happens on worker threads with
+    the backend chosen by ECHOES_ASR (see speech_pipeline.make_backend)."""
+    pipeline = SpeechPipeline(MicrophoneSource(), make_backend(), bad_words, report_words,
+                              workers=int(os.environ.get("ECHOES_ASR_WORKERS", "2")))
+    return pipeline.start()
@@ -0,0 +1,303 @@
+"""Continuous, VAD-gated speech recognition.
+
+The capture thread reads fixed-size chunks from an audio source without
+ever waiting on recognition. An energy gate with an adaptive noise floor
+cuts the stream into utterances, keeping a short ring buffer of pre-roll
+audio so word onsets are not clipped. Utterances go into a small
+drop-oldest queue that a pool of workers drains through a pluggable
+``RecognizerBackend``; the word matcher runs on each transcript.
+Per-utterance recognition latency (speech end -> transcript) and drop
+counts are kept for ``stats()``.
+"""
+import os
+import json
+import time
+import wave
+import logging
+import threading
+from collections import deque
+
+import numpy as np
+
+from tracker_pipeline import LatestQueue, StageStats
+
+log = logging.getLogger("echoes.speech")
+
+
+# ---------- Audio sources ----------
+class MicrophoneSource:
+    """16-bit mono microphone input through PyAudio."""
+
+    def __init__(self, sample_rate=16000, chunk=480, device_index=None):
+        import pyaudio
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.chunk = chunk
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(format=pyaudio.paInt16, channels=1, rate=sample_rate, input=True,
+                                     frames_per_buffer=chunk, input_device_index=device_index)
+
+    def read(self):
+        # Never raise on overflow: losing a chunk beats stalling capture.
+        return self._stream.read(self.chunk, exception_on_overflow=False)
+
+    def close(self):
+        self._stream.stop_stream()
+        self._stream.close()
+        self._pa.terminate()
+
+
+class WavFileSource:
+    """Replays a 16-bit mono WAV file, optionally at real-time pace."""
+
+    def __init__(self, path, chunk=480, realtime=False):
+        self._wav = wave.open(path, "rb")
+        if self._wav.getnchannels() != 1 or self._wav.getsampwidth() != 2:
+            raise ValueError("expected 16-bit mono audio: %s" % path)
+        self.sample_rate = self._wav.getframerate()
+        self.sample_width = 2
+        self.chunk = chunk
+        self.realtime = realtime
+
+    def read(self):
+        data = self._wav.readframes(self.chunk)
+        if not data:
+            return None
+        if self.realtime:
+            time.sleep(len(data) / 2 / self.sample_rate)
+        return data
+
+    def close(self):
+        self._wav.close()
+
+
+# ---------- Recognizer backends ----------
+class RecognizerBackend:
+    """``transcribe`` takes raw 16-bit mono PCM and returns the text ('' when
+    nothing was understood). Raise for real failures; they are counted."""
+    name = "base"
+
+    def transcribe(self, pcm, sample_rate):
+        raise NotImplementedError
+
+
+class FakeBackend(RecognizerBackend):
+    """Returns canned transcripts in order (then ''), after ``delay`` seconds."""
+    name = "fake"
+
+    def __init__(self, transcripts=(), delay=0.0):
+        self._transcripts = deque(transcripts)
+        self._lock = threading.Lock()
+        self.delay = delay
+
+    def transcribe(self, pcm, sample_rate):
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            return self._transcripts.popleft() if self._transcripts else ""
+
+
+class VoskBackend(RecognizerBackend):
+    """Offline recognition with a local Vosk model directory."""
+    name = "vosk"
+
+    def __init__(self, model_path):
+        import vosk
+        self._vosk = vosk
+        self._model = vosk.Model(model_path)
+
+    def transcribe(self, pcm, sample_rate):
+        rec = self._vosk.KaldiRecognizer(self._model, sample_rate)
+        rec.AcceptWaveform(pcm)
+        return json.loads(rec.FinalResult()).get("text", "")
+
+
+class SpeechRecognitionBackend(RecognizerBackend):
+    """Any ``speech_recognition`` engine, e.g. ``sphinx`` (offline, needs
+    pocketsphinx) or ``google`` (online)."""
+
+    def __init__(self, engine="sphinx"):
+        import speech_recognition as sr
+        self._sr = sr
+        self._recognizer = sr.Recognizer()
+        self._recognize = getattr(self._recognizer, "recognize_" + engine)
+        self.name = engine
+
+    def transcribe(self, pcm, sample_rate):
+        try:
+            return self._recognize(self._sr.AudioData(pcm, sample_rate, 2))
+        except self._sr.UnknownValueError:
+            return ""
+
+
+def make_backend(name=None):
+    """Backend from ``name`` or ``ECHOES_ASR``: vosk, sphinx, google, fake or
+    auto (Vosk if ``ECHOES_VOSK_MODEL`` is set, else Sphinx if installed,
+    else Google)."""
+    name = (name or os.environ.get("ECHOES_ASR") or "auto").lower()
+    if name == "auto":
+        if os.environ.get("ECHOES_VOSK_MODEL"):
+            name = "vosk"
+        else:
+            try:
+                import pocketsphinx  # noqa: F401
+                name = "sphinx"
+            except ImportError:
+                name = "google"
+    if name == "vosk":
+        return VoskBackend(os.environ.get("ECHOES_VOSK_MODEL", "model"))
+    if name == "fake":
+        return FakeBackend()
+    return SpeechRecognitionBackend(name)
+
+
+# ---------- Voice activity gate ----------
+class EnergyGate:
+    """Cuts a chunk stream into utterances by RMS energy against an adaptive
+    noise floor. ``push`` returns a finished utterance's PCM, else None."""
+
+    def __init__(self, sample_rate, chunk, ratio=3.0, min_energy=150.0, pre_roll=0.3,
+                 hangover=0.6, min_speech=0.15, max_utterance=10.0):
+        per_sec = sample_rate / chunk
+        self.ratio = ratio
+        self.min_energy = min_energy
+        self.hangover = max(1, int(hangover * per_sec))
+        self.min_speech = max(1, int(min_speech * per_sec))
+        self.max_chunks = int(max_utterance * per_sec)
+        self.noise = None
+        self._pre = deque(maxlen=max(1, int(pre_roll * per_sec)))
+        self._utt = []
+        self._voiced = 0
+        self._silent = 0
+
+    def threshold(self):
+        return max(self.min_energy, (self.noise or 0.0) * self.ratio)
+
+    def push(self, chunk):
+        samples = np.frombuffer(chunk, dtype="<i2").astype(np.float32)
+        energy = float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+        loud = energy > self.threshold()
+        if not self._utt:
+            if not loud:
+                # Track the noise floor only while nobody is talking.
+                self.noise = energy if self.noise is None else 0.95 * self.noise + 0.05 * energy
+                self._pre.append(chunk)
+                return None
+            self._utt = list(self._pre)
+            self._pre.clear()
+            self._voiced = self._silent = 0
+        self._utt.append(chunk)
+        if loud:
+            self._voiced += 1
+            self._silent = 0
+        else:
+            self._silent += 1
+        if self._silent >= self.hangover or len(self._utt) >= self.max_chunks:
+            utt, voiced = self._utt, self._voiced
+            self._utt = []
+            if voiced >= self.min_speech:
+                return b"".join(utt)
+        return None
+
+
+class Utterance:
+    __slots__ = ("seq", "pcm", "ended")
+
+    def __init__(self, seq, pcm, ended):
+        self.seq = seq
+        self.pcm = pcm
+        self.ended = ended
+
+
+# ---------- Pipeline ----------
+class SpeechPipeline:
+    """``on_transcript(text, words)`` is called from a worker for each
+    recognized utterance; ``words`` are the matcher hits."""
+
+    def __init__(self, source, backend, matcher, on_transcript, workers=2, queue_size=4):
+        self.source = source
+        self.backend = backend
+        self.matcher = matcher
+        self.on_transcript = on_transcript
+        self.gate = EnergyGate(source.sample_rate, source.chunk)
+        self._queue = LatestQueue(queue_size)
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._capture_loop, daemon=True)]
+        self._threads += [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        self._lock = threading.Lock()
+        self.latency = StageStats()
+        self.recognize = StageStats()
+        self.counts = {"utterances": 0, "recognized": 0, "empty": 0, "errors": 0, "matches": 0}
+
+    def start(self):
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._queue.close()
+
+    def wait(self, timeout=None):
+        for t in self._threads:
+            t.join(timeout)
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.counts[key] += n
+
+    def _capture_loop(self):
+        seq = 0
+        try:
+            while not self._stop.is_set():
+                chunk = self.source.read()
+                if chunk is None:
+                    break
+                pcm = self.gate.push(chunk)
+                if pcm is not None:
+                    seq += 1
+                    self._count("utterances")
+                    self._queue.put(Utterance(seq, pcm, time.perf_counter()))
+        except Exception:
+            log.exception("audio capture failed")
+        finally:
+            self.source.close()
+            self._queue.close()
+
+    def _worker(self):
+        while not self._stop.is_set():
+            utt = self._queue.get(0.2)
+            if utt is None:
+                if self._queue.closed:
+                    return
+                continue
+            t0 = time.perf_counter()
+            try:
+                text = self.backend.transcribe(utt.pcm, self.source.sample_rate)
+            except Exception as e:
+                self._count("errors")
+                log.warning("%s recognition failed: %s", self.backend.name, e)
+                continue
+            t1 = time.perf_counter()
+            self.recognize.add(t1 - t0, t1)
+            self.latency.add(t1 - utt.ended, t1)
+            if not text:
+                self._count("empty")
+                continue
+            self._count("recognized")
+            words = self.matcher.find(text)
+            self._count("matches", len(words))
+            try:
+                self.on_transcript(text, words)
+            except Exception:
+                log.exception("transcript handler failed")
+
+    def stats(self):
+        with self._lock:
+            out = dict(self.counts)
+        out["dropped"] = self._queue.dropped
+        out["backend"] = self.backend.name
+        out["noise_floor"] = round(self.gate.noise or 0.0, 1)
+        out["recognize"] = self.recognize.summary()
+        out["latency"] = self.latency.summary()
+        return out
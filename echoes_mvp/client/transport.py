@@ -0,0 +1,139 @@
+"""One shared, non-blocking Socket.IO connection for the desktop client.
+
+``emit`` only appends to a bounded in-memory queue and returns; when the
+queue is full the oldest message is dropped. A sender thread, started on
+the first ``emit``, connects lazily, reconnects with jittered exponential
+backoff, and every ``flush_interval`` sends whatever is queued as a single
+``batch`` event: a list of ``[event, data]`` pairs (binary payloads stay
+binary attachments). Capture threads never wait on the network.
+"""
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+
+import socketio
+
+log = logging.getLogger("echoes.transport")
+
+DEFAULT_URL = os.environ.get("ECHOES_SERVER", "http://localhost:5001")
+
+
+class Transport:
+    def __init__(self, url=DEFAULT_URL, flush_interval=0.05, max_queue=2048, batch_max=256,
+                 backoff_min=0.5, backoff_max=30.0):
+        self.url = url
+        self.flush_interval = flush_interval
+        self.batch_max = batch_max
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self._queue = deque(maxlen=max_queue)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._sio = socketio.Client(reconnection=False)
+        self.sent = 0
+        self.batches = 0
+        self.dropped = 0
+        self.connects = 0
+        self.failures = 0
+
+    @property
+    def connected(self):
+        return self._sio.connected
+
+    def emit(self, event, data=None):
+        with self._lock:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append([event, data])
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def close(self, timeout=2.0):
+        """Stop after a last attempt to send what is queued."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _take(self):
+        with self._lock:
+            n = min(len(self._queue), self.batch_max)
+            return [self._queue.popleft() for _ in range(n)]
+
+    def _requeue(self, batch):
+        # Put an unsent batch back in front, still within the memory bound.
+        with self._lock:
+            room = self._queue.maxlen - len(self._queue)
+            keep = batch[len(batch) - room:] if room < len(batch) else batch
+            self.dropped += len(batch) - len(keep)
+            self._queue.extendleft(reversed(keep))
+
+    def _connect(self):
+        delay = self.backoff_min
+        while not self._stop.is_set():
+            try:
+                self._sio.connect(self.url, wait_timeout=5)
+                self.connects += 1
+                return True
+            except Exception as e:
+                self.failures += 1
+                log.info("connect to %s failed (%s); retrying in %.1fs", self.url, e, delay)
+                self._stop.wait(delay * random.uniform(0.5, 1.0))
+                delay = min(self.backoff_max, delay * 2)
+        return False
+
+    def _run(self):
+        while True:
+            stopping = self._stop.is_set()
+            if not self._sio.connected and (stopping or not self._connect()):
+                return
+            started = time.perf_counter()
+            while True:
+                batch = self._take()
+                if not batch:
+                    break
+                try:
+                    self._sio.emit("batch", batch)
+                except Exception as e:
+                    log.info("send failed (%s); requeueing %d messages", e, len(batch))
+                    self._requeue(batch)
+                    break
+                self.sent += len(batch)
+                self.batches += 1
+            if stopping:
+                self._sio.disconnect()
+                return
+            self._wake.wait(max(0.0, self.flush_interval - (time.perf_counter() - started)))
+            self._wake.clear()
+
+    def stats(self):
+        with self._lock:
+            queued = len(self._queue)
+        return {
+            "connected": self.connected,
+            "queued": queued,
+            "sent": self.sent,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "connects": self.connects,
+            "connect_failures": self.failures,
+        }
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_transport():
+    """The process-wide transport; nothing connects until the first emit."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Transport()
+        return _shared
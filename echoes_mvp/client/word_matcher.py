@@ -0,0 +1,136 @@
+"""Compiled multi-pattern word matcher (Aho-Corasick).
+
+Scans a text once for every term in the list, however long the list is.
+Text and terms are normalized the same way (case-folded, common leetspeak
+digits/symbols mapped to letters, whitespace collapsed) and matches must
+sit on word boundaries. A term ending in ``*`` also matches as a prefix,
+e.g. ``fuck*`` catches "fucking". ``reload`` swaps in a new automaton
+atomically, so lists can change while other threads are scanning.
+"""
+import re
+import threading
+from bisect import bisect_right
+
+_LEET = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s"})
+_SPACE_RE = re.compile(r"\s+")
+_SEP = "\x00"
+
+
+def normalize(text):
+    return _SPACE_RE.sub(" ", (text or "").casefold().translate(_LEET)).strip()
+
+
+def _is_word(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class _Automaton:
+    __slots__ = ("goto", "fail", "out", "terms", "names", "lengths", "prefix")
+
+    def __init__(self, terms):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        self.terms, self.names, self.lengths, self.prefix = [], [], [], []
+        for raw in terms:
+            prefix = raw.endswith("*")
+            key = normalize(raw.rstrip("*"))
+            if not key:
+                continue
+            tid = len(self.terms)
+            self.terms.append(raw)
+            self.names.append(raw.rstrip("*"))
+            self.lengths.append(len(key))
+            self.prefix.append(prefix)
+            state = 0
+            for ch in key:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                state = nxt
+            self.out[state] = self.out[state] + (tid,)
+        # Breadth-first fail links; outputs inherit from their fail state.
+        queue = list(self.goto[0].values())
+        while queue:
+            nxt_queue = []
+            for state in queue:
+                for ch, child in self.goto[state].items():
+                    f = self.fail[state]
+                    while f and ch not in self.goto[f]:
+                        f = self.fail[f]
+                    target = self.goto[f].get(ch, 0)
+                    self.fail[child] = target if target != child else 0
+                    self.out[child] = self.out[child] + self.out[self.fail[child]]
+                    nxt_queue.append(child)
+            queue = nxt_queue
+
+    def scan(self, s, first_only=False):
+        """Yield ``(term id, end index)`` for each boundary-respecting match."""
+        goto, fail, out = self.goto, self.fail, self.out
+        lengths, prefix = self.lengths, self.prefix
+        n = len(s)
+        state = 0
+        for i, ch in enumerate(s):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            for tid in out[state]:
+                start = i - lengths[tid] + 1
+                if start > 0 and _is_word(s[start - 1]):
+                    continue
+                if not prefix[tid] and i + 1 < n and _is_word(s[i + 1]):
+                    continue
+                yield tid, i
+                if first_only:
+                    return
+
+
+class WordMatcher:
+    def __init__(self, terms=()):
+        self._lock = threading.Lock()
+        self.version = 0
+        self._ac = _Automaton(list(terms))
+
+    @property
+    def terms(self):
+        return list(self._ac.terms)
+
+    def reload(self, terms):
+        """Replace the term list. Scans already running finish on the old one."""
+        ac = _Automaton(list(terms))
+        with self._lock:
+            self._ac = ac
+            self.version += 1
+
+    def contains(self, text):
+        for _ in self._ac.scan(normalize(text), first_only=True):
+            return True
+        return False
+
+    def find(self, text):
+        """Matched terms, in order of first appearance, without duplicates."""
+        ac = self._ac
+        found = {}
+        for tid, _ in ac.scan(normalize(text)):
+            found.setdefault(ac.names[tid], None)
+        return list(found)
+
+    def find_many(self, texts):
+        """Scan a batch in one pass; returns one list of matched terms per text."""
+        ac = self._ac
+        parts = [normalize(t) for t in texts]
+        starts, pos = [], 0
+        for p in parts:
+            starts.append(pos)
+            pos += len(p) + 1
+        results = [{} for _ in parts]
+        # The separator is not a word character, so it also acts as a boundary.
+        for tid, end in ac.scan(_SEP.join(parts)):
+            results[bisect_right(starts, end) - 1].setdefault(ac.names[tid], None)
+        return [list(r) for r in results]
@@ -0,0 +1,146 @@
+"""Append-only phrase history stored as JSON Lines.
+
+Each spoken phrase is one line in ``data/history.jsonl``. Appends never
+rewrite earlier entries; durability is batched by a background thread that
+fsyncs every ``fsync_every`` appends or ``fsync_interval`` seconds.
+"""
+import os
+import json
+import atexit
+import threading
+from itertools import islice
+
+_TAIL_BLOCK = 8192
+
+
+def _dump_line(entry):
+    return json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+class HistoryLog:
+    def __init__(self, path, fsync_every=32, fsync_interval=1.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._fh = open(path, "a", encoding="utf-8")
+        self._pending = 0
+        self._closed = False
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def append(self, entry):
+        line = _dump_line(entry)
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+            self._pending += 1
+            if self._pending >= self.fsync_every:
+                self._wake.set()
+
+    def sync(self):
+        """Force buffered appends to disk."""
+        with self._lock:
+            if self._closed or not self._pending:
+                return
+            self._fh.flush()
+            self._pending = 0
+            fd = self._fh.fileno()
+        # fsync outside the lock so appends are not blocked on the disk.
+        os.fsync(fd)
+
+    def close(self):
+        self.sync()
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._fh.close()
+        self._wake.set()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(self.fsync_interval)
+            self._wake.clear()
+            try:
+                self.sync()
+            except (OSError, ValueError):
+                pass
+
+    def tail(self, n):
+        """Return the last ``n`` entries, reading only the end of the file."""
+        if n <= 0:
+            return []
+        return list(islice(self.iter_reverse(), n))[::-1]
+
+    def iter_reverse(self):
+        """Yield entries newest first, reading the file backwards in blocks."""
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            pos, rest, trimmed = f.tell(), b"", False
+            while pos > 0:
+                step = min(_TAIL_BLOCK, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + rest
+                if not trimmed:
+                    # Skip a trailing line that is still being written.
+                    nl = buf.rfind(b"\n")
+                    if nl == -1:
+                        rest = buf
+                        continue
+                    buf, trimmed = buf[:nl], True
+                lines = buf.split(b"\n")
+                # lines[0] may be cut mid-entry; keep it for the next block.
+                rest = lines[0]
+                for line in reversed(lines[1:]):
+                    if line.strip():
+                        yield json.loads(line)
+            if trimmed and rest.strip():
+                yield json.loads(rest)
+
+    def __iter__(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.endswith("\n") and line.strip():
+                    yield json.loads(line)
+
+
+def migrate_combined_file(phrases_path, log_path):
+    """Move ``history`` out of a legacy combined user_phrases.json.
+
+    The legacy entries are written ahead of any existing log lines into a
+    temp file that atomically replaces the log, then the phrases document is
+    rewritten without its history. Re-running after a crash between the two
+    steps is detected by comparing the log's first entries to the legacy ones.
+    """
+    if not os.path.exists(phrases_path):
+        return 0
+    with open(phrases_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if "history" not in data:
+        return 0
+    legacy = data.pop("history") or []
+
+    existing = b""
+    if os.path.exists(log_path):
+        with open(log_path, "rb") as f:
+            existing = f.read()
+    head = [json.loads(l) for l in existing.split(b"\n")[:len(legacy)] if l.strip()]
+    if legacy and head != legacy:
+        tmp = log_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write("".join(_dump_line(e) for e in legacy).encode("utf-8"))
+            f.write(existing)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, log_path)
+
+    tmp = phrases_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, phrases_path)
+    return len(legacy)
@@ -0,0 +1,277 @@
+"""Compact on-device n-gram model for offline next-word suggestions.
+
+Counts word transitions (up to ``order``-grams, backing off to shorter
+contexts) and whole-phrase transitions (previous spoken phrase -> next one).
+It is trained one phrase at a time as history is appended, answers queries
+from cached per-context top lists, and is persisted as a packed binary file.
+"""
+import os
+import re
+import sys
+import time
+import atexit
+import struct
+import threading
+from array import array
+
+_TOKEN_RE = re.compile(r"[\w']+")
+_MAGIC = b"NGM1"
+BOS = "<s>"
+# Table bodies are arrays of little-endian uint32, whatever the host.
+_U32 = "I" if array("I").itemsize == 4 else "L"
+_SWAP = sys.byteorder != "little"
+
+
+def _u32_bytes(values):
+    a = array(_U32, values)
+    if _SWAP:
+        a.byteswap()
+    return a.tobytes()
+
+
+def _u32_array(data):
+    a = array(_U32)
+    a.frombytes(data)
+    if _SWAP:
+        a.byteswap()
+    return a
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall((text or "").casefold())
+
+
+def _rank_ids(counts, strings, k):
+    ranked = sorted(counts.items(), key=lambda kv: (-kv[1], strings[kv[0]]))
+    return [strings[i] for i, _ in ranked[:k]]
+
+
+class NGramModel:
+    def __init__(self, path=None, order=3, top_k=8, save_delay=2.0):
+        self.path = path
+        self.order = order
+        self.top_k = top_k
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._strings = [BOS]
+        self._ids = {BOS: 0}
+        # _words[n] maps an n-id context tuple to {next word id: count}.
+        self._words = [{} for _ in range(order)]
+        # Previous phrase id (0 = none) -> {next phrase id: count}.
+        self._phrases = {}
+        self._top = {}
+        self._last_phrase = 0
+        self._dirty = False
+        self._wake = threading.Event()
+        if path and os.path.exists(path):
+            self.load()
+        if path:
+            threading.Thread(target=self._save_loop, daemon=True).start()
+            atexit.register(self.save)
+
+    def _intern(self, s):
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self._strings)
+            self._strings.append(s)
+        return i
+
+    def _bump(self, table, ctx, nxt, key):
+        counts = table.setdefault(ctx, {})
+        counts[nxt] = counts.get(nxt, 0) + 1
+        self._top.pop(key, None)
+
+    def learn(self, phrase, follows_previous=True):
+        """Train on one spoken phrase."""
+        toks = tokenize(phrase)
+        if not toks:
+            return
+        with self._lock:
+            ids = [0] + [self._intern(t) for t in toks]
+            for i in range(1, len(ids)):
+                for n in range(min(self.order, i + 1)):
+                    ctx = tuple(ids[i - n:i])
+                    self._bump(self._words[n], ctx, ids[i], ("w", ctx))
+            pid = self._intern(phrase.strip())
+            prev = self._last_phrase if follows_previous else 0
+            self._bump(self._phrases, prev, pid, ("p", prev))
+            self._last_phrase = pid
+            self._dirty = True
+        self._wake.set()
+
+    def learn_transition(self, text):
+        """Train only on the newest word of ``text`` (for phrases built one
+        word at a time, where earlier words were already counted)."""
+        toks = tokenize(text)
+        if not toks:
+            return
+        with self._lock:
+            ids = [0] + [self._intern(t) for t in toks[-self.order:]]
+            if len(toks) >= self.order:
+                ids = ids[1:]
+            i = len(ids) - 1
+            for n in range(min(self.order, i + 1)):
+                ctx = tuple(ids[i - n:i])
+                self._bump(self._words[n], ctx, ids[i], ("w", ctx))
+            self._dirty = True
+        self._wake.set()
+
+    def _top_for(self, key, table, ctx):
+        top = self._top.get(key)
+        if top is None:
+            with self._lock:
+                counts = table.get(ctx)
+                top = _rank_ids(counts, self._strings, self.top_k) if counts else []
+                self._top[key] = top
+        return top
+
+    def next_words(self, text, k=5, prefix="", min_context=0):
+        """Most likely next words after ``text``, backing off to shorter
+        contexts but not below ``min_context`` words. With ``prefix`` only
+        words starting with it are returned."""
+        ids = [0] + [self._ids.get(t, -1) for t in tokenize(text)]
+        prefix = prefix.casefold()
+        out, seen = [], set()
+        for n in range(min(self.order - 1, len(ids)), min_context - 1, -1):
+            ctx = tuple(ids[len(ids) - n:]) if n else ()
+            if -1 in ctx:
+                continue
+            for w in self._top_for(("w", ctx), self._words[n], ctx):
+                if w not in seen and w.startswith(prefix):
+                    seen.add(w)
+                    out.append(w)
+                    if len(out) >= k:
+                        return out
+        return out
+
+    def complete(self, text, k=5):
+        """Suggestions for typed ``text``, each a full replacement for it: the
+        last word completed from what follows the words before it, then
+        likely next words after all of it. The global word list is never
+        used, since it would ignore what was typed."""
+        words = list(_TOKEN_RE.finditer(text or ""))
+        if not words:
+            return []
+        head = text[:words[-1].end()]
+        base = text[:words[-1].start()]
+        last = words[-1].group().casefold()
+        out = [base + w for w in self.next_words(base, k, prefix=last, min_context=1) if w != last]
+        out += [head + " " + w for w in self.next_words(head, k, min_context=1)]
+        return list(dict.fromkeys(out))[:k]
+
+    def next_phrases(self, previous=None, k=5):
+        """Phrases most often spoken after ``previous`` (or first, if None)."""
+        prev = self._ids.get(previous.strip(), -1) if previous else 0
+        out = list(self._top_for(("p", prev), self._phrases, prev)[:k])
+        if len(out) < k and prev != 0:
+            for p in self._top_for(("p", 0), self._phrases, 0):
+                if p not in out:
+                    out.append(p)
+                    if len(out) >= k:
+                        break
+        return out
+
+    # ---------- persistence ----------
+    @staticmethod
+    def _pack_table(buf, table, ctx_len):
+        buf.append(struct.pack("<I", len(table)))
+        for ctx, counts in table.items():
+            buf.append(_u32_bytes(ctx + (len(counts),)))
+            body = []
+            for nxt, c in counts.items():
+                body.append(nxt)
+                body.append(c)
+            buf.append(_u32_bytes(body))
+
+    @staticmethod
+    def _unpack_table(mv, off, ctx_len):
+        table = {}
+        (n,) = struct.unpack_from("<I", mv, off)
+        off += 4
+        for _ in range(n):
+            head = _u32_array(mv[off:off + 4 * (ctx_len + 1)])
+            off += 4 * (ctx_len + 1)
+            ctx = tuple(head[:ctx_len])
+            body = _u32_array(mv[off:off + 8 * head[-1]])
+            off += 8 * head[-1]
+            table[ctx] = dict(zip(body[0::2], body[1::2]))
+        return table, off
+
+    def save(self):
+        if not self.path:
+            return
+        # Serialize under the model lock, write the file without it, so
+        # learn() and queries never wait on disk. _save_lock keeps the save
+        # thread and the atexit hook from writing at the same time.
+        with self._save_lock:
+            data = self._snapshot()
+            if data is None:
+                return
+            tmp = self.path + ".tmp"
+            try:
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            except OSError:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def _snapshot(self):
+        with self._lock:
+            if not self._dirty:
+                return None
+            buf = [_MAGIC, struct.pack("<BI", self.order, len(self._strings))]
+            for s in self._strings:
+                b = s.encode("utf-8")
+                buf.append(struct.pack("<I", len(b)))
+                buf.append(b)
+            for n, table in enumerate(self._words):
+                self._pack_table(buf, table, n)
+            phrases = {(prev,): counts for prev, counts in self._phrases.items()}
+            self._pack_table(buf, phrases, 1)
+            buf.append(struct.pack("<I", self._last_phrase))
+            self._dirty = False
+            return b"".join(buf)
+
+    def load(self):
+        with open(self.path, "rb") as f:
+            mv = memoryview(f.read())
+        if bytes(mv[:4]) != _MAGIC:
+            raise ValueError("not an n-gram model file: %s" % self.path)
+        order, count = struct.unpack_from("<BI", mv, 4)
+        off = 9
+        strings = []
+        for _ in range(count):
+            (ln,) = struct.unpack_from("<I", mv, off)
+            off += 4
+            strings.append(bytes(mv[off:off + ln]).decode("utf-8"))
+            off += ln
+        words = []
+        for n in range(order):
+            table, off = self._unpack_table(mv, off, n)
+            words.append(table)
+        phrases, off = self._unpack_table(mv, off, 1)
+        (last,) = struct.unpack_from("<I", mv, off)
+        with self._lock:
+            self.order = order
+            self._strings = strings
+            self._ids = {s: i for i, s in enumerate(strings)}
+            self._words = words
+            self._phrases = {ctx[0]: counts for ctx, counts in phrases.items()}
+            self._last_phrase = last
+            self._top = {}
+            self._dirty = False
+
+    def _save_loop(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.save_delay)
+            self._wake.clear()
+            try:
+                self.save()
+            except OSError:
+                pass
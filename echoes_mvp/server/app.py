@@ -1,17 +1,90 @@
+import eventlet
+eventlet.monkey_patch()
 
-from flask import Flask
+import os
+import atexit
+import struct
+
+from flask import Flask, jsonify, request
 from flask_socketio import SocketIO
 
+from telemetry import TelemetryStore
+
+TELEMETRY_DB = os.environ.get("ECHOES_TELEMETRY_DB", os.path.join(os.path.dirname(__file__), "data", "telemetry.db"))
+FLUSH_INTERVAL = float(os.environ.get("ECHOES_TELEMETRY_FLUSH", "2.0"))
+
 app = Flask(__name__)
-socketio = SocketIO(app, cors_allowed_origins="*")
+# eventlet: one green thread per connection, so many tracker clients can
+# stream at once without a thread each.
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode="eventlet")
+telemetry = TelemetryStore(TELEMETRY_DB, window=float(os.environ.get("ECHOES_TELEMETRY_WINDOW", "10")))
+atexit.register(telemetry.close)
+
+def decode_eye_data(data):
+    """eye_data arrives as JSON or, from clients with ECHOES_EYE_BINARY=1, as
+    little-endian float32: gaze x, y, then left and right eye x, y pairs."""
+    if not isinstance(data, (bytes, bytearray)):
+        return data
+    # Explicit '<' so big-endian hosts decode the same values.
+    values = list(struct.unpack('<%df' % (len(data) // 4), data))
+    points = list(zip(values[2::2], values[3::2]))
+    half = len(points) // 2
+    return {'gaze': values[:2], 'left_eye': points[:half], 'right_eye': points[half:]}
+
+def gaze_of(data):
+    """Gaze point of an eye_data payload; older clients only send eye points."""
+    gaze = data.get('gaze')
+    if gaze:
+        return gaze[0], gaze[1]
+    points = list(data.get('left_eye') or []) + list(data.get('right_eye') or [])
+    if not points:
+        return None
+    return sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points)
+
+def flush_loop():
+    while True:
+        socketio.sleep(FLUSH_INTERVAL)
+        try:
+            telemetry.flush()
+        except Exception as e:
+            print("Telemetry flush failed:", e)
+
+_flusher = None
+
+@socketio.on('connect')
+def handle_connect():
+    # Started lazily so the task runs on the server's event loop.
+    global _flusher
+    if _flusher is None:
+        _flusher = socketio.start_background_task(flush_loop)
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    telemetry.disconnect(request.sid)
 
 @socketio.on('eye_data')
 def handle_eye_data(data):
-    print("Received eye data:", data)
+    point = gaze_of(decode_eye_data(data))
+    if point is not None:
+        telemetry.gaze(request.sid, point[0], point[1])
 
 @socketio.on('speech_event')
 def handle_speech_event(data):
-    print("Received speech event:", data)
+    telemetry.event(request.sid, str((data or {}).get('word', '')))
+
+_BATCHED = {'eye_data': handle_eye_data, 'speech_event': handle_speech_event}
+
+@socketio.on('batch')
+def handle_batch(messages):
+    """Clients send queued messages as one list of [event, data] pairs."""
+    for event, data in messages or ():
+        handler = _BATCHED.get(event)
+        if handler is not None:
+            handler(data)
+
+@app.get('/telemetry/stats')
+def telemetry_stats():
+    return jsonify(telemetry.stats())
 
 if __name__ == '__main__':
     socketio.run(app, host='0.0.0.0', port=5001)
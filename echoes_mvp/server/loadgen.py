@@ -0,0 +1,115 @@
+"""Load generator: N simulated tracker clients streaming eye_data.
+
+Each client connects over Socket.IO and sends gaze samples (a slow random
+walk with occasional saccades, so the server finds fixations) at ``--rate``
+Hz for ``--duration`` seconds, plus an occasional speech_event. Sustained
+throughput is measured from the server's own ``/telemetry/stats`` counters.
+
+    python loadgen.py --clients 50 --rate 30 --duration 20 [--binary] [--json]
+
+Needs ``pip install "python-socketio[client]" requests``.
+"""
+import json
+import time
+import random
+import struct
+import argparse
+import threading
+
+import requests
+import socketio
+
+
+def _client(url, rate, duration, binary, seed, sent, errors, start):
+    rng = random.Random(seed)
+    sio = socketio.Client(reconnection=False)
+    try:
+        sio.connect(url, transports=["websocket"])
+    except Exception:
+        errors.append(seed)
+        return
+    start.wait()
+    x, y = rng.random(), rng.random()
+    interval = 1.0 / rate
+    n = 0
+    t_end = time.perf_counter() + duration
+    next_at = time.perf_counter()
+    while time.perf_counter() < t_end:
+        if rng.random() < 0.02:
+            x, y = rng.random(), rng.random()
+        x = min(1.0, max(0.0, x + rng.gauss(0, 0.003)))
+        y = min(1.0, max(0.0, y + rng.gauss(0, 0.003)))
+        eyes = [(x + rng.gauss(0, 0.01), y + rng.gauss(0, 0.01)) for _ in range(18)]
+        if binary:
+            sio.emit("eye_data", struct.pack("<38f", x, y, *[c for p in eyes for c in p]))
+        else:
+            sio.emit("eye_data", {"gaze": [x, y], "left_eye": eyes[:9], "right_eye": eyes[9:]})
+        n += 1
+        if rng.random() < 0.005:
+            sio.emit("speech_event", {"word": "badword1"})
+        next_at += interval
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    sent.append((n, time.perf_counter()))
+    time.sleep(0.5)
+    sio.disconnect()
+
+
+def run(url, clients, rate, duration, binary):
+    stats_url = url.rstrip("/") + "/telemetry/stats"
+    sent, errors = [], []
+    start = threading.Event()
+    threads = [threading.Thread(target=_client, args=(url, rate, duration, binary, i, sent, errors, start), daemon=True)
+               for i in range(clients)]
+    for t in threads:
+        t.start()
+    time.sleep(min(5.0, 0.05 * clients + 1.0))  # let the connections settle
+    before = requests.get(stats_url, timeout=5).json()
+    t0 = time.perf_counter()
+    start.set()
+    for t in threads:
+        t.join(duration + 30)
+    # Measure until the last client stopped sending, not until it hung up.
+    elapsed = max([end for _, end in sent], default=time.perf_counter()) - t0
+    total = sum(n for n, _ in sent)
+    time.sleep(1.0)
+    after = requests.get(stats_url, timeout=5).json()
+    received = after["received"] - before["received"]
+    offered = clients * rate
+    return {
+        "clients": clients,
+        "connected": clients - len(errors),
+        "rate_hz": rate,
+        "duration_s": duration,
+        "binary": binary,
+        "sent": total,
+        "received": received,
+        "loss": round(1 - received / total, 4) if total else None,
+        "offered_msgs_per_s": offered,
+        "sustained_msgs_per_s": round(received / elapsed, 1),
+        "server": after,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--url", default="http://localhost:5001")
+    ap.add_argument("--clients", type=int, default=20)
+    ap.add_argument("--rate", type=float, default=30.0, help="eye_data messages per second per client")
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--binary", action="store_true", help="send packed float32 payloads")
+    ap.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = ap.parse_args()
+    result = run(args.url, args.clients, args.rate, args.duration, args.binary)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print("%d/%d clients, %.0f msg/s offered, %.1f msg/s sustained, loss %s"
+          % (result["connected"], result["clients"], result["offered_msgs_per_s"],
+             result["sustained_msgs_per_s"], result["loss"]))
+    print("server:", json.dumps(result["server"]))
+
+
+if __name__ == "__main__":
+    main()
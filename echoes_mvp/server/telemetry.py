@@ -0,0 +1,222 @@
+"""Buffered telemetry ingestion for tracker clients.
+
+Socket handlers only append: each client gets a small ring buffer of raw
+gaze samples (for inspection) and a running aggregate for the current time
+window. Aggregates are O(1) per sample: sample count, mean position,
+fixations found with a streaming dispersion-threshold (I-DT) detector and
+their dwell durations, and speech event counts per word. Closed windows
+wait in memory until ``flush`` writes them to SQLite in one transaction,
+called periodically from a background task.
+"""
+import os
+import time
+import sqlite3
+import threading
+from collections import Counter, deque
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gaze_windows (
+    client TEXT NOT NULL,
+    window_start INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    mean_x REAL,
+    mean_y REAL,
+    fixations INTEGER NOT NULL,
+    dwell_ms_total INTEGER NOT NULL,
+    dwell_ms_max INTEGER NOT NULL,
+    PRIMARY KEY (client, window_start)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS speech_counts (
+    client TEXT NOT NULL,
+    window_start INTEGER NOT NULL,
+    word TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (client, window_start, word)
+) WITHOUT ROWID;
+"""
+
+
+class _Window:
+    __slots__ = ("start", "samples", "sum_x", "sum_y", "fixations", "dwell_total", "dwell_max", "words")
+
+    def __init__(self, start):
+        self.start = start
+        self.samples = 0
+        self.sum_x = self.sum_y = 0.0
+        self.fixations = 0
+        self.dwell_total = self.dwell_max = 0.0
+        self.words = Counter()
+
+    def add_fixation(self, duration):
+        self.fixations += 1
+        self.dwell_total += duration
+        self.dwell_max = max(self.dwell_max, duration)
+
+    def rows(self, client):
+        mean_x = self.sum_x / self.samples if self.samples else None
+        mean_y = self.sum_y / self.samples if self.samples else None
+        gaze = (client, int(self.start), self.samples, mean_x, mean_y, self.fixations,
+                int(self.dwell_total * 1000), int(self.dwell_max * 1000))
+        words = [(client, int(self.start), w, n) for w, n in self.words.items()]
+        return gaze, words
+
+
+class ClientTelemetry:
+    """Per-client state. Fixations: consecutive samples whose x+y spread
+    stays within ``dispersion`` for at least ``min_fixation`` seconds."""
+
+    def __init__(self, window, ring_size=256, dispersion=0.05, min_fixation=0.1):
+        self.window = window
+        self.dispersion = dispersion
+        self.min_fixation = min_fixation
+        self.recent = deque(maxlen=ring_size)
+        self.current = None
+        self.closed = []
+        self.last_seen = 0.0
+        self._fix = None  # [start, last, min_x, max_x, min_y, max_y]
+
+    def _roll(self, t):
+        start = t - t % self.window
+        if self.current is None:
+            self.current = _Window(start)
+        elif start != self.current.start:
+            self._end_fixation()
+            self.closed.append(self.current)
+            self.current = _Window(start)
+
+    def _end_fixation(self):
+        fix, self._fix = self._fix, None
+        if fix is not None and fix[1] - fix[0] >= self.min_fixation:
+            self.current.add_fixation(fix[1] - fix[0])
+
+    def gaze(self, t, x, y):
+        self._roll(t)
+        self.last_seen = t
+        self.recent.append((t, x, y))
+        w = self.current
+        w.samples += 1
+        w.sum_x += x
+        w.sum_y += y
+        fix = self._fix
+        if fix is not None:
+            lo_x, hi_x = min(fix[2], x), max(fix[3], x)
+            lo_y, hi_y = min(fix[4], y), max(fix[5], y)
+            if (hi_x - lo_x) + (hi_y - lo_y) <= self.dispersion:
+                fix[1:] = [t, lo_x, hi_x, lo_y, hi_y]
+                return
+            self._end_fixation()
+        self._fix = [t, t, x, x, y, y]
+
+    def event(self, t, word):
+        self._roll(t)
+        self.last_seen = t
+        self.current.words[word] += 1
+
+    def drain(self, now, final=False):
+        """Closed windows, plus the current one once it has ended (or on
+        ``final``, e.g. after a disconnect)."""
+        if self.current is not None and (final or now - self.current.start >= self.window):
+            self._end_fixation()
+            self.closed.append(self.current)
+            self.current = None
+        out, self.closed = self.closed, []
+        return out
+
+
+class TelemetryStore:
+    def __init__(self, path, window=10.0, ring_size=256):
+        self.path = path
+        self.window = window
+        self.ring_size = ring_size
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._gone = set()
+        self.received = 0
+        self.events = 0
+        self.batches = 0
+        self.rows_written = 0
+        self.last_flush_ms = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("PRAGMA journal_mode=WAL;" + SCHEMA)
+
+    def _client(self, client):
+        state = self._clients.get(client)
+        if state is None:
+            state = self._clients[client] = ClientTelemetry(self.window, self.ring_size)
+        return state
+
+    def gaze(self, client, x, y, t=None):
+        t = time.time() if t is None else t
+        with self._lock:
+            self.received += 1
+            self._client(client).gaze(t, x, y)
+
+    def event(self, client, word, t=None):
+        t = time.time() if t is None else t
+        with self._lock:
+            self.events += 1
+            self._client(client).event(t, word)
+
+    def disconnect(self, client):
+        with self._lock:
+            if client in self._clients:
+                self._gone.add(client)
+
+    def recent(self, client, n=30):
+        with self._lock:
+            state = self._clients.get(client)
+            return list(state.recent)[-n:] if state else []
+
+    def flush(self, now=None):
+        """Write every finished window in one transaction; returns row count."""
+        now = time.time() if now is None else now
+        t0 = time.perf_counter()
+        gaze_rows, word_rows = [], []
+        with self._lock:
+            for client, state in list(self._clients.items()):
+                final = client in self._gone
+                for w in state.drain(now, final):
+                    g, words = w.rows(client)
+                    gaze_rows.append(g)
+                    word_rows.extend(words)
+                if final:
+                    del self._clients[client]
+            self._gone.clear()
+        if gaze_rows:
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO gaze_windows VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(client, window_start) DO UPDATE SET "
+                    # Right-hand sides see the stored row, so the means are
+                    # re-weighted by both sample counts before they are summed.
+                    "mean_x = (coalesce(mean_x * samples, 0) + coalesce(excluded.mean_x * excluded.samples, 0)) "
+                    "/ nullif(samples + excluded.samples, 0), "
+                    "mean_y = (coalesce(mean_y * samples, 0) + coalesce(excluded.mean_y * excluded.samples, 0)) "
+                    "/ nullif(samples + excluded.samples, 0), "
+                    "samples = samples + excluded.samples, fixations = fixations + excluded.fixations, "
+                    "dwell_ms_total = dwell_ms_total + excluded.dwell_ms_total, "
+                    "dwell_ms_max = max(dwell_ms_max, excluded.dwell_ms_max)", gaze_rows)
+                self._db.executemany(
+                    "INSERT INTO speech_counts VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(client, window_start, word) DO UPDATE SET count = count + excluded.count",
+                    word_rows)
+            self.batches += 1
+            self.rows_written += len(gaze_rows) + len(word_rows)
+        self.last_flush_ms = (time.perf_counter() - t0) * 1000.0
+        return len(gaze_rows) + len(word_rows)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "received": self.received,
+                "events": self.events,
+                "batches": self.batches,
+                "rows_written": self.rows_written,
+                "last_flush_ms": round(self.last_flush_ms, 2),
+            }
+
+    def close(self):
+        self.flush(now=float("inf"))
+        self._db.close()
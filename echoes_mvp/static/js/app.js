@@ -24,7 +24,9 @@ function renderSuggestions(list) {
     chip.className = "chip";
     chip.textContent = s;
     chip.onclick = () => {
-      inputEl().value = (inputEl().value + " " + s).trim();
+      const typed = inputEl().value.trim();
+      // Offline suggestions repeat what was typed; model suggestions continue it.
+      inputEl().value = s.toLowerCase().startsWith(typed.toLowerCase()) ? s : (typed + " " + s).trim();
       requestSuggestions();
     };
     el.appendChild(chip);
@@ -0,0 +1,106 @@
+import numpy as np
+
+from speech_pipeline import FakeBackend, SpeechPipeline
+from word_matcher import WordMatcher
+
+RATE, CHUNK = 16000, 480
+CHUNK_BYTES = CHUNK * 2
+
+
+# Signals are whole chunks long (one chunk is 30 ms) so utterance sizes are exact.
+def silence(chunks):
+    return np.zeros(chunks * CHUNK, dtype="<i2")
+
+
+def tone(chunks, amplitude=3000):
+    t = np.arange(chunks * CHUNK) / RATE
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype("<i2")
+
+
+class PcmSource:
+    """Serves a synthetic signal in CHUNK-sized reads, as fast as asked."""
+
+    def __init__(self, *parts):
+        data = np.concatenate(parts).tobytes()
+        self._chunks = [data[i:i + CHUNK_BYTES] for i in range(0, len(data), CHUNK_BYTES)]
+        self.sample_rate = RATE
+        self.sample_width = 2
+        self.chunk = CHUNK
+        self.closed = False
+
+    def read(self):
+        return self._chunks.pop(0) if self._chunks else None
+
+    def close(self):
+        self.closed = True
+
+
+class ScriptedBackend(FakeBackend):
+    """FakeBackend that keeps what it was given and raises scripted errors."""
+
+    def __init__(self, transcripts=(), delay=0.0):
+        super().__init__(transcripts, delay)
+        self.received = []
+
+    def transcribe(self, pcm, sample_rate):
+        self.received.append(pcm)
+        out = super().transcribe(pcm, sample_rate)
+        if isinstance(out, Exception):
+            raise out
+        return out
+
+
+def run(source, backend, **kwargs):
+    heard = []
+    pipeline = SpeechPipeline(source, backend, WordMatcher(["help"]),
+                              lambda text, words: heard.append((text, words)), **kwargs)
+    pipeline.start().wait(10)
+    return pipeline, heard
+
+
+def test_one_utterance_with_pre_roll():
+    source = PcmSource(silence(30), tone(16), silence(30))
+    backend = ScriptedBackend(["please help me"])
+    pipeline, heard = run(source, backend)
+    assert heard == [("please help me", ["help"])]
+    assert len(backend.received) == 1
+    pcm = backend.received[0]
+    gate = pipeline.gate
+    # Pre-roll silence, the tone, then the hangover that closed the utterance.
+    assert len(pcm) == (gate._pre.maxlen + 16 + gate.hangover) * CHUNK_BYTES
+    assert pcm[:gate._pre.maxlen * CHUNK_BYTES] == bytes(gate._pre.maxlen * CHUNK_BYTES)
+    stats = pipeline.stats()
+    assert stats["utterances"] == 1 and stats["recognized"] == 1 and stats["matches"] == 1
+    assert stats["latency"]["count"] == 1
+    assert source.closed
+
+
+def test_empty_and_failed_recognitions_are_counted():
+    parts = [silence(30)]
+    for _ in range(3):
+        parts += [tone(10), silence(30)]
+    backend = ScriptedBackend(["hello", "", RuntimeError("engine crashed")])
+    pipeline, heard = run(PcmSource(*parts), backend, workers=1)
+    stats = pipeline.stats()
+    assert heard == [("hello", [])]
+    assert (stats["utterances"], stats["recognized"], stats["empty"], stats["errors"]) == (3, 1, 1, 1)
+    assert stats["dropped"] == 0
+    assert stats["recognize"]["count"] == 2  # failures are not timed
+
+
+def test_slow_backend_drops_oldest_and_stop_ends_threads():
+    parts = [silence(30)]
+    for _ in range(8):
+        parts += [tone(7), silence(21)]
+    backend = ScriptedBackend(delay=0.3)
+    heard = []
+    pipeline = SpeechPipeline(PcmSource(*parts), backend, WordMatcher([]),
+                              lambda text, words: heard.append(text), workers=1, queue_size=1).start()
+    pipeline._threads[0].join(5)  # capture has read the whole burst
+    pipeline.stop()
+    pipeline.wait(5)
+    assert not any(t.is_alive() for t in pipeline._threads)
+    stats = pipeline.stats()
+    assert stats["utterances"] == 8
+    assert stats["dropped"] > 0
+    assert len(backend.received) + stats["dropped"] <= 8
@@ -0,0 +1,38 @@
+import sqlite3
+
+from telemetry import TelemetryStore
+
+
+def test_window_written_twice_keeps_a_weighted_mean(tmp_path):
+    path = str(tmp_path / "telemetry.db")
+    store = TelemetryStore(path, window=10.0)
+    for x in (0.1, 0.2, 0.3):
+        store.gaze("a", x, 0.5, t=100.0)
+    store.disconnect("a")
+    store.flush(now=101.0)
+    # The same client reconnects inside the same window.
+    store.gaze("a", 0.9, 0.1, t=105.0)
+    store.disconnect("a")
+    store.flush(now=106.0)
+    store.close()
+
+    row = sqlite3.connect(path).execute(
+        "SELECT samples, mean_x, mean_y FROM gaze_windows WHERE client = 'a'").fetchone()
+    assert row[0] == 4
+    assert abs(row[1] - (0.1 + 0.2 + 0.3 + 0.9) / 4) < 1e-9
+    assert abs(row[2] - (0.5 * 3 + 0.1) / 4) < 1e-9
+
+
+def test_speech_only_window_does_not_erase_mean(tmp_path):
+    path = str(tmp_path / "telemetry.db")
+    store = TelemetryStore(path, window=10.0)
+    store.gaze("a", 0.4, 0.6, t=100.0)
+    store.disconnect("a")
+    store.flush(now=101.0)
+    store.event("a", "hello", t=102.0)
+    store.disconnect("a")
+    store.close()
+
+    row = sqlite3.connect(path).execute(
+        "SELECT samples, mean_x, mean_y FROM gaze_windows WHERE client = 'a'").fetchone()
+    assert row == (1, 0.4, 0.6)
@@ -1,23 +1,40 @@
 import os
-import re
 import json
 import threading
-from threading import Lock
 from datetime import datetime
 
-from flask import Flask, render_template, request, jsonify
-import requests
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 
 # Optional (installed via requirements.txt)
 import cv2
 import mediapipe as mp
+import numpy as np
+
+from history_log import HistoryLog, migrate_combined_file
+from json_store import JsonStore
+from ngram_model import NGramModel
+from phrase_index import PrefixIndex
+from suggest_cache import SuggestionCache, make_key
+from json_stream import ArrayStreamParser
+from ollama_client import OllamaClient
+from singleflight import SessionTokens, SingleFlight, Superseded
+from teaching import CLEARED, TeachingCache
+from tracker_pipeline import TrackerPipeline
+from capture_sources import open_source
+from debug_overlay import MjpegSink, make_overlay
+from gaze_tracker import GazeTracker
+from usage_counters import UsageCounters
+from word_matcher import WordMatcher
+import serving
 
 APP_NAME = "Echoes MVP"
-DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DATA_DIR = os.environ.get("ECHOES_DATA_DIR", os.path.join(os.path.dirname(__file__), "data"))
 PHRASES_PATH = os.path.join(DATA_DIR, "user_phrases.json")
+HISTORY_PATH = os.path.join(DATA_DIR, "history.jsonl")
 SETTINGS_PATH = os.path.join(DATA_DIR, "settings.json")
-
-lock = Lock()
+NGRAM_PATH = os.path.join(DATA_DIR, "ngram.bin")
+# Webcam index, video file or "synthetic" (see capture_sources.py)
+CAPTURE_SOURCE = os.environ.get("ECHOES_CAPTURE", "0")
 
 DEFAULT_CATEGORIES = {
     "Needs": ["I need help", "I'm thirsty", "I'm hungry", "I need the bathroom", "Please wait"],
@@ -40,51 +57,65 @@ def ensure_files():
     os.makedirs(DATA_DIR, exist_ok=True)
     if not os.path.exists(PHRASES_PATH):
         with open(PHRASES_PATH, "w", encoding="utf-8") as f:
-            json.dump({"categories": DEFAULT_CATEGORIES, "history": []}, f, ensure_ascii=False, indent=2)
+            json.dump({"categories": DEFAULT_CATEGORIES}, f, ensure_ascii=False, indent=2)
     if not os.path.exists(SETTINGS_PATH):
         with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
             json.dump(DEFAULT_SETTINGS, f, ensure_ascii=False, indent=2)
 
-def load_json(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def save_json(path, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
 ensure_files()
+migrate_combined_file(PHRASES_PATH, HISTORY_PATH)
+history_log = HistoryLog(HISTORY_PATH)
+_ngram_exists = os.path.exists(NGRAM_PATH)
+ngram = NGramModel(NGRAM_PATH)
+if not _ngram_exists:
+    for _h in history_log:
+        ngram.learn(_h["phrase"])
+
+def _on_phrases_reload(data):
+    phrase_index.rebuild(data.get("categories"))
+    usage.set_phrases(data.get("categories"))
+
+phrases_store = JsonStore(PHRASES_PATH, on_reload=_on_phrases_reload)
+phrase_index = PrefixIndex.from_categories(phrases_store.get().get("categories"))
+usage = UsageCounters()
+usage.rebuild(history_log.iter_reverse(), phrases_store.get().get("categories"))
+settings_store = JsonStore(SETTINGS_PATH)
 
 app = Flask(__name__)
 
 # ---------- Ollama integration ----------
-def ollama_chat(messages, model="llama3.2", endpoint="http://localhost:11434/api/chat", temperature=0.2):
+SUGGEST_MODEL = "llama3.2"
+SUGGEST_TEMPERATURE = 0.2
+suggest_cache = SuggestionCache()
+suggest_flights = SingleFlight()
+suggest_sessions = SessionTokens()
+
+ollama = OllamaClient(timeout=(2.0, 20.0))
+# Suggestion model calls wait here once Ollama is busy; when no slot frees up
+# the routes answer from the local fallback.
+llm_limit = serving.limit("llm", concurrency=ollama.max_in_flight, queue=16, timeout=15.0)
+
+def ollama_chat(messages, model="llama3.2", temperature=0.2):
     """Call Ollama's chat API with messages. Returns string content or '' on failure."""
     try:
-        resp = requests.post(
-            endpoint,
-            json={
-                "model": model,
-                "messages": messages,
-                "stream": False,
-                "options": {"temperature": temperature},
-            },
-            timeout=20,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        content = data.get("message", {}).get("content", "")
-        return (content or "").strip()
+        return ollama.chat(messages, model=model, temperature=temperature)
     except Exception:
         return ""
 
+def ollama_chat_stream(messages, model="llama3.2", temperature=0.2):
+    """Stream Ollama's chat API. Yields content chunks; yields nothing on failure."""
+    try:
+        yield from ollama.chat_stream(messages, model=model, temperature=temperature)
+    except Exception:
+        return
+
 # ---------- Profanity detection & teaching ----------
+# Whole-word matching; "*" marks stems that should also catch inflections.
 _PROFANE_WORDS = [
-    "damn","shit","fuck","bitch","bastard","asshole","dick","crap","stupid","idiot",
-    "moron","retard","slut","whore","racist","kill yourself","kys"
+    "damn*","shit*","fuck*","bitch*","bastard*","asshole*","dick","crap*","stupid*","idiot*",
+    "moron*","retard*","slut*","whore*","racist*","kill yourself","kys"
 ]
-import re
-_PROFANE_RE = re.compile(r"(" + "|".join(re.escape(w) for w in _PROFANE_WORDS) + r")", re.IGNORECASE)
+profanity = WordMatcher(_PROFANE_WORDS)
 
 BAD_WORD_SYSTEM_PROMPT = """You are a supportive AAC assistant for kids and adults.
 If the provided phrase includes profanity, slurs, or insulting language, respond in a short, kind way:
@@ -96,83 +127,108 @@ If the phrase is fine, respond with: OK
 """
 
 def detect_profanity(text: str) -> bool:
-    return bool(_PROFANE_RE.search(text or ""))
+    return profanity.contains(text)
+
+# Teaching has its own client: one generation at a time and its own circuit
+# breaker, so background explanations never take suggestion slots and their
+# failures (e.g. Ollama down at startup) cannot open the suggestion circuit.
+teaching_ollama = OllamaClient(timeout=(2.0, 20.0), max_in_flight=1)
 
-def teach_about_profanity(phrase: str) -> str:
+def teach_about_profanity(words) -> str:
     msg = [
         {"role": "system", "content": BAD_WORD_SYSTEM_PROMPT},
-        {"role": "user", "content": f"Phrase: {phrase}\nEvaluate and respond."}
+        {"role": "user", "content": f"Phrase: {' '.join(words)}\nEvaluate and respond."}
     ]
-    out = ollama_chat(msg) or ""
-    return out
+    try:
+        return teaching_ollama.chat(msg, model="llama3.2", temperature=0.2) or ""
+    except Exception:
+        return ""
+
+# Explanations depend only on the matched words, so they are cached per word
+# set and generated off the request path. The built-in list is prewarmed from
+# __main__, behind any live requests.
+teaching = TeachingCache(teach_about_profanity)
 
 # ---------- Eye / Face tracking (OpenCV + MediaPipe) ----------
 mp_face_mesh = mp.solutions.face_mesh
-mp_drawing = mp.solutions.drawing_utils
-
-_eye_thread = None
-_eye_thread_running = False
-
-def eye_tracker_loop():
-    global _eye_thread_running
-    _eye_thread_running = True
-    cap = cv2.VideoCapture(0)
+_TESSELATION = np.array(sorted(mp_face_mesh.FACEMESH_TESSELATION), dtype=np.int32)
+
+_eye_tracker = None
+_eye_overlay = None
+_eye_gaze = None
+_eye_lock = threading.Lock()
+
+def _eye_running():
+    return _eye_tracker is not None and _eye_tracker.running
+
+def _draw_face_mesh(frame, gaze):
+    if gaze is not None:
+        h, w = frame.shape[:2]
+        if gaze.landmarks is not None:
+            pts = (gaze.landmarks * (w, h)).astype(np.int32)
+            cv2.polylines(frame, list(pts[_TESSELATION]), False, (192, 192, 192), 1)
+        x0, y0, x1, y1 = gaze.roi
+        cv2.rectangle(frame, (x0, y0), (x1 - 1, y1 - 1), (255, 128, 0), 1)
+        cv2.circle(frame, (int(gaze.x * w), int(gaze.y * h)), 6, (0, 255, 0), -1)
+    # Mirror only what is displayed; inference runs on the raw frame.
+    return cv2.flip(frame, 1)
+
+def _build_eye_tracker():
+    """Capture and gaze inference run as pipeline stages; the debug
+    overlay, if enabled, renders from a side thread at a capped rate."""
+    global _eye_overlay
+    cap = open_source(CAPTURE_SOURCE)
     if not cap.isOpened():
         print("[EyeTracker] Could not open webcam.")
-        _eye_thread_running = False
-        return
-
-    with mp_face_mesh.FaceMesh(
+        return None
+    face_mesh = mp_face_mesh.FaceMesh(
         max_num_faces=1,
         refine_landmarks=True,
         min_detection_confidence=0.5,
         min_tracking_confidence=0.5
-    ) as face_mesh:
-        while _eye_thread_running and cap.isOpened():
-            ok, frame = cap.read()
-            if not ok:
-                break
-            frame = cv2.flip(frame, 1)
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            result = face_mesh.process(rgb)
-
-            if result.multi_face_landmarks:
-                for fl in result.multi_face_landmarks:
-                    mp_drawing.draw_landmarks(
-                        image=frame,
-                        landmark_list=fl,
-                        connections=mp_face_mesh.FACEMESH_TESSELATION,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=mp_drawing.DrawingSpec(thickness=1, circle_radius=1)
-                    )
-            cv2.imshow("Echoes Eye & Face Tracker (press Q to close)", frame)
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):
-                break
-
-    cap.release()
-    cv2.destroyAllWindows()
-    _eye_thread_running = False
+    )
+    overlay = _eye_overlay = make_overlay(
+        _draw_face_mesh, "Echoes Eye & Face Tracker (press Q to close)", on_quit=stop_eye_tracker)
+    gaze = GazeTracker(face_mesh, keep_landmarks=overlay is not None)
+
+    def publish(packet):
+        global _eye_gaze
+        if packet.result is not None:
+            _eye_gaze = packet.result
+        if overlay is not None:
+            overlay.offer(packet)
+
+    def on_exit():
+        if overlay is not None:
+            overlay.stop()
+        face_mesh.close()
+
+    if overlay is not None:
+        overlay.start()
+    return TrackerPipeline(cap, gaze.process, publish, on_exit=on_exit)
 
 def start_eye_tracker():
-    global _eye_thread
-    if _eye_thread and _eye_thread.is_alive():
-        return
-    _eye_thread = threading.Thread(target=eye_tracker_loop, daemon=True)
-    _eye_thread.start()
+    global _eye_tracker
+    with _eye_lock:
+        if _eye_running():
+            return
+        _eye_tracker = _build_eye_tracker()
+        if _eye_tracker is not None:
+            _eye_tracker.start()
 
 def stop_eye_tracker():
-    global _eye_thread_running
-    _eye_thread_running = False
+    with _eye_lock:
+        if _eye_tracker is not None:
+            _eye_tracker.stop()
 
 # ---------- Routes ----------
 @app.route("/")
 def index():
-    ensure_files()
-    data = load_json(PHRASES_PATH)
-    settings = load_json(SETTINGS_PATH)
+    data = phrases_store.get()
+    settings = settings_store.get()
     if settings.get("eye_tracker_enabled", True):
-        start_eye_tracker()
+        # Opening the camera and loading FaceMesh block; keep them off the event loop.
+        serving.blocking(start_eye_tracker)
     return render_template("index.html", data=data, settings=settings, app_name=APP_NAME)
 
 @app.post("/api/speak")
@@ -182,26 +238,34 @@ def speak():
     if not phrase:
         return jsonify({"ok": False, "error": "Empty phrase"}), 400
 
-    profane = detect_profanity(phrase)
-    ai_warning = ""
-    if profane:
-        ai_warning = teach_about_profanity(phrase)
-
-    if ai_warning and ai_warning.strip().lower() != "ok":
-        return jsonify({"ok": False, "warning": ai_warning})
-
-    with lock:
-        data = load_json(PHRASES_PATH)
-        data.setdefault("history", []).append({
-            "ts": datetime.utcnow().isoformat() + "Z",
-            "phrase": phrase
-        })
-        save_json(PHRASES_PATH, data)
+    flagged = profanity.find(phrase)
+    if flagged:
+        key, warning, pending = teaching.reply(flagged)
+        # Blocked until the model clears the words, as with the inline check.
+        if warning != CLEARED:
+            return jsonify({"ok": False, "warning": warning, "teaching_key": key, "pending": pending})
+
+    ts = datetime.utcnow().isoformat() + "Z"
+    history_log.append({
+        "ts": ts,
+        "phrase": phrase
+    })
+    usage.record_tap(ts)
+    ngram.learn(phrase)
     return jsonify({"ok": True})
 
+@app.get("/api/teaching")
+def teaching_status():
+    """Poll for the LLM explanation behind a templated /api/speak warning."""
+    key = request.args.get("key") or ""
+    if not key:
+        return jsonify({"ok": False, "error": "Missing key"}), 400
+    warning, pending = teaching.poll(key)
+    return jsonify({"ok": True, "warning": warning, "pending": pending})
+
 @app.get("/api/custom_phrase")
 def list_custom():
-    data = load_json(PHRASES_PATH)
+    data = phrases_store.get()
     return jsonify({"ok": True, "categories": data.get("categories", {})})
 
 @app.post("/api/custom_phrase")
@@ -211,13 +275,17 @@ def add_custom():
     phrase = (payload.get("phrase") or "").strip()
     if not phrase:
         return jsonify({"ok": False, "error": "Empty phrase"}), 400
-    with lock:
-        data = load_json(PHRASES_PATH)
+
+    def _add(data):
         cats = data.setdefault("categories", {})
         cats.setdefault(category, [])
-        if phrase not in cats[category]:
-            cats[category].append(phrase)
-        save_json(PHRASES_PATH, data)
+        if phrase in cats[category]:
+            return False
+        cats[category].append(phrase)
+        phrase_index.add(phrase)
+        usage.adjust_phrases(1)
+
+    data = phrases_store.update(_add) or phrases_store.get()
     return jsonify({"ok": True, "categories": data["categories"]})
 
 @app.delete("/api/custom_phrase")
@@ -225,97 +293,195 @@ def delete_custom():
     payload = request.get_json(force=True)
     category = (payload.get("category") or "").strip()
     phrase = (payload.get("phrase") or "").strip()
-    with lock:
-        data = load_json(PHRASES_PATH)
+
+    def _delete(data):
         cats = data.get("categories", {})
-        if category in cats and phrase in cats[category]:
-            cats[category].remove(phrase)
-            save_json(PHRASES_PATH, data)
-            return jsonify({"ok": True, "categories": data["categories"]})
-    return jsonify({"ok": False, "error": "Not found"}), 404
+        if category not in cats or phrase not in cats[category]:
+            return False
+        cats[category].remove(phrase)
+        phrase_index.remove(phrase)
+        usage.adjust_phrases(-1)
+
+    data = phrases_store.update(_delete)
+    if data is None:
+        return jsonify({"ok": False, "error": "Not found"}), 404
+    return jsonify({"ok": True, "categories": data["categories"]})
 
 @app.get("/api/settings")
 def get_settings():
-    return jsonify(load_json(SETTINGS_PATH))
+    return jsonify(settings_store.get())
 
 @app.post("/api/settings")
 def set_settings():
     payload = request.get_json(force=True)
-    with lock:
-        settings = load_json(SETTINGS_PATH)
-        for k in list(payload.keys()):
-            if k not in DEFAULT_SETTINGS:
-                payload.pop(k, None)
-        settings.update(payload)
-        save_json(SETTINGS_PATH, settings)
+    changes = {k: v for k, v in payload.items() if k in DEFAULT_SETTINGS}
+    settings = settings_store.update(lambda s: s.update(changes))
     if settings.get("eye_tracker_enabled", True):
-        start_eye_tracker()
+        serving.blocking(start_eye_tracker)
     else:
         stop_eye_tracker()
     return jsonify({"ok": True, "settings": settings})
 
-@app.post("/api/suggest")
-def suggest():
-    payload = request.get_json(force=True)
-    current_text = (payload.get("current") or "").strip()
-    k = int(payload.get("k") or 5)
-
-    data = load_json(PHRASES_PATH)
-    history = data.get("history", [])[-10:]
+def _suggest_messages(history, current_text, k):
     hist_text = "\\n".join([h["phrase"] for h in history])
-
     system = (
         "You are an AAC assistant helping a user communicate with short, clear everyday phrases. "
         f"Given a recent history and a partial input, suggest the next words or short phrases. "
         f"Return ONLY a JSON array of up to {k} suggestions, no prose."
     )
     user = f"History:\\n{hist_text}\\n\\nCurrent input: '{current_text}'\\n\\nSuggest next phrases."
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+def _allowed_suggestion(s):
+    return isinstance(s, str) and not detect_profanity(s)
+
+def _fallback_suggestions(history, current_text, k):
+    # Offline. With text typed, board and history phrases that start with it
+    # lead, then learned completions of it; with nothing typed, the phrases
+    # usually spoken next lead.
+    prefix = current_text.casefold()
+    counts = dict(phrase_index.query(prefix, k))
+    for h in history:
+        p = h["phrase"]
+        if p.casefold().startswith(prefix):
+            counts[p] = counts.get(p, phrase_index.weight(p)) + 2
+    ranked = sorted(counts.keys(), key=lambda x: (-counts[x], x))
+    if current_text:
+        candidates = ranked + ngram.complete(current_text, k)
+    else:
+        candidates = ngram.next_phrases(history[-1]["phrase"] if history else None, k) + ranked
+    seen = set()
+    candidates = [p for p in candidates if p.casefold() not in seen and not seen.add(p.casefold())]
+    # History can contain phrases logged while teaching was unavailable.
+    flagged = profanity.find_many(candidates)
+    return [p for p, hits in zip(candidates, flagged) if not hits][:k]
+
+def _ai_suggestions(history, current_text, k, is_current):
+    """Yield raw model suggestions from the cache or from a shared in-flight
+    stream. Raises Superseded once the caller's session has moved on. Only
+    the Ollama call takes an llm_limit slot; with the circuit open or no slot
+    free in time it yields nothing and the caller uses the local fallback."""
+    key = make_key([h["phrase"] for h in history], current_text, k, SUGGEST_MODEL, SUGGEST_TEMPERATURE)
+    cached = suggest_cache.get(key)
+    if cached is not None:
+        yield from cached
+        return
+    if ollama.breaker.state == "open":
+        return
+    messages = _suggest_messages(history, current_text, k)
+
+    def produce(publish, wanted):
+        items = []
+        parser = ArrayStreamParser()
+        stream = ollama_chat_stream(messages, model=SUGGEST_MODEL, temperature=SUGGEST_TEMPERATURE)
+        try:
+            for chunk in stream:
+                if not wanted():
+                    return  # every caller was superseded: drop the generation
+                for s in parser.feed(chunk):
+                    items.append(s)
+                    publish(s)
+                if parser.done:
+                    break
+        finally:
+            stream.close()
+        if items:
+            suggest_cache.put(key, items)
+
+    with llm_limit.slot() as ok:
+        if ok:
+            yield from serving.iterate(suggest_flights.stream(key, produce, is_current))
+
+@app.post("/api/suggest")
+def suggest():
+    payload = request.get_json(force=True)
+    current_text = (payload.get("current") or "").strip()
+    k = int(payload.get("k") or 5)
+    is_current = suggest_sessions.claim(payload.get("session"), int(payload.get("seq") or 0))
+
+    history = history_log.tail(10)
 
     suggestions = []
-    model_enabled = load_json(SETTINGS_PATH).get("ai_enabled", True)
+    model_enabled = settings_store.get().get("ai_enabled", True)
     if model_enabled:
-        raw = ollama_chat([{"role": "system", "content": system}, {"role": "user", "content": user}])
         try:
-            start = raw.find('[')
-            end = raw.rfind(']') + 1
-            if start != -1 and end != -1:
-                suggestions = json.loads(raw[start:end])
-        except Exception:
-            suggestions = []
+            # Filter after the cache so list changes take effect immediately.
+            allowed = [s for s in _ai_suggestions(history, current_text, k, is_current) if _allowed_suggestion(s)]
+        except Superseded:
+            return jsonify({"ok": False, "superseded": True}), 409
+        suggestions = list(dict.fromkeys(allowed))[:k]
 
     if not suggestions:
-        counts = {}
-        for cat, phrases in data.get("categories", {}).items():
-            for p in phrases:
-                if (not current_text) or p.lower().startswith(current_text.lower()):
-                    counts[p] = counts.get(p, 0) + 1
-        for h in history:
-            p = h["phrase"]
-            if (not current_text) or p.lower().startswith(current_text.lower()):
-                counts[p] = counts.get(p, 0) + 2
-        suggestions = sorted(counts.keys(), key=lambda x: (-counts[x], x))[:k]
+        suggestions = _fallback_suggestions(history, current_text, k)
 
     return jsonify({"ok": True, "suggestions": suggestions})
 
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.get("/api/suggest/stream")
+def suggest_stream():
+    """Server-sent events: one `suggestion` event per chip as soon as the model
+    produces it, then a final `done` event."""
+    current_text = (request.args.get("current") or "").strip()
+    k = int(request.args.get("k") or 5)
+    is_current = suggest_sessions.claim(request.args.get("session"), int(request.args.get("seq") or 0))
+    history = history_log.tail(10)
+    model_enabled = settings_store.get().get("ai_enabled", True)
+
+    def generate():
+        sent = []
+        source = "fallback"
+        if model_enabled:
+            try:
+                for s in _ai_suggestions(history, current_text, k, is_current):
+                    if _allowed_suggestion(s) and s not in sent and len(sent) < k:
+                        sent.append(s)
+                        yield _sse("suggestion", s)
+            except Superseded:
+                yield _sse("done", {"source": "superseded"})
+                return
+        if sent:
+            source = "ai"
+        else:
+            for s in _fallback_suggestions(history, current_text, k):
+                yield _sse("suggestion", s)
+        yield _sse("done", {"source": source})
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/tracker/debug.mjpg")
+def tracker_debug_stream():
+    """Debug overlay as MJPEG; only with ECHOES_TRACKER_DEBUG=mjpeg."""
+    overlay = _eye_overlay
+    if overlay is None or not isinstance(overlay.sink, MjpegSink):
+        return jsonify({"ok": False, "error": "Debug stream disabled"}), 404
+    # The sink waits on a thread condition between frames; wait off the event loop.
+    return Response(serving.iterate(overlay.sink.stream()), mimetype=overlay.sink.mimetype)
+
 @app.get("/api/metrics")
 def metrics():
-    data = load_json(PHRASES_PATH)
-    history = data.get("history", [])
-    now = datetime.utcnow()
-    last7 = [h for h in history if (now - datetime.fromisoformat(h["ts"].replace("Z",""))).days < 7]
-    weekly_active_days = len({h["ts"][:10] for h in last7})
-    today = now.date().isoformat()
-    todays = len([h for h in history if h["ts"].startswith(today)])
+    counts = usage.snapshot()
     return jsonify({
         "ok": True,
-        "weekly_active_days": weekly_active_days,
-        "today_taps": todays,
-        "total_phrases": sum(len(v) for v in data.get("categories", {}).values()),
-        "eye_tracker_running": _eye_thread_running
+        "weekly_active_days": counts["weekly_active_days"],
+        "today_taps": counts["today_taps"],
+        "total_phrases": counts["total_phrases"],
+        "eye_tracker_running": _eye_running(),
+        "gaze": {"x": _eye_gaze.x, "y": _eye_gaze.y} if _eye_gaze is not None else None,
+        "eye_tracker": _eye_tracker.stats() if _eye_tracker is not None else None,
+        "suggest_cache": suggest_cache.stats(),
+        "ollama": ollama.stats(),
+        "suggest_flights": suggest_flights.stats(),
+        "teaching": teaching.stats(),
+        "teaching_ollama": teaching_ollama.stats(),
+        "serving": serving.stats()
     })
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", "5000"))
-    if load_json(SETTINGS_PATH).get("eye_tracker_enabled", True):
+    teaching.prewarm([w.rstrip("*")] for w in _PROFANE_WORDS)
+    if settings_store.get().get("eye_tracker_enabled", True):
         start_eye_tracker()
-    app.run(host="0.0.0.0", port=port, debug=True)
+    serving.run(app, host="0.0.0.0", port=port, debug=True)
@@ -0,0 +1,107 @@
+"""Replay benchmark for the eye-tracking pipeline; no camera or display needed.
+
+Runs a clip (or generated frames) through the same TrackerPipeline +
+GazeTracker path the v2 and v3 apps use, headless, and reports throughput,
+per-stage latency percentiles, CPU time and memory as JSON.
+
+    python bench_tracker.py --source clip.mp4 [--profile v3] [--max-speed]
+    python bench_tracker.py --source synthetic:1280x720@30 --frames 300 --out run.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+
+import mediapipe as mp
+
+from capture_sources import open_source
+from gaze_tracker import GazeTracker
+from tracker_pipeline import TrackerPipeline
+
+# FaceMesh settings used by each app's tracker.
+PROFILES = {
+    "v2": dict(max_num_faces=1, refine_landmarks=True, min_detection_confidence=0.5, min_tracking_confidence=0.5),
+    "v3": dict(refine_landmarks=True, min_detection_confidence=0.7, min_tracking_confidence=0.7),
+}
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+def run(source, profile="v2", frames=300, realtime=True, infer_size=256, detect_size=640):
+    src = open_source(source, realtime=realtime, frames=frames)
+    if not src.isOpened():
+        raise SystemExit("could not open source %r" % source)
+    face_mesh = mp.solutions.face_mesh.FaceMesh(**PROFILES[profile])
+    tracker = GazeTracker(face_mesh, infer_size=infer_size, detect_size=detect_size)
+    found = [0]
+
+    def publish(packet):
+        # What the apps do per result: build the gaze payload and serialize it.
+        if packet.result is not None:
+            found[0] += 1
+            json.dumps({"x": packet.result.x, "y": packet.result.y})
+
+    rss_before = _rss_mb()
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    pipeline = TrackerPipeline(src, tracker.process, publish, max_read_failures=1,
+                               lossless=not realtime).start()
+    pipeline.wait()
+    wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    face_mesh.close()
+
+    stats = pipeline.stats()
+    stats.pop("running", None)
+    inferred = stats["infer"].get("count", 0)
+    return {
+        "source": str(source),
+        "profile": profile,
+        "realtime": realtime,
+        "infer_size": infer_size,
+        "detect_size": detect_size,
+        "frames_captured": stats["capture"].get("count", 0),
+        "frames_inferred": inferred,
+        "frames_with_face": found[0],
+        "wall_s": round(wall, 3),
+        "fps": round(inferred / wall, 1) if wall else 0.0,
+        "cpu_s": round(cpu, 3),
+        "cpu_util": round(cpu / wall, 2) if wall else 0.0,
+        "rss_mb": round(_rss_mb(), 1) if rss_before is not None else None,
+        "rss_growth_mb": round(_rss_mb() - rss_before, 1) if rss_before is not None else None,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+        "stages": stats,
+        "env": {"python": platform.python_version(), "mediapipe": mp.__version__,
+                "machine": platform.machine(), "cpus": os.cpu_count()},
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--source", default="synthetic", help="video path, webcam index or synthetic[:WxH@fps]")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="v2")
+    ap.add_argument("--frames", type=int, default=300, help="frames to generate for synthetic sources")
+    ap.add_argument("--max-speed", action="store_true", help="replay every frame as fast as inference allows instead of at the clip's fps")
+    ap.add_argument("--infer-size", type=int, default=256)
+    ap.add_argument("--detect-size", type=int, default=640)
+    ap.add_argument("--out", help="also write the JSON result to this file")
+    args = ap.parse_args()
+    result = run(args.source, args.profile, args.frames, not args.max_speed, args.infer_size, args.detect_size)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0 if result["frames_inferred"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
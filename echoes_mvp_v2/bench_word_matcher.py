@@ -0,0 +1,112 @@
+"""Microbenchmark: WordMatcher vs. the older per-app profanity checks.
+
+Compares, as the term list grows, the checks that existed before the shared
+matcher:
+  regex    - v2's single IGNORECASE alternation (_PROFANE_RE)
+  lower-in - v3's check_profanity (re-lowercases the text for every word)
+  in       - the client speech monitor's substring test per word
+against WordMatcher.contains and WordMatcher.find_many over the same texts.
+
+    python bench_word_matcher.py [--sizes 10,100,1000,5000] [--texts 500] [--json]
+"""
+import re
+import json
+import time
+import random
+import string
+import argparse
+
+from word_matcher import WordMatcher
+
+
+def _word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+
+
+def _texts(rng, terms, n):
+    vocab = [_word(rng) for _ in range(2000)]
+    out = []
+    for _ in range(n):
+        words = [rng.choice(vocab) for _ in range(rng.randint(3, 12))]
+        if rng.random() < 0.1:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(terms))
+        out.append(" ".join(words).capitalize())
+    return out
+
+
+def _time(fn, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - t)
+    return best / len(texts) * 1e6
+
+
+def run(sizes, n_texts, repeat, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for size in sizes:
+        terms = sorted({_word(rng) for _ in range(size * 2)})[:size]
+        texts = _texts(rng, terms, n_texts)
+
+        rx = re.compile(r"(" + "|".join(re.escape(w) for w in terms) + r")", re.IGNORECASE)
+        matcher = WordMatcher(terms)
+
+        def regex(ts):
+            return [bool(rx.search(t)) for t in ts]
+
+        def lower_in(ts):
+            return [any(w.lower() in t.lower() for w in terms) for t in ts]
+
+        def plain_in(ts):
+            out = []
+            for t in ts:
+                low = t.lower()
+                out.append(any(w in low for w in terms))
+            return out
+
+        def contains(ts):
+            return [matcher.contains(t) for t in ts]
+
+        def find_many(ts):
+            return matcher.find_many(ts)
+
+        t = time.perf_counter()
+        WordMatcher(terms)
+        build_ms = (time.perf_counter() - t) * 1000.0
+        rows.append({
+            "terms": size,
+            "build_ms": round(build_ms, 2),
+            "us_per_text": {
+                "regex": round(_time(regex, texts, repeat), 2),
+                "lower-in": round(_time(lower_in, texts, repeat), 2),
+                "in": round(_time(plain_in, texts, repeat), 2),
+                "matcher.contains": round(_time(contains, texts, repeat), 2),
+                "matcher.find_many": round(_time(find_many, texts, repeat), 2),
+            },
+        })
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="10,100,1000,5000")
+    ap.add_argument("--texts", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = ap.parse_args()
+    rows = run([int(s) for s in args.sizes.split(",")], args.texts, args.repeat)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    names = list(rows[0]["us_per_text"])
+    print("%8s %9s " % ("terms", "build ms") + " ".join("%18s" % n for n in names))
+    for r in rows:
+        print("%8d %9.2f " % (r["terms"], r["build_ms"])
+              + " ".join("%18.2f" % r["us_per_text"][n] for n in names))
+    print("(microseconds per text, best of %d)" % args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Opt-in, rate-limited debug view for the eye tracker.
+
+Trackers run headless by default: no flip, no drawing, no window. Set
+``ECHOES_TRACKER_DEBUG=window`` to open an OpenCV window, or ``=mjpeg`` to
+serve the view as an MJPEG stream from the web app. Either way the overlay
+is rendered from a side thread at most ``ECHOES_TRACKER_DEBUG_FPS`` times a
+second (default 5) from the newest packet, so the pipeline only pays for
+handing over a reference.
+"""
+import os
+import time
+import threading
+
+import cv2
+
+MODES = ("off", "window", "mjpeg")
+
+
+def debug_mode():
+    mode = (os.environ.get("ECHOES_TRACKER_DEBUG") or "off").strip().lower()
+    return mode if mode in MODES else "off"
+
+
+def debug_fps():
+    try:
+        return max(0.5, float(os.environ.get("ECHOES_TRACKER_DEBUG_FPS") or 5))
+    except ValueError:
+        return 5.0
+
+
+class WindowSink:
+    def __init__(self, title):
+        self.title = title
+
+    def show(self, image):
+        """Returns False once Q is pressed in the window."""
+        cv2.imshow(self.title, image)
+        return (cv2.waitKey(1) & 0xFF) != ord('q')
+
+    def close(self):
+        cv2.destroyWindow(self.title)
+
+
+class MjpegSink:
+    BOUNDARY = "frame"
+
+    def __init__(self, quality=70):
+        self.quality = quality
+        self._cond = threading.Condition()
+        self._jpeg = None
+        self._seq = 0
+        self._closed = False
+
+    def show(self, image):
+        ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if ok:
+            with self._cond:
+                self._jpeg = buf.tobytes()
+                self._seq += 1
+                self._cond.notify_all()
+        return True
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stream(self):
+        """multipart/x-mixed-replace body; each client gets the newest frame."""
+        seen = 0
+        while True:
+            with self._cond:
+                while self._seq == seen and not self._closed:
+                    self._cond.wait(1.0)
+                if self._closed:
+                    return
+                seen, jpeg = self._seq, self._jpeg
+            yield (b"--" + self.BOUNDARY.encode() + b"\r\nContent-Type: image/jpeg\r\n"
+                   b"Content-Length: " + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n")
+
+    @property
+    def mimetype(self):
+        return "multipart/x-mixed-replace; boundary=" + self.BOUNDARY
+
+
+class DebugOverlay:
+    """Renders ``render(frame, result) -> image`` for the newest offered
+    packet at most ``max_fps`` times a second and hands it to ``sink``."""
+
+    def __init__(self, render, sink, max_fps=5.0, on_quit=None):
+        self.render = render
+        self.sink = sink
+        self.interval = 1.0 / max_fps
+        self.on_quit = on_quit
+        self._latest = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self.rendered = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def offer(self, packet):
+        self._latest = packet
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        shown = None
+        try:
+            while not self._stop.is_set():
+                t0 = time.perf_counter()
+                packet = self._latest
+                if packet is not None and packet is not shown:
+                    shown = packet
+                    # Draw on a copy; the pipeline may still hold the frame.
+                    image = self.render(packet.frame.copy(), packet.result)
+                    self.rendered += 1
+                    if self.sink.show(image) is False:
+                        if self.on_quit is not None:
+                            self.on_quit()
+                        break
+                self._stop.wait(max(0.0, self.interval - (time.perf_counter() - t0)))
+        finally:
+            self.sink.close()
+
+
+def make_overlay(render, title, on_quit=None):
+    """Overlay for the configured mode, or None when running headless."""
+    mode = debug_mode()
+    if mode == "window":
+        sink = WindowSink(title)
+    elif mode == "mjpeg":
+        sink = MjpegSink()
+    else:
+        return None
+    return DebugOverlay(render, sink, debug_fps(), on_quit=on_quit)
@@ -0,0 +1,165 @@
+"""Gaze estimation core shared by the eye trackers.
+
+``GazeTracker.process`` runs FaceMesh on a crop around the face found in the
+previous frame, downscaled to ``infer_size`` (the whole frame, downscaled to
+``detect_size``, until a face is found). The crop only moves when the face
+nears its edge, so FaceMesh's frame-to-frame tracking is not disturbed. Only
+the landmarks the geometry needs are read out of the protobuf result, as one
+NumPy array. Gaze is the eye midpoint shifted by the iris offset from each
+eye's centre, computed for both eyes at once and smoothed with a One-Euro
+filter. Iris landmarks need ``refine_landmarks=True``; without them the gaze
+falls back to the eye midpoint.
+"""
+import math
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+# Per eye (subject's right, left): outer corner, inner corner, upper lid,
+# lower lid, iris centre. Then forehead, chin and cheeks for the face box.
+EYE_IDS = (33, 263, 133, 362, 159, 386, 145, 374, 468, 473)
+FACE_IDS = (10, 152, 234, 454)
+_GEOMETRY_IDS = EYE_IDS + FACE_IDS
+_IRIS_COUNT = 478
+
+GazeResult = namedtuple("GazeResult", "x y points landmarks roi")
+
+
+def landmark_array(landmarks, ids):
+    """``(len(ids), 2)`` float32 array of normalized x/y for ``ids``."""
+    return np.array([(landmarks[i].x, landmarks[i].y) for i in ids], dtype=np.float32)
+
+
+def gaze_point(eyes_px, frame_size, gain):
+    """Normalized gaze from the ``EYE_IDS`` points in pixels, ``(10, 2)``."""
+    outer, inner, top, bottom, iris = eyes_px.reshape(5, 2, 2)
+    center = (outer + inner) / 2.0
+    size = np.stack([np.linalg.norm(inner - outer, axis=1),
+                     np.linalg.norm(bottom - top, axis=1)], axis=1)
+    offset = (iris - center) / np.maximum(size, 1e-6)
+    return np.clip(center.mean(axis=0) / frame_size + gain * offset.mean(axis=0), 0.0, 1.0)
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """One-Euro low-pass filter over NumPy vectors: smooth when the signal is
+    still, responsive when it moves fast (Casiez et al., CHI 2012)."""
+
+    def __init__(self, min_cutoff=1.0, beta=5.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self._x = self._dx = self._t = None
+
+    def __call__(self, x, t):
+        x = np.asarray(x, dtype=np.float64)
+        if self._x is None:
+            self._x, self._dx, self._t = x, np.zeros_like(x), t
+            return x
+        dt = max(t - self._t, 1e-6)
+        a_d = _alpha(self.d_cutoff, dt)
+        self._dx = a_d * (x - self._x) / dt + (1.0 - a_d) * self._dx
+        a = _alpha(self.min_cutoff + self.beta * np.abs(self._dx), dt)
+        self._x = a * x + (1.0 - a) * self._x
+        self._t = t
+        return self._x
+
+
+class FaceRoi:
+    """Pixel box ``(x0, y0, x1, y1)`` to run FaceMesh on, or None for the
+    whole frame."""
+
+    def __init__(self, margin=0.35):
+        self.margin = margin
+        self.box = None
+
+    def reset(self):
+        self.box = None
+
+    def update(self, face_px, width, height):
+        (fx0, fy0), (fx1, fy1) = face_px.min(axis=0), face_px.max(axis=0)
+        pad_x, pad_y = (fx1 - fx0) * self.margin, (fy1 - fy0) * self.margin
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            # Keep the crop while the face stays clear of its edges.
+            if fx0 - x0 >= pad_x / 2 and fy0 - y0 >= pad_y / 2 and x1 - fx1 >= pad_x / 2 and y1 - fy1 >= pad_y / 2:
+                return
+        self.box = (max(0, int(fx0 - pad_x)), max(0, int(fy0 - pad_y)),
+                    min(width, int(fx1 + pad_x) + 1), min(height, int(fy1 + pad_y) + 1))
+
+
+def _downscale(image, limit):
+    h, w = image.shape[:2]
+    scale = limit / max(h, w)
+    if scale >= 1.0:
+        return image
+    return cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+class GazeTracker:
+    """Turns BGR frames into smoothed ``GazeResult``s (normalized to the full
+    frame). ``point_ids`` are extra landmarks to return in ``points``;
+    ``keep_landmarks`` also returns every landmark, e.g. for a debug view."""
+
+    def __init__(self, face_mesh, point_ids=(), infer_size=256, detect_size=640, margin=0.35,
+                 gain=(2.0, 1.5), smoother=None, lost_reset=0.5, keep_landmarks=False):
+        self.face_mesh = face_mesh
+        self.point_ids = tuple(point_ids)
+        self.infer_size = infer_size
+        self.detect_size = detect_size
+        self.gain = np.asarray(gain, dtype=np.float64)
+        self.roi = FaceRoi(margin)
+        self.smoother = smoother if smoother is not None else OneEuroFilter()
+        self.lost_reset = lost_reset
+        self.keep_landmarks = keep_landmarks
+        self._ids = _GEOMETRY_IDS + self.point_ids
+        # Without refine_landmarks the iris ids do not exist; read landmark 0
+        # in their place and overwrite it below.
+        self._ids_no_iris = tuple(0 if i >= _IRIS_COUNT - 10 else i for i in self._ids)
+        self._last_seen = None
+
+    def process(self, frame, t=None):
+        t = time.perf_counter() if t is None else t
+        height, width = frame.shape[:2]
+        box = self.roi.box or (0, 0, width, height)
+        x0, y0, x1, y1 = box
+        crop = frame[y0:y1, x0:x1]
+        crop = _downscale(crop, self.infer_size if self.roi.box else self.detect_size)
+        result = self.face_mesh.process(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
+        if not result.multi_face_landmarks:
+            self.roi.reset()
+            if self._last_seen is not None and t - self._last_seen > self.lost_reset:
+                self.smoother.reset()
+            return None
+        self._last_seen = t
+        landmarks = result.multi_face_landmarks[0].landmark
+        has_iris = len(landmarks) >= _IRIS_COUNT
+
+        # Crop-normalized -> full-frame pixels in one affine step.
+        origin = np.array([x0, y0], dtype=np.float32)
+        extent = np.array([x1 - x0, y1 - y0], dtype=np.float32)
+        frame_size = np.array([width, height], dtype=np.float32)
+        pts = landmark_array(landmarks, self._ids if has_iris else self._ids_no_iris) * extent + origin
+
+        n_eye, n_geo = len(EYE_IDS), len(_GEOMETRY_IDS)
+        eyes = pts[:n_eye].copy()
+        if not has_iris:
+            # No iris points: put the "iris" at the eye centre (zero offset).
+            eyes[8:10] = (eyes[0:2] + eyes[2:4]) / 2.0
+        self.roi.update(pts[n_eye:n_geo], width, height)
+        x, y = self.smoother(gaze_point(eyes, frame_size, self.gain), t)
+
+        full = None
+        if self.keep_landmarks:
+            full = np.array([(l.x, l.y) for l in landmarks], dtype=np.float32) * extent + origin
+            full /= frame_size
+        return GazeResult(float(x), float(y), pts[n_geo:] / frame_size, full, box)
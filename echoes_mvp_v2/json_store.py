@@ -0,0 +1,120 @@
+"""Process-wide in-memory JSON documents with write-behind persistence.
+
+Reads return the current snapshot without touching the disk. Mutations copy
+the snapshot, apply the change and swap the reference, so readers never see
+a half-applied update. A background thread persists the latest snapshot
+after a short debounce using a temp file plus ``os.replace``.
+"""
+import os
+import copy
+import json
+import time
+import atexit
+import threading
+
+
+class JsonStore:
+    def __init__(self, path, debounce=0.5, check_interval=1.0, on_reload=None):
+        self.path = path
+        self.on_reload = on_reload
+        self.debounce = debounce
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        # Serializes flushes (writer thread and atexit); never held with _lock
+        # while waiting on the disk.
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._writing = False
+        self._mtime = None
+        self._checked_at = 0.0
+        self._data = self._read()
+        self._wake = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+
+    def _read(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self._mtime = os.stat(self.path).st_mtime_ns
+        self._checked_at = time.monotonic()
+        return data
+
+    def get(self):
+        """Return the current snapshot. Callers must not mutate it."""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._reload_if_changed(now)
+        return self._data
+
+    def _reload_if_changed(self, now):
+        with self._lock:
+            self._checked_at = now
+            # A pending or in-progress write-behind snapshot wins over the file on disk.
+            if self._dirty or self._writing:
+                return
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return
+            if mtime != self._mtime:
+                try:
+                    self._data = self._read()
+                except (OSError, ValueError):
+                    return
+                if self.on_reload:
+                    self.on_reload(self._data)
+
+    def update(self, mutate):
+        """Apply ``mutate`` to a copy of the data and schedule a write.
+
+        ``mutate`` may return False to signal that nothing changed; in that
+        case the snapshot is kept and None is returned. Otherwise the new
+        snapshot is returned.
+        """
+        with self._lock:
+            data = copy.deepcopy(self._data)
+            if mutate(data) is False:
+                return None
+            self._data = data
+            self._dirty = True
+        self._wake.set()
+        return data
+
+    def flush(self):
+        """Write the latest snapshot. The file is written outside ``_lock``,
+        so reads and updates never wait on the disk."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = self._data
+                self._dirty = False
+                self._writing = True
+            try:
+                tmp = self.path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+                mtime = os.stat(self.path).st_mtime_ns
+            except BaseException:
+                with self._lock:
+                    self._dirty = True
+                    self._writing = False
+                raise
+            with self._lock:
+                self._mtime = mtime
+                self._writing = False
+
+    def _write_loop(self):
+        while True:
+            self._wake.wait()
+            # Coalesce bursts of mutations into one snapshot.
+            time.sleep(self.debounce)
+            self._wake.clear()
+            try:
+                self.flush()
+            except OSError:
+                pass
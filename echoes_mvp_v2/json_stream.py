@@ -0,0 +1,65 @@
+"""Incremental parser for a JSON array arriving in arbitrary text chunks.
+
+Model output is streamed token by token and may carry prose before the
+array. ``ArrayStreamParser.feed`` returns every element completed by the
+new chunk, so callers can forward suggestions before generation finishes.
+"""
+import json
+
+
+class ArrayStreamParser:
+    def __init__(self):
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._buf = []
+
+    @property
+    def done(self):
+        return self._done
+
+    def _emit(self, out):
+        text = "".join(self._buf).strip()
+        self._buf = []
+        if text:
+            try:
+                out.append(json.loads(text))
+            except ValueError:
+                pass
+
+    def feed(self, chunk):
+        out = []
+        for ch in chunk:
+            if self._done:
+                break
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                continue
+            if self._in_string:
+                self._buf.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 0:
+                        # Top-level string element: emit without waiting for ','.
+                        self._emit(out)
+                continue
+            if self._depth == 0 and ch in ",]":
+                self._emit(out)
+                if ch == "]":
+                    self._done = True
+                continue
+            self._buf.append(ch)
+            if ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                self._depth += 1
+            elif ch in "]}":
+                self._depth -= 1
+        return out
@@ -0,0 +1,198 @@
+"""Shared Ollama HTTP client.
+
+One pooled keep-alive ``requests.Session`` per process, a bound on the
+number of in-flight generations, and a circuit breaker that fails fast
+after repeated errors so callers drop to their local fallback immediately
+instead of each waiting out a timeout. Per-call latency is recorded.
+"""
+import json
+import time
+import threading
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class OllamaError(RuntimeError):
+    pass
+
+
+class CircuitOpenError(OllamaError):
+    """Raised without calling Ollama while the breaker is open."""
+
+
+class OllamaBusyError(OllamaError):
+    """Raised when the in-flight limit is reached and no slot frees up in time."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial:
+                return False
+            # Half-open: let exactly one trial call through.
+            self._trial = True
+            return True
+
+    def cancel_trial(self):
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class OllamaClient:
+    def __init__(self, host="http://localhost:11434", timeout=(2.0, 20.0), max_in_flight=4,
+                 acquire_timeout=0.5, failure_threshold=3, reset_timeout=30.0, pool_size=8):
+        self.host = host.rstrip("/")
+        self.timeout = timeout
+        self.acquire_timeout = acquire_timeout
+        self.max_in_flight = max_in_flight
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latencies = deque(maxlen=256)
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+        self.short_circuited = 0
+
+    def _acquire(self):
+        if not self.breaker.allow():
+            with self._lock:
+                self.short_circuited += 1
+            raise CircuitOpenError("Ollama circuit open")
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                self.rejected += 1
+            # Not an Ollama failure, but a half-open trial must be handed back.
+            self.breaker.cancel_trial()
+            raise OllamaBusyError("too many Ollama calls in flight")
+        with self._lock:
+            self._in_flight += 1
+        return time.perf_counter()
+
+    def _release(self, started, ok):
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        with self._lock:
+            self._in_flight -= 1
+            self.calls += 1
+            self._latencies.append(elapsed_ms)
+            if not ok:
+                self.errors += 1
+        self._slots.release()
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def _post(self, path, payload):
+        started = self._acquire()
+        ok = False
+        try:
+            resp = self.session.post(self.host + path, json=payload, timeout=self.timeout)
+            resp.raise_for_status()
+            data = resp.json()
+            ok = True
+            return data
+        finally:
+            self._release(started, ok)
+
+    def chat(self, messages, model="llama3.2", temperature=0.2, **options):
+        data = self._post("/api/chat", {
+            "model": model,
+            "messages": messages,
+            "stream": False,
+            "options": dict(options, temperature=temperature),
+        })
+        return (data.get("message", {}).get("content", "") or "").strip()
+
+    def generate(self, prompt, model="llama3.2", options=None, **extra):
+        data = self._post("/api/generate", dict(extra, model=model, prompt=prompt, stream=False,
+                                                options=options or {}))
+        return data.get("response", "") or ""
+
+    def chat_stream(self, messages, model="llama3.2", temperature=0.2, **options):
+        """Yield content chunks as Ollama produces them. The in-flight slot is
+        held until the stream ends or the generator is closed."""
+        started = self._acquire()
+        ok = False
+        try:
+            with self.session.post(self.host + "/api/chat", json={
+                "model": model,
+                "messages": messages,
+                "stream": True,
+                "options": dict(options, temperature=temperature),
+            }, stream=True, timeout=self.timeout) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    content = data.get("message", {}).get("content", "")
+                    if content:
+                        yield content
+                    if data.get("done"):
+                        break
+            ok = True
+        except GeneratorExit:
+            # Abandoned by the consumer; not Ollama's fault.
+            ok = True
+            raise
+        finally:
+            self._release(started, ok)
+
+    def stats(self):
+        with self._lock:
+            lat = sorted(self._latencies)
+            out = {
+                "calls": self.calls,
+                "errors": self.errors,
+                "rejected": self.rejected,
+                "short_circuited": self.short_circuited,
+                "in_flight": self._in_flight,
+            }
+        out["circuit"] = self.breaker.state
+        if lat:
+            out["latency_ms"] = {
+                "p50": round(lat[len(lat) // 2], 1),
+                "p95": round(lat[min(len(lat) - 1, int(len(lat) * 0.95))], 1),
+                "max": round(lat[-1], 1),
+            }
+        return out
@@ -0,0 +1,113 @@
+"""Case-folded prefix trie over board phrases for the suggestion fallback.
+
+Every node keeps a precomputed top-k list of ``(phrase, weight)`` for its
+whole subtree, so a prefix query costs O(len(prefix)) instead of a scan over
+the vocabulary. A phrase's weight is the number of categories it appears in,
+matching the ranking the linear scan used to produce.
+"""
+import threading
+
+
+def _rank(item):
+    return (-item[1], item[0])
+
+
+class _Node:
+    __slots__ = ("children", "terms", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.terms = {}
+        self.top = []
+
+
+class PrefixIndex:
+    def __init__(self, top_k=16):
+        self.top_k = top_k
+        self._lock = threading.Lock()
+        self._root = _Node()
+        self._weights = {}
+
+    @classmethod
+    def from_categories(cls, categories, top_k=16):
+        index = cls(top_k=top_k)
+        index.rebuild(categories)
+        return index
+
+    def rebuild(self, categories):
+        """Replace the whole index, e.g. after an external edit of the file."""
+        weights = {}
+        for phrases in (categories or {}).values():
+            for p in phrases:
+                weights[p] = weights.get(p, 0) + 1
+        root = _Node()
+        for phrase, w in weights.items():
+            node = root
+            for ch in phrase.casefold():
+                node = node.children.setdefault(ch, _Node())
+            node.terms[phrase] = w
+        self._fill_tops(root)
+        with self._lock:
+            self._root, self._weights = root, weights
+
+    def _fill_tops(self, node):
+        for child in node.children.values():
+            self._fill_tops(child)
+        self._recompute(node)
+
+    def _recompute(self, node):
+        items = list(node.terms.items())
+        for child in node.children.values():
+            items.extend(child.top)
+        items.sort(key=_rank)
+        # Assign a new list so lock-free readers see either old or new.
+        node.top = items[:self.top_k]
+
+    def weight(self, phrase):
+        return self._weights.get(phrase, 0)
+
+    def add(self, phrase, weight=1):
+        self._adjust(phrase, weight)
+
+    def remove(self, phrase, weight=1):
+        self._adjust(phrase, -weight)
+
+    def _adjust(self, phrase, delta):
+        with self._lock:
+            path = [self._root]
+            node = self._root
+            for ch in phrase.casefold():
+                node = node.children.setdefault(ch, _Node())
+                path.append(node)
+            w = self._weights.get(phrase, 0) + delta
+            if w > 0:
+                self._weights[phrase] = w
+                node.terms[phrase] = w
+            else:
+                self._weights.pop(phrase, None)
+                node.terms.pop(phrase, None)
+            key = phrase.casefold()
+            for depth in range(len(path) - 1, -1, -1):
+                n = path[depth]
+                if depth and not n.terms and not n.children:
+                    del path[depth - 1].children[key[depth - 1]]
+                    continue
+                self._recompute(n)
+
+    def query(self, prefix, k):
+        """Return up to ``k`` ``(phrase, weight)`` pairs starting with ``prefix``."""
+        node = self._root
+        for ch in prefix.casefold():
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        if k <= self.top_k:
+            return node.top[:k]
+        # Deeper than the cached lists: walk the subtree (rare).
+        items, stack = [], [node]
+        while stack:
+            n = stack.pop()
+            items.extend(n.terms.items())
+            stack.extend(n.children.values())
+        items.sort(key=_rank)
+        return items[:k]
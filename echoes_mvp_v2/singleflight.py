@@ -0,0 +1,125 @@
+"""Request coalescing for per-keystroke suggestion calls.
+
+``SingleFlight`` runs one producer per key in a worker thread and
+broadcasts each item it publishes to every caller that asked for the same
+key while it was running. ``SessionTokens`` tracks the newest request
+sequence number per browser session; once every caller of a flight has
+been superseded, the producer sees ``wanted()`` turn False and can drop
+the LLM call it is streaming.
+"""
+import threading
+from collections import OrderedDict
+
+
+class Superseded(Exception):
+    """The caller's session has sent a newer request."""
+
+
+class _Flight:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._items = []
+        self._done = False
+        self._subscribers = []
+        self.error = None
+
+    def wanted(self):
+        with self._cond:
+            return any(is_current() for is_current in self._subscribers)
+
+    def publish(self, item):
+        with self._cond:
+            self._items.append(item)
+            self._cond.notify_all()
+
+    def finish(self):
+        with self._cond:
+            self._done = True
+            self._cond.notify_all()
+
+    def subscribe(self, is_current, poll):
+        # Registered eagerly so the producer never sees an empty audience
+        # between flight creation and the caller's first read.
+        with self._cond:
+            self._subscribers.append(is_current)
+        return self._iter(is_current, poll)
+
+    def _iter(self, is_current, poll):
+        seen = 0
+        try:
+            while True:
+                with self._cond:
+                    while seen >= len(self._items) and not self._done:
+                        self._cond.wait(poll)
+                        if not is_current():
+                            raise Superseded()
+                    new = self._items[seen:]
+                    seen = len(self._items)
+                    finished = self._done
+                yield from new
+                if finished:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                if not is_current():
+                    raise Superseded()
+        finally:
+            with self._cond:
+                self._subscribers.remove(is_current)
+
+
+class SingleFlight:
+    def __init__(self, poll=0.05):
+        self.poll = poll
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.started = 0
+        self.joined = 0
+
+    def stream(self, key, producer, is_current=lambda: True):
+        """Iterate the items of the flight for ``key``, starting
+        ``producer(publish, wanted)`` if none is running."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self.started += 1
+                it = flight.subscribe(is_current, self.poll)
+                threading.Thread(target=self._run, args=(key, flight, producer), daemon=True).start()
+                return it
+            self.joined += 1
+            return flight.subscribe(is_current, self.poll)
+
+    def _run(self, key, flight, producer):
+        try:
+            producer(flight.publish, flight.wanted)
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.finish()
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._flights), "started": self.started, "joined": self.joined}
+
+
+class SessionTokens:
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._latest = OrderedDict()
+
+    def claim(self, session, seq):
+        """Record request ``seq`` for ``session``; return a callable that stays
+        True until the session sends a newer request."""
+        if not session:
+            return lambda: True
+        with self._lock:
+            if seq > self._latest.get(session, -1):
+                self._latest[session] = seq
+            self._latest.move_to_end(session)
+            while len(self._latest) > self.maxsize:
+                self._latest.popitem(last=False)
+        return lambda: self._latest.get(session, seq) <= seq
@@ -4,11 +4,31 @@ const languageSel = () => document.getElementById("language");
 const warningBox = () => document.getElementById("warningBox");
 
 function showWarning(text) {
+  warningBox().dataset.teachingKey = "";
   if (!text) { warningBox().style.display = "none"; warningBox().textContent = ""; return; }
   warningBox().style.display = "block";
   warningBox().textContent = text;
 }
 
+// A flagged phrase gets a templated warning at once; when the server is still
+// writing a fuller explanation, poll for it and swap it in while it is shown.
+// An empty answer means the model cleared the words, so the phrase is spoken.
+let teachingPoll = null;
+
+function pollTeaching(key, phrase, tries = 20) {
+  clearTimeout(teachingPoll);
+  teachingPoll = setTimeout(async () => {
+    try {
+      const res = await fetch("/api/teaching?key=" + encodeURIComponent(key));
+      const data = await res.json();
+      if (warningBox().dataset.teachingKey !== key) return;
+      if (data.ok && !data.pending && !data.warning) { speak(phrase); return; }
+      if (data.ok && data.warning) warningBox().textContent = "⚠️ " + data.warning;
+      if (data.ok && data.pending && tries > 1) pollTeaching(key, phrase, tries - 1);
+    } catch (e) {}
+  }, 1000);
+}
+
 async function speak(text) {
   if (!text) return;
   try {
@@ -20,6 +40,8 @@ async function speak(text) {
     const data = await res.json();
     if (!data.ok && data.warning) {
       showWarning("⚠️ " + data.warning);
+      warningBox().dataset.teachingKey = data.teaching_key || "";
+      if (data.pending && data.teaching_key) pollTeaching(data.teaching_key, text);
       return;
     }
   } catch (e) {}
@@ -33,30 +55,84 @@ async function speak(text) {
   }
 }
 
+function addSuggestionChip(s) {
+  const chip = document.createElement("button");
+  chip.className = "chip";
+  chip.textContent = s;
+  chip.onclick = () => {
+    const typed = inputEl().value.trim();
+    // Offline suggestions repeat what was typed; model suggestions continue it.
+    inputEl().value = s.toLowerCase().startsWith(typed.toLowerCase()) ? s : (typed + " " + s).trim();
+    requestSuggestions();
+  };
+  suggestionsEl().appendChild(chip);
+}
+
 function renderSuggestions(list) {
-  const el = suggestionsEl();
-  el.innerHTML = "";
-  (list || []).forEach(s => {
-    const chip = document.createElement("button");
-    chip.className = "chip";
-    chip.textContent = s;
-    chip.onclick = () => {
-      inputEl().value = (inputEl().value + " " + s).trim();
-      requestSuggestions();
-    };
-    el.appendChild(chip);
-  });
+  suggestionsEl().innerHTML = "";
+  (list || []).forEach(addSuggestionChip);
 }
 
-async function requestSuggestions() {
-  const current = inputEl().value.trim();
+// Every suggestion request carries this page's session id and a rising
+// sequence number so the server can drop work a newer request made obsolete.
+const SESSION_ID = Math.random().toString(36).slice(2) + Date.now().toString(36);
+let suggestSeq = 0;
+let suggestTimer = null;
+let suggestAbort = null;
+let suggestSource = null;
+
+async function fetchSuggestions(current, seq) {
+  const ctrl = new AbortController();
+  suggestAbort = ctrl;
   try {
-    const res = await fetch("/api/suggest", {method:"POST", headers:{"Content-Type":"application/json"}, body: JSON.stringify({current, k: 6})});
+    const res = await fetch("/api/suggest", {
+      method:"POST",
+      headers:{"Content-Type":"application/json"},
+      body: JSON.stringify({current, k: 6, session: SESSION_ID, seq}),
+      signal: ctrl.signal
+    });
     const data = await res.json();
-    if (data.ok) renderSuggestions(data.suggestions);
+    if (data.ok && seq === suggestSeq) renderSuggestions(data.suggestions);
   } catch (e) {}
 }
 
+// Streams chips over server-sent events so the first one shows up as soon as
+// the model produces it.
+function streamSuggestions(current, seq) {
+  const params = new URLSearchParams({current, k: 6, session: SESSION_ID, seq});
+  const src = new EventSource("/api/suggest/stream?" + params);
+  suggestSource = src;
+  let first = true;
+  const finish = () => {
+    src.close();
+    if (suggestSource === src) suggestSource = null;
+  };
+  src.addEventListener("suggestion", ev => {
+    if (first) { suggestionsEl().innerHTML = ""; first = false; }
+    addSuggestionChip(JSON.parse(ev.data));
+  });
+  src.addEventListener("done", () => {
+    if (first) suggestionsEl().innerHTML = "";
+    finish();
+  });
+  src.onerror = finish;
+}
+
+function runSuggestions() {
+  if (suggestAbort) { suggestAbort.abort(); suggestAbort = null; }
+  if (suggestSource) { suggestSource.close(); suggestSource = null; }
+  const current = inputEl().value.trim();
+  const seq = ++suggestSeq;
+  if ("EventSource" in window) streamSuggestions(current, seq);
+  else fetchSuggestions(current, seq);
+}
+
+// Debounced so a burst of keystrokes sends one request.
+function requestSuggestions(delay = 150) {
+  clearTimeout(suggestTimer);
+  suggestTimer = setTimeout(runSuggestions, delay);
+}
+
 function attachBoardHandlers() {
   document.querySelectorAll(".cell").forEach(btn => {
     btn.addEventListener("click", () => {
@@ -109,7 +185,7 @@ function saveSettings() {
 window.addEventListener("DOMContentLoaded", () => {
   attachBoardHandlers();
   loadCustomList();
-  requestSuggestions();
+  requestSuggestions(0);
 
   document.getElementById("speakBtn").onclick = () => speak(inputEl().value.trim());
   document.getElementById("clearBtn").onclick = () => { inputEl().value = ""; showWarning(""); requestSuggestions(); };
@@ -0,0 +1,65 @@
+"""Bounded LRU + TTL cache for LLM suggestion results.
+
+Keys are built from the normalized prompt inputs (a hash of the history
+tail, the current text, k, model and temperature), so identical contexts
+skip the Ollama round trip. Only raw model output is cached; callers apply
+blocked-word filtering after lookup so blocklist changes apply immediately.
+"""
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def make_key(history, current, k, model, temperature):
+    digest = hashlib.sha1("\n".join(history).encode("utf-8")).hexdigest()
+    return (digest, " ".join((current or "").casefold().split()), int(k), model, float(temperature))
+
+
+class SuggestionCache:
+    def __init__(self, maxsize=256, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop every entry. Not needed when history changes: the key already
+        hashes the history tail, so a new phrase simply misses."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
@@ -0,0 +1,112 @@
+"""Cached, non-blocking explanations for flagged words.
+
+Explanations are keyed on the set of matched terms, normalized and sorted,
+so "Damn!" and "damn it" share one entry. ``reply`` answers at once: it
+returns the cached explanation or, on a miss, a templated message plus a
+key the client can poll while a background worker asks the LLM. Word sets
+the LLM answers "OK" for are cached as ``CLEARED``, an empty message. Live
+requests go ahead of prewarm jobs in the worker queue, and a key already
+queued or running is not queued twice.
+"""
+import queue
+import threading
+from collections import OrderedDict
+from itertools import count
+
+from word_matcher import normalize
+
+_LIVE, _PREWARM = 0, 1
+# Cached for word sets the model cleared; callers let those phrases through.
+CLEARED = ""
+
+TEMPLATE = ("“{words}” {verb} not okay to use. Words like that can hurt people. "
+            "You could say “I'm upset”, “I'm frustrated” or “Please stop” instead.")
+
+
+def make_key(terms):
+    return "|".join(sorted({normalize(t) for t in terms if t}))
+
+
+def template(key):
+    words = key.split("|")
+    return TEMPLATE.format(words=", ".join(words), verb="are" if len(words) > 1 else "is")
+
+
+class TeachingCache:
+    def __init__(self, explain, maxsize=512):
+        """``explain(words)`` returns the LLM text, or '' when unavailable."""
+        self.explain = explain
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._queued = set()
+        self._jobs = queue.PriorityQueue()
+        self._order = count()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def reply(self, terms):
+        """Return ``(key, message, pending)`` without waiting on the LLM;
+        ``message`` is ``CLEARED`` once the LLM has cleared these words."""
+        key = make_key(terms)
+        with self._lock:
+            message = self._entries.get(key)
+            if message is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return key, message, False
+            self.misses += 1
+        self._enqueue(key, _LIVE)
+        return key, template(key), True
+
+    def poll(self, key):
+        """``(message, pending)`` for a key handed out by ``reply``."""
+        with self._lock:
+            message = self._entries.get(key)
+            pending = key in self._queued
+        if message is not None:
+            return message, False
+        return template(key), pending
+
+    def prewarm(self, term_sets):
+        for terms in term_sets:
+            key = make_key(terms)
+            if key:
+                self._enqueue(key, _PREWARM)
+
+    def _enqueue(self, key, priority):
+        with self._lock:
+            if key in self._entries or key in self._queued:
+                return
+            self._queued.add(key)
+        self._jobs.put((priority, next(self._order), key))
+
+    def _worker(self):
+        while True:
+            _, _, key = self._jobs.get()
+            try:
+                text = (self.explain(key.split("|")) or "").strip()
+            except Exception:
+                text = ""
+            with self._lock:
+                self._queued.discard(key)
+                if not text:
+                    # Leave it uncached so a later request tries again.
+                    self.failures += 1
+                    continue
+                # "OK" means the model found nothing wrong with these words.
+                self._entries[key] = CLEARED if text.lower() == "ok" else text
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "queued": len(self._queued),
+                "hits": self.hits,
+                "misses": self.misses,
+                "failures": self.failures,
+            }
@@ -0,0 +1,9 @@
+import os
+import shutil
+import tempfile
+
+# Importing app migrates and writes its data files; give it a scratch copy.
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DATA_DIR = tempfile.mkdtemp(prefix="echoes-test-data-")
+shutil.copytree(os.path.join(_APP_DIR, "data"), _DATA_DIR, dirs_exist_ok=True)
+os.environ.setdefault("ECHOES_DATA_DIR", _DATA_DIR)
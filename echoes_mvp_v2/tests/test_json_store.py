@@ -0,0 +1,63 @@
+import json
+import threading
+import time
+
+import pytest
+
+import json_store
+from json_store import JsonStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps({"n": 0}))
+    return JsonStore(str(path), debounce=60.0)
+
+
+def _bump(data):
+    data["n"] += 1
+
+
+def test_reads_and_updates_do_not_wait_for_a_slow_flush(store, monkeypatch):
+    entered, release = threading.Event(), threading.Event()
+    fsync = json_store.os.fsync
+
+    def slow_fsync(fd):
+        entered.set()
+        release.wait(5)
+        fsync(fd)
+
+    monkeypatch.setattr(json_store.os, "fsync", slow_fsync)
+    store.update(_bump)
+    writer = threading.Thread(target=store.flush)
+    writer.start()
+    assert entered.wait(5)
+    t0 = time.perf_counter()
+    assert store.get() == {"n": 1}
+    store.update(_bump)
+    assert time.perf_counter() - t0 < 0.5
+    release.set()
+    writer.join(5)
+    with open(store.path) as f:
+        assert json.load(f) == {"n": 1}
+    # The update made during the write is still pending.
+    store.flush()
+    with open(store.path) as f:
+        assert json.load(f) == {"n": 2}
+
+
+def test_failed_write_is_retried(store, monkeypatch):
+    store.update(_bump)
+
+    def broken(src, dst):
+        raise OSError("disk full")
+
+    replace = json_store.os.replace
+    monkeypatch.setattr(json_store.os, "replace", broken)
+    with pytest.raises(OSError):
+        store.flush()
+    monkeypatch.setattr(json_store.os, "replace", replace)
+    store.flush()
+    with open(store.path) as f:
+        assert json.load(f) == {"n": 1}
@@ -0,0 +1,51 @@
+import struct
+import threading
+
+import ngram_model
+from ngram_model import NGramModel
+
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / "ngram.bin")
+    m = NGramModel(path)
+    for p in ["I want water", "I want to play", "I need help", "I want water"]:
+        m.learn(p)
+    m.learn_transition("I need more")
+    m.save()
+    loaded = NGramModel(path)
+    assert loaded.next_words("I want", 3) == m.next_words("I want", 3) == ["water", "to", "i"]
+    assert loaded.next_words("I need", 3) == m.next_words("I need", 3)
+    assert loaded.next_phrases("I need help", 2) == m.next_phrases("I need help", 2)
+    assert loaded._words == m._words and loaded._phrases == m._phrases
+    assert loaded._last_phrase == m._last_phrase
+
+
+def test_tables_are_little_endian():
+    buf = []
+    NGramModel._pack_table(buf, {(1, 2): {3: 258}}, 2)
+    assert b"".join(buf) == struct.pack("<I", 1) + struct.pack("<3I", 1, 2, 1) + struct.pack("<2I", 3, 258)
+    table, off = NGramModel._unpack_table(memoryview(b"".join(buf)), 0, 2)
+    assert table == {(1, 2): {3: 258}} and off == 24
+
+
+def test_save_writes_outside_the_model_lock(tmp_path, monkeypatch):
+    m = NGramModel(str(tmp_path / "ngram.bin"))
+    m.learn("I want water")
+    in_fsync, release = threading.Event(), threading.Event()
+
+    def slow_fsync(fd):
+        in_fsync.set()
+        release.wait(5)
+
+    monkeypatch.setattr(ngram_model.os, "fsync", slow_fsync)
+    saver = threading.Thread(target=m.save)
+    saver.start()
+    assert in_fsync.wait(5)
+    done = threading.Event()
+    threading.Thread(target=lambda: (m.learn("I want juice"), m.next_words("I want"), done.set())).start()
+    try:
+        assert done.wait(2), "learn/next_words blocked while the file was being written"
+    finally:
+        release.set()
+        saver.join()
+    assert m._dirty  # the second phrase still needs saving
@@ -0,0 +1,57 @@
+"""Async mode must keep serving other routes while a debug stream is open."""
+import os
+import sys
+import time
+import shutil
+import socket
+import subprocess
+
+import pytest
+import requests
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytest.importorskip("eventlet")
+pytest.importorskip("mediapipe")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def server(tmp_path):
+    workdir = tmp_path / "app"
+    shutil.copytree(APP_DIR, workdir, ignore=shutil.ignore_patterns("__pycache__", "tests"))
+    port = _free_port()
+    env = dict(os.environ, ECHOES_SERVE="async", ECHOES_CAPTURE="synthetic:320x240@15",
+               ECHOES_TRACKER_DEBUG="mjpeg", ECHOES_TRACKER_DEBUG_FPS="0.2", PORT=str(port))
+    proc = subprocess.Popen([sys.executable, "app.py"], cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = "http://127.0.0.1:%d" % port
+    try:
+        for _ in range(150):
+            try:
+                requests.get(url + "/api/metrics", timeout=1)
+                break
+            except requests.RequestException:
+                time.sleep(0.2)
+        else:
+            pytest.fail("server did not start")
+        yield url
+    finally:
+        proc.kill()
+        proc.wait(10)
+
+
+def test_routes_answer_while_mjpeg_stream_is_open(server):
+    with requests.get(server + "/api/tracker/debug.mjpg", stream=True, timeout=5) as stream:
+        assert stream.status_code == 200
+        next(stream.iter_content(1024))  # first frame; the next is ~5 s away
+        for _ in range(5):
+            t0 = time.perf_counter()
+            assert requests.get(server + "/api/metrics", timeout=3).status_code == 200
+            assert time.perf_counter() - t0 < 1.0
+            time.sleep(0.2)
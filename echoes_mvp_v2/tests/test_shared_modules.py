@@ -0,0 +1,13 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "..", "check_shared_modules.py")
+
+
+@pytest.mark.skipif(not os.path.exists(SCRIPT), reason="not inside the full repository")
+def test_shared_module_copies_are_identical():
+    proc = subprocess.run([sys.executable, SCRIPT], capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stdout
@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from singleflight import SessionTokens, SingleFlight, Superseded
+
+
+def test_concurrent_callers_share_one_producer():
+    flights = SingleFlight(poll=0.01)
+    release = threading.Event()
+    calls = []
+
+    def producer(publish, wanted):
+        calls.append(1)
+        release.wait(5)
+        publish("a")
+        publish("b")
+
+    first = flights.stream("k", producer)
+    second = flights.stream("k", producer)
+    release.set()
+    assert list(first) == ["a", "b"]
+    assert list(second) == ["a", "b"]
+    assert calls == [1]
+    assert flights.stats() == {"in_flight": 0, "started": 1, "joined": 1}
+
+
+def test_producer_error_reaches_every_caller():
+    flights = SingleFlight(poll=0.01)
+
+    def producer(publish, wanted):
+        publish("a")
+        raise RuntimeError("ollama down")
+
+    with pytest.raises(RuntimeError):
+        list(flights.stream("k", producer))
+
+
+def test_session_tokens_supersede_older_requests():
+    tokens = SessionTokens()
+    first = tokens.claim("s", 1)
+    assert first()
+    second = tokens.claim("s", 2)
+    assert not first() and second()
+    stale = tokens.claim("s", 1)  # arrived late
+    assert not stale() and second()
+    assert tokens.claim("", 0)()
+
+
+def test_superseded_caller_stops_and_producer_sees_it():
+    flights = SingleFlight(poll=0.01)
+    tokens = SessionTokens()
+    started, dropped = threading.Event(), threading.Event()
+
+    def producer(publish, wanted):
+        started.set()
+        for _ in range(500):
+            if not wanted():
+                dropped.set()
+                return
+            threading.Event().wait(0.01)
+
+    it = flights.stream("k", producer, tokens.claim("s", 1))
+    started.wait(5)
+    tokens.claim("s", 2)
+    with pytest.raises(Superseded):
+        next(it)
+    assert dropped.wait(5)
@@ -0,0 +1,39 @@
+import suggest_cache
+from suggest_cache import SuggestionCache, make_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(suggest_cache.time, "monotonic", clock)
+    cache = SuggestionCache(ttl=10.0)
+    cache.put("k", ["a"])
+    clock.now += 9.9
+    assert cache.get("k") == ["a"]
+    clock.now += 0.2
+    assert cache.get("k") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SuggestionCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_key_changes_with_history_tail():
+    before = make_key(["hello"], "I want", 3, "m", 0.6)
+    assert make_key(["hello"], "  i WANT ", 3, "m", 0.6) == before
+    assert make_key(["hello", "I want water"], "I want", 3, "m", 0.6) != before
@@ -0,0 +1,48 @@
+import pytest
+
+from ngram_model import NGramModel
+from phrase_index import PrefixIndex
+
+
+def _model(*phrases):
+    m = NGramModel()
+    for p in phrases:
+        m.learn(p)
+    return m
+
+
+def test_prefix_index_ranks_by_weight_then_text():
+    index = PrefixIndex.from_categories({"A": ["I need help", "Ice cream"], "B": ["I need help", "Hello"]})
+    assert index.query("i", 5) == [("I need help", 2), ("Ice cream", 1)]
+    assert index.query("ICE", 5) == [("Ice cream", 1)]
+    assert index.query("x", 5) == []
+    index.remove("I need help", 2)
+    index.add("Ice cold", 3)
+    assert index.query("i", 5) == [("Ice cold", 3), ("Ice cream", 1)]
+
+
+def test_complete_finishes_the_typed_word_and_continues_it():
+    m = _model("I want water", "I want to play", "I want water", "Ice cream please")
+    assert m.complete("I w") == ["I want"]
+    assert m.complete("I want")[:2] == ["I want water", "I want to"]
+    assert m.complete("ice") == ["ice cream"]
+
+
+def test_complete_never_falls_back_to_global_words():
+    m = _model("I want water", "I want water")
+    assert m.complete("zebra") == []
+    assert m.complete("") == []
+    # next_words still backs off to unigrams unless told not to.
+    assert m.next_words("zebra", 2) == ["i", "want"]
+    assert m.next_words("zebra", 2, min_context=1) == []
+
+
+def test_fallback_puts_phrase_matches_before_learned_words(monkeypatch):
+    app = pytest.importorskip("app")
+    monkeypatch.setattr(app, "ngram", _model(*["I want help", "I want water", "I need help"] * 3))
+    monkeypatch.setattr(app, "phrase_index", PrefixIndex.from_categories({"Food": ["Ice cream please"]}))
+    history = [{"phrase": "I want help"}]
+    assert app._fallback_suggestions(history, "ice", 5) == ["Ice cream please"]
+    assert app._fallback_suggestions(history, "I want", 3) == ["I want help", "I want water"]
+    # Nothing typed: the phrase usually spoken after the last one comes first.
+    assert app._fallback_suggestions(history, "", 5)[0] == "I want water"
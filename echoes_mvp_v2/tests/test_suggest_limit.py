@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+import serving
+
+app_module = pytest.importorskip("app")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = []
+
+    def fake_stream(messages, **kwargs):
+        calls.append(messages)
+        yield '["more please"]'
+
+    monkeypatch.setattr(app_module, "ollama_chat_stream", fake_stream)
+    monkeypatch.setattr(app_module, "llm_limit", serving.RouteLimit("llm", 1, queue=0))
+    monkeypatch.setattr(app_module.ollama.breaker, "_opened_at", None)
+    app_module.suggest_cache.invalidate()
+    c = app_module.app.test_client()
+    c.calls = calls
+    return c
+
+
+def _fallback(current):
+    return app_module._fallback_suggestions(app_module.history_log.tail(10), current, 5)
+
+
+def test_full_queue_answers_from_fallback_not_503(client):
+    assert app_module.llm_limit.acquire()  # every slot busy, no queue
+    try:
+        r = client.post("/api/suggest", json={"current": "I", "k": 5})
+        assert r.status_code == 200
+        assert r.get_json()["suggestions"] == _fallback("I")
+        body = client.get("/api/suggest/stream?current=I&k=5").get_data(as_text=True)
+        assert '"source": "fallback"' in body
+    finally:
+        app_module.llm_limit.release()
+    assert client.calls == []
+    assert app_module.llm_limit.stats()["rejected"] == 2
+
+
+def test_open_circuit_skips_the_limit(client, monkeypatch):
+    monkeypatch.setattr(app_module.ollama.breaker, "_opened_at", time.monotonic())
+    r = client.post("/api/suggest", json={"current": "I", "k": 5})
+    assert r.get_json()["suggestions"] == _fallback("I")
+    assert client.calls == []
+    assert app_module.llm_limit.stats()["served"] == app_module.llm_limit.stats()["rejected"] == 0
+
+
+def test_slot_is_held_only_for_the_model_call(client):
+    r = client.post("/api/suggest", json={"current": "zz", "k": 5})
+    assert r.get_json()["suggestions"] == ["more please"]
+    assert len(client.calls) == 1
+    # Cached now: a busy limit no longer matters.
+    assert app_module.llm_limit.acquire()
+    try:
+        r = client.post("/api/suggest", json={"current": "zz", "k": 5})
+        assert r.get_json()["suggestions"] == ["more please"]
+    finally:
+        app_module.llm_limit.release()
+    stats = app_module.llm_limit.stats()
+    assert (stats["active"], stats["served"], len(client.calls)) == (0, 2, 1)
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from teaching import CLEARED, TeachingCache, template
+
+app_module = pytest.importorskip("app")
+
+
+def test_import_does_not_prewarm_on_the_suggestion_client():
+    # Prewarm is started from __main__, and teaching has its own breaker.
+    assert app_module.teaching.stats()["queued"] == 0
+    assert app_module.teaching_ollama is not app_module.ollama
+    assert app_module.teaching_ollama.breaker is not app_module.ollama.breaker
+    assert app_module.teaching_ollama.max_in_flight == 1
+
+
+def _settled(cache, key, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while cache.poll(key)[1] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return cache.poll(key)
+
+
+def test_words_the_model_clears_are_let_through():
+    cache = TeachingCache(lambda words: "OK")
+    key, message, pending = cache.reply(["Damn"])
+    assert (message, pending) == (template("damn"), True)
+    assert _settled(cache, key) == (CLEARED, False)
+    assert cache.reply(["damn"]) == ("damn", CLEARED, False)
+
+
+def test_explanations_block_and_failures_keep_the_template():
+    cache = TeachingCache(lambda words: "Please do not say that.")
+    key, _, _ = cache.reply(["damn"])
+    assert _settled(cache, key) == ("Please do not say that.", False)
+    down = TeachingCache(lambda words: "")
+    key, _, _ = down.reply(["damn"])
+    assert _settled(down, key) == (template("damn"), False)
+    assert down.stats()["failures"] == 1
+
+
+def test_speak_blocks_until_the_model_clears_the_phrase(monkeypatch):
+    monkeypatch.setattr(app_module, "teaching", TeachingCache(lambda words: "OK"))
+    client = app_module.app.test_client()
+    first = client.post("/api/speak", json={"phrase": "damn it"}).get_json()
+    assert first["ok"] is False and first["pending"] is True
+    _settled(app_module.teaching, first["teaching_key"])
+    assert client.get("/api/teaching?key=" + first["teaching_key"]).get_json() == {
+        "ok": True, "warning": "", "pending": False}
+    assert client.post("/api/speak", json={"phrase": "damn it"}).get_json() == {"ok": True}
+
+    monkeypatch.setattr(app_module, "teaching", TeachingCache(lambda words: "Not okay."))
+    blocked = client.post("/api/speak", json={"phrase": "damn it"}).get_json()
+    _settled(app_module.teaching, blocked["teaching_key"])
+    again = client.post("/api/speak", json={"phrase": "damn it"}).get_json()
+    assert again["ok"] is False and again["warning"] == "Not okay."
@@ -0,0 +1,206 @@
+"""Staged capture -> inference -> publish pipeline for the eye trackers.
+
+Each stage runs in its own thread. Stages are connected by small queues
+that drop the oldest item when full, so a slow stage never makes the
+camera fall behind: inference always starts from the newest frame and
+stale frames are discarded instead of piling up. Per-stage timings and
+the end-to-end frame-to-gaze latency are kept over a rolling window.
+"""
+import time
+import threading
+from collections import deque
+
+
+class LatestQueue:
+    """Bounded queue that drops its oldest item instead of blocking ``put``
+    (or, with ``lossless``, blocks until there is room)."""
+
+    def __init__(self, maxsize=1, lossless=False):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.lossless = lossless
+        self.dropped = 0
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def put(self, item):
+        with self._cond:
+            if self.lossless:
+                while len(self._items) == self._items.maxlen and not self._closed:
+                    self._cond.wait()
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """Oldest queued item, or None on timeout or once closed and empty."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class StageStats:
+    """Rolling window of durations for one stage."""
+
+    def __init__(self, window=512):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self._stamps = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds, now=None):
+        with self._lock:
+            self._samples.append(seconds)
+            self._stamps.append(time.perf_counter() if now is None else now)
+            self.count += 1
+
+    def summary(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            stamps = list(self._stamps)
+            count = self.count
+        if not samples:
+            return {"count": count}
+
+        def pct(p):
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000.0, 2)
+
+        span = stamps[-1] - stamps[0]
+        return {
+            "count": count,
+            "fps": round((len(stamps) - 1) / span, 1) if span > 0 else 0.0,
+            "mean_ms": round(sum(samples) / len(samples) * 1000.0, 2),
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+        }
+
+
+class Packet:
+    __slots__ = ("seq", "captured", "frame", "result")
+
+    def __init__(self, seq, captured, frame):
+        self.seq = seq
+        self.captured = captured
+        self.frame = frame
+        self.result = None
+
+
+class TrackerPipeline:
+    """Run ``infer(frame)`` and ``publish(packet)`` on the newest frames of
+    ``source`` (anything with ``read()`` and ``release()``, e.g. a
+    ``cv2.VideoCapture``). ``publish`` may return False to stop the pipeline.
+    When the source runs out, frames already queued are still processed.
+    ``lossless`` makes capture wait for inference instead of dropping frames,
+    for replaying clips as fast as possible.
+    """
+
+    def __init__(self, source, infer, publish, queue_size=1, max_read_failures=30, on_exit=None,
+                 lossless=False):
+        self.source = source
+        self.infer = infer
+        self.publish = publish
+        self.max_read_failures = max_read_failures
+        self.on_exit = on_exit
+        self._frames = LatestQueue(queue_size, lossless)
+        self._results = LatestQueue(queue_size, lossless)
+        self._stop = threading.Event()
+        self._threads = []
+        self.stages = {name: StageStats() for name in ("capture", "infer", "publish", "latency")}
+
+    @property
+    def running(self):
+        return any(t.is_alive() for t in self._threads)
+
+    def start(self):
+        loops = (self._capture_loop, self._infer_loop, self._publish_loop)
+        self._threads = [threading.Thread(target=fn, daemon=True) for fn in loops]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._frames.close()
+        self._results.close()
+
+    def wait(self, timeout=None):
+        for t in self._threads:
+            t.join(timeout)
+
+    def stats(self):
+        out = {name: s.summary() for name, s in self.stages.items()}
+        out["dropped"] = {"frames": self._frames.dropped, "results": self._results.dropped}
+        out["running"] = self.running
+        return out
+
+    def _capture_loop(self):
+        seq = failures = 0
+        try:
+            while not self._stop.is_set():
+                t0 = time.perf_counter()
+                ok, frame = self.source.read()
+                t1 = time.perf_counter()
+                if not ok:
+                    failures += 1
+                    if failures >= self.max_read_failures:
+                        break
+                    time.sleep(0.01)
+                    continue
+                failures = 0
+                seq += 1
+                self.stages["capture"].add(t1 - t0, t1)
+                self._frames.put(Packet(seq, t1, frame))
+        finally:
+            self.source.release()
+            self._frames.close()
+
+    def _infer_loop(self):
+        try:
+            while not self._stop.is_set():
+                packet = self._frames.get(0.1)
+                if packet is None:
+                    if self._frames.closed:
+                        break
+                    continue
+                t0 = time.perf_counter()
+                packet.result = self.infer(packet.frame)
+                t1 = time.perf_counter()
+                self.stages["infer"].add(t1 - t0, t1)
+                self._results.put(packet)
+        finally:
+            self._results.close()
+
+    def _publish_loop(self):
+        try:
+            while not self._stop.is_set():
+                packet = self._results.get(0.1)
+                if packet is None:
+                    if self._results.closed:
+                        break
+                    continue
+                t0 = time.perf_counter()
+                keep_going = self.publish(packet)
+                t1 = time.perf_counter()
+                self.stages["publish"].add(t1 - t0, t1)
+                self.stages["latency"].add(t1 - packet.captured, t1)
+                if keep_going is False:
+                    break
+        finally:
+            self.stop()
+            if self.on_exit is not None:
+                self.on_exit()
@@ -0,0 +1,77 @@
+"""Incrementally maintained engagement counters for /api/metrics.
+
+Taps are counted in a ring of per-day buckets (UTC calendar days) alongside
+the set of active days inside the window, and the board size is kept as a
+running total, so reading the metrics is O(1) regardless of history size.
+"""
+import threading
+from datetime import date, datetime
+
+
+def _day(ts):
+    """Ordinal day of an ISO timestamp such as '2025-08-19T09:31:10Z'."""
+    return date.fromisoformat(ts[:10]).toordinal()
+
+
+class UsageCounters:
+    def __init__(self, days=7):
+        self.days = days
+        self._lock = threading.Lock()
+        self._counts = [0] * days
+        self._slot_day = [None] * days
+        self._active = set()
+        self.total_phrases = 0
+
+    def _bump(self, day, n=1):
+        slot = day % self.days
+        if self._slot_day[slot] != day:
+            # Slot still holds a day that fell out of the window.
+            if self._slot_day[slot] is not None and self._slot_day[slot] > day:
+                return
+            self._active.discard(self._slot_day[slot])
+            self._slot_day[slot] = day
+            self._counts[slot] = 0
+        self._counts[slot] += n
+        self._active.add(day)
+
+    def record_tap(self, ts):
+        with self._lock:
+            self._bump(_day(ts))
+
+    def adjust_phrases(self, delta):
+        with self._lock:
+            self.total_phrases += delta
+
+    def set_phrases(self, categories):
+        with self._lock:
+            self.total_phrases = sum(len(v) for v in (categories or {}).values())
+
+    def rebuild(self, history_newest_first, categories, today=None):
+        """Recount from the history log, stopping at the first entry older
+        than the window (the log is chronological)."""
+        today = today if today is not None else datetime.utcnow().date().toordinal()
+        oldest = today - self.days + 1
+        with self._lock:
+            self._counts = [0] * self.days
+            self._slot_day = [None] * self.days
+            self._active = set()
+            for h in history_newest_first:
+                day = _day(h["ts"])
+                if day < oldest:
+                    break
+                if day <= today:
+                    self._bump(day)
+        self.set_phrases(categories)
+
+    def snapshot(self, today=None):
+        today = today if today is not None else datetime.utcnow().date().toordinal()
+        oldest = today - self.days + 1
+        with self._lock:
+            slot = today % self.days
+            today_taps = self._counts[slot] if self._slot_day[slot] == today else 0
+            weekly = sum(1 for d in self._active if oldest <= d <= today)
+            return {
+                "weekly_active_days": weekly,
+                "today_taps": today_taps,
+                "total_phrases": self.total_phrases,
+            }
@@ -1,48 +1,77 @@
-from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO
+import os
+# Socket.IO already ran on eventlet whenever it was installed; keep that as
+# this app's default serving mode (ECHOES_SERVE=threaded opts out).
+os.environ.setdefault("ECHOES_SERVE", "async")
+
+from flask import Flask, Response, render_template, request, jsonify
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import cv2
 import mediapipe as mp
-import threading
 import json
-import requests
-import time
+
+from ollama_client import OllamaClient
+from tracker_pipeline import TrackerPipeline
+from capture_sources import open_source
+from debug_overlay import MjpegSink, make_overlay
+from gaze_tracker import GazeTracker
+from gaze_publisher import GazePublisher
+from word_matcher import WordMatcher
+import serving
 
 # Initialize Flask
 app = Flask(__name__)
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=serving.socketio_mode())
 
 # MediaPipe
 mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(min_detection_confidence=0.7, min_tracking_confidence=0.7)
+face_mesh = mp_face_mesh.FaceMesh(refine_landmarks=True, min_detection_confidence=0.7, min_tracking_confidence=0.7)
+# ROI-cropped inference, iris-based gaze and One-Euro smoothing
+gaze_tracker = GazeTracker(face_mesh)
 
-# Webcam Thread
+# Webcam pipeline: capture, inference and publishing run as separate stages
 gaze_coords = {"x": 0.5, "y": 0.5}  # normalized
 
-def eye_tracker():
+# Gaze goes only to sockets in this room (pages that are open and visible),
+# at a capped rate and only when it moves; ECHOES_GAZE_BINARY=1 sends a
+# float32 [x, y] pair instead of JSON.
+GAZE_ROOM = "gaze"
+GAZE_RATE = float(os.environ.get("ECHOES_GAZE_RATE", "30"))
+# publish_gaze runs on the tracker's OS threads; hub_handoff hands its emits
+# to a Socket.IO task so they are safe under eventlet.
+gaze_publisher = GazePublisher(
+    serving.hub_handoff(socketio, lambda event, data: socketio.emit(event, data, to=GAZE_ROOM),
+                        interval=1.0 / GAZE_RATE if GAZE_RATE > 0 else 0.01),
+    "gaze_update",
+    max_rate=GAZE_RATE,
+    deadband=float(os.environ.get("ECHOES_GAZE_DEADBAND", "0.004")),
+    binary=os.environ.get("ECHOES_GAZE_BINARY", "0") == "1",
+    encode=lambda v: {"x": float(v[0]), "y": float(v[1])},
+)
+
+def draw_gaze(frame, gaze):
+    if gaze is not None:
+        h, w = frame.shape[:2]
+        x0, y0, x1, y1 = gaze.roi
+        cv2.rectangle(frame, (x0, y0), (x1 - 1, y1 - 1), (255, 128, 0), 1)
+        cv2.circle(frame, (int(gaze.x * w), int(gaze.y * h)), 6, (0, 255, 0), -1)
+    return frame
+
+# Headless unless ECHOES_TRACKER_DEBUG asks for a window or an MJPEG stream
+debug_overlay = make_overlay(draw_gaze, "Eye Tracker", on_quit=lambda: eye_tracker.stop())
+
+def publish_gaze(packet):
     global gaze_coords
-    cap = cv2.VideoCapture(0)
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            continue
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = face_mesh.process(frame_rgb)
-        if results.multi_face_landmarks:
-            landmarks = results.multi_face_landmarks[0].landmark
-            left_eye = landmarks[33]  # approximate left eye
-            right_eye = landmarks[263]  # approximate right eye
-            # normalized gaze: midpoint between eyes
-            gaze_coords["x"] = (left_eye.x + right_eye.x)/2
-            gaze_coords["y"] = (left_eye.y + right_eye.y)/2
-            socketio.emit("gaze_update", gaze_coords)
-        # Show tracker window
-        cv2.imshow("Eye Tracker", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-    cap.release()
-    cv2.destroyAllWindows()
-
-threading.Thread(target=eye_tracker, daemon=True).start()
+    if packet.result is not None:
+        gaze_coords = {"x": packet.result.x, "y": packet.result.y}
+        gaze_publisher.publish((packet.result.x, packet.result.y))
+    if debug_overlay is not None:
+        debug_overlay.offer(packet)
+
+eye_tracker = TrackerPipeline(open_source(os.environ.get("ECHOES_CAPTURE", "0")), gaze_tracker.process, publish_gaze, max_read_failures=float("inf"),
+                              on_exit=debug_overlay.stop if debug_overlay is not None else None)
+eye_tracker.start()
+if debug_overlay is not None:
+    debug_overlay.start()
 
 # Load user phrases
 try:
@@ -53,28 +82,25 @@ except:
 
 # Profanity filter (simple example)
 bad_words = ["badword1", "badword2"]
+profanity = WordMatcher(bad_words)
 
 def check_profanity(text):
-    for word in bad_words:
-        if word.lower() in text.lower():
-            return True
-    return False
+    return profanity.contains(text)
 
 def teach_profanity(text):
     return f"The phrase '{text}' contains a word that is not appropriate. Try using polite words instead."
 
-# AI call placeholder (Ollama llama3.2)
+# AI call (Ollama llama3.2) through the shared pooled client
+ollama = OllamaClient(host=os.environ.get("OLLAMA_HOST", "http://localhost:11434"), timeout=(2.0, 20.0))
+llm_limit = serving.limit("llm", concurrency=ollama.max_in_flight, queue=16, timeout=15.0)
+
 def ai_suggest(text):
     try:
-        response = requests.post(
-            "http://localhost:11434/completions",
-            json={
-                "model": "llama3.2",
-                "prompt": f"Suggest next phrase for AAC context: '{text}'",
-                "max_tokens": 30
-            }
-        )
-        return response.json()["completion"]
+        return ollama.generate(
+            f"Suggest next phrase for AAC context: '{text}'",
+            model="llama3.2",
+            options={"num_predict": 30}
+        ).strip()
     except:
         return "Suggestion unavailable"
 
@@ -92,10 +118,36 @@ def select_phrase():
     return jsonify({"blocked": False, "message": phrase})
 
 @app.route("/ai_suggest", methods=["POST"])
+@llm_limit
 def ai_suggest_route():
     text = request.json.get("text", "")
-    suggestion = ai_suggest(text)
+    # Off the event loop: a slow generation must not stall gaze updates.
+    suggestion = serving.blocking(ai_suggest, text)
     return jsonify({"suggestion": suggestion})
 
+@app.route("/tracker_stats")
+def tracker_stats():
+    stats = eye_tracker.stats()
+    stats["gaze_publisher"] = gaze_publisher.stats()
+    stats["serving"] = serving.stats()
+    return jsonify(stats)
+
+@socketio.on("subscribe_gaze")
+def subscribe_gaze():
+    join_room(GAZE_ROOM)
+    # Start the new viewer from the current point rather than waiting for movement.
+    emit("gaze_update", gaze_publisher.payload((gaze_coords["x"], gaze_coords["y"])))
+
+@socketio.on("unsubscribe_gaze")
+def unsubscribe_gaze():
+    leave_room(GAZE_ROOM)
+
+@app.route("/tracker_debug")
+def tracker_debug():
+    if debug_overlay is None or not isinstance(debug_overlay.sink, MjpegSink):
+        return jsonify({"error": "Debug stream disabled"}), 404
+    # The sink waits on a thread condition between frames; wait off the event loop.
+    return Response(serving.iterate(debug_overlay.sink.stream()), mimetype=debug_overlay.sink.mimetype)
+
 if __name__ == "__main__":
-    socketio.run(app, host="0.0.0.0", port=5000)
+    serving.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", "5000")), socketio=socketio)
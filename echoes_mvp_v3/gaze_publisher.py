@@ -0,0 +1,81 @@
+"""Throttled, compact gaze publishing over Socket.IO.
+
+``GazePublisher.publish`` is called once per processed frame but emits
+only when the gaze moved more than ``deadband`` (normalized units, compared
+with the last value actually sent) and at most ``max_rate`` times a second.
+Throttled moves are not lost: the next frame is compared against the last
+emitted value, so it goes out as soon as the interval allows. Payloads are
+JSON via ``encode`` or, with ``binary``, a packed little-endian float32
+array (Socket.IO sends it as a binary attachment, an ArrayBuffer in the
+browser).
+"""
+import threading
+import time
+
+import numpy as np
+
+
+def pack_float32(values):
+    return np.asarray(values, dtype="<f4").ravel().tobytes()
+
+
+def unpack_float32(payload):
+    return np.frombuffer(payload, dtype="<f4")
+
+
+class GazePublisher:
+    def __init__(self, emit, event, max_rate=30.0, deadband=0.004, binary=False, encode=None):
+        """``emit(event, payload)`` sends; ``encode(values)`` builds the JSON
+        payload when ``binary`` is off."""
+        self.emit = emit
+        self.event = event
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.deadband = deadband
+        self.binary = binary
+        self.encode = encode or (lambda v: v.tolist())
+        self._lock = threading.Lock()
+        self._last = None
+        self._last_at = float("-inf")
+        self.emitted = 0
+        self.throttled = 0
+        self.suppressed = 0
+        self.bytes = 0
+
+    @property
+    def last(self):
+        """Last emitted values (a float32 array) or None."""
+        return self._last
+
+    def payload(self, values):
+        return pack_float32(values) if self.binary else self.encode(values)
+
+    def publish(self, values, now=None):
+        """Emit ``values`` if they moved enough and the rate allows; returns
+        whether anything was sent."""
+        now = time.perf_counter() if now is None else now
+        values = np.asarray(values, dtype=np.float32).ravel()
+        with self._lock:
+            if self._last is not None and self._last.shape == values.shape:
+                if float(np.abs(values - self._last).max()) <= self.deadband:
+                    self.suppressed += 1
+                    return False
+            if now - self._last_at < self.min_interval:
+                self.throttled += 1
+                return False
+            self._last, self._last_at = values, now
+            self.emitted += 1
+        payload = self.payload(values)
+        if isinstance(payload, bytes):
+            self.bytes += len(payload)
+        self.emit(self.event, payload)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "emitted": self.emitted,
+                "throttled": self.throttled,
+                "suppressed": self.suppressed,
+                "binary": self.binary,
+                "bytes": self.bytes,
+            }
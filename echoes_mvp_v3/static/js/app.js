@@ -3,10 +3,18 @@ let dwellTime = 1000; // 1 second
 let dwellTimers = {};
 let highlighted = null;
 
-// Update phrase highlight based on gaze
+// Gaze is only sent to subscribed sockets; stop it while the tab is hidden.
+function syncGazeSubscription() {
+    socket.emit(document.hidden ? "unsubscribe_gaze" : "subscribe_gaze");
+}
+socket.on("connect", syncGazeSubscription);
+document.addEventListener("visibilitychange", syncGazeSubscription);
+
+// Update phrase highlight based on gaze (JSON {x, y} or a packed float32 pair)
 socket.on("gaze_update", (data) => {
-    const x = data.x;
-    const y = data.y;
+    const packed = data instanceof ArrayBuffer ? new Float32Array(data) : null;
+    const x = packed ? packed[0] : data.x;
+    const y = packed ? packed[1] : data.y;
     document.querySelectorAll(".phrase").forEach(phrase => {
         const rect = phrase.getBoundingClientRect();
         const centerX = rect.left + rect.width/2;
@@ -0,0 +1,135 @@
+"""v3 serves on eventlet by default: tracker emits go through the hub and
+/ai_suggest is capped without holding up other routes."""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import serving
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.tasks = []
+
+    def start_background_task(self, target):
+        t = threading.Thread(target=target, daemon=True)
+        t.start()
+        self.tasks.append(t)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+def test_hub_handoff_is_direct_when_threaded(monkeypatch):
+    monkeypatch.setattr(serving, "ASYNC", False)
+    fn = lambda *args: None
+    assert serving.hub_handoff(FakeSocketIO(), fn) is fn
+
+
+def test_hub_handoff_runs_calls_on_the_hub_task(monkeypatch):
+    monkeypatch.setattr(serving, "ASYNC", True)
+    sio, calls = FakeSocketIO(), []
+    emit = serving.hub_handoff(sio, lambda event, data: calls.append((event, data, threading.current_thread())))
+    tracker = threading.Thread(target=lambda: [emit("gaze_update", i) for i in range(100)])
+    tracker.start()
+    tracker.join()
+    deadline = time.monotonic() + 2
+    while (not calls or calls[-1][1] != 99) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert calls[-1][:2] == ("gaze_update", 99)  # the newest value always goes out
+    assert {c[2] for c in calls} == {sio.tasks[0]}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _stub_ollama(delay):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            time.sleep(delay)
+            body = json.dumps({"response": "more please", "done": True}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def server(tmp_path):
+    pytest.importorskip("eventlet")
+    pytest.importorskip("mediapipe")
+    workdir = tmp_path / "app"
+    shutil.copytree(APP_DIR, workdir, ignore=shutil.ignore_patterns("__pycache__", "tests"))
+    stub = _stub_ollama(1.0)
+    port = _free_port()
+    env = {k: v for k, v in os.environ.items() if k != "ECHOES_SERVE"}
+    env.update(ECHOES_CAPTURE="synthetic:320x240@15", PORT=str(port),
+               OLLAMA_HOST="http://127.0.0.1:%d" % stub.server_address[1])
+    proc = subprocess.Popen([sys.executable, "app.py"], cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = "http://127.0.0.1:%d" % port
+    try:
+        for _ in range(150):
+            try:
+                requests.get(url + "/tracker_stats", timeout=1)
+                break
+            except requests.RequestException:
+                time.sleep(0.2)
+        else:
+            pytest.fail("server did not start")
+        yield url
+    finally:
+        proc.kill()
+        proc.wait(10)
+        stub.shutdown()
+
+
+def test_async_default_caps_ai_suggest_and_keeps_stats_fast(server):
+    stats = requests.get(server + "/tracker_stats", timeout=3).json()["serving"]
+    assert stats["mode"] == "async"
+    llm = stats["routes"]["llm"]
+    capacity = llm["concurrency"] + llm["queue"]
+
+    results = []
+    def suggest():
+        r = requests.post(server + "/ai_suggest", json={"text": "I want"}, timeout=30)
+        results.append((r.status_code, r.headers.get("Retry-After")))
+    clients = [threading.Thread(target=suggest) for _ in range(capacity + 8)]
+    for t in clients:
+        t.start()
+    time.sleep(0.5)
+    for _ in range(5):
+        t0 = time.perf_counter()
+        assert requests.get(server + "/tracker_stats", timeout=3).status_code == 200
+        assert time.perf_counter() - t0 < 1.0
+        time.sleep(0.1)
+    for t in clients:
+        t.join(60)
+
+    codes = [code for code, _ in results]
+    assert codes.count(503) >= 8 and codes.count(200) >= llm["concurrency"]
+    assert all(retry == "1" for code, retry in results if code == 503)